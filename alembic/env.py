@@ -0,0 +1,42 @@
+"""
+Alembic environment
+Runs migrations against the database configured in app.core.config
+"""
+from alembic import context
+from sqlalchemy import create_engine, pool
+from app.core.config import settings
+from app.core.database import Base
+
+# Register every model on Base.metadata (as init_db does)
+from app.models import user, product_attributes, supplier, product, purchase  # noqa
+from app.models import return_workflow, sales, stock, price_history  # noqa
+from app.models import supplier_stats, idempotency, cost_layer  # noqa
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Emit the migration SQL without connecting to the database"""
+    context.configure(
+        url=context.config.get_main_option("sqlalchemy.url") or settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run the migrations on a live connection"""
+    url = context.config.get_main_option("sqlalchemy.url") or settings.database_url
+    engine = create_engine(url, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,250 @@
+"""Add the inventory, costing and purchasing schema changes
+
+Brings a database created by create_all from the original models up to date:
+new tables (price history, supplier stats, idempotency keys, cost layers,
+purchase return documents, stock reservations), new columns on existing
+tables, their indexes, and the EAN-13 item sequence.
+
+Every step checks the live schema first: the application's startup create_all
+already creates missing tables (but never adds columns), so a database may be
+partly up to date when this runs. Run the backfill scripts afterwards.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from app.core.config import settings
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _has_table(table: str) -> bool:
+    return _inspector().has_table(table)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in _inspector().get_columns(table)}
+
+
+def _has_index(table: str, index: str) -> bool:
+    return index in {i["name"] for i in _inspector().get_indexes(table)}
+
+
+def _add_column(table: str, column: sa.Column) -> None:
+    if not _has_column(table, column.name):
+        op.add_column(table, column)
+
+
+def _create_index(name: str, table: str, columns: list, **kwargs) -> None:
+    if not _has_index(table, name):
+        op.create_index(name, table, columns, **kwargs)
+
+
+def _refund_status():
+    values = ("PENDING", "COMPLETED")
+    return sa.Enum(*values, name="refundstatus").with_variant(
+        postgresql.ENUM(*values, name="refundstatus", create_type=False), "postgresql"
+    )
+
+
+def upgrade():
+    if _is_postgresql():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE SEQUENCE IF NOT EXISTS ean13_item_seq START WITH 1")
+
+    # Product variations: moving average cost, reserved stock, barcode lookups
+    _add_column("product_variations", sa.Column("average_cost", sa.Numeric(12, 4), nullable=True))
+    _add_column(
+        "product_variations",
+        sa.Column("reserved_stock", sa.Integer(), nullable=False, server_default="0")
+    )
+    _create_index("ix_product_variations_barcode", "product_variations", ["barcode"])
+
+    # Purchases: receipt time, listing indexes, per-line returned quantity
+    _add_column("purchases", sa.Column("received_at", sa.DateTime(timezone=True), nullable=True))
+    _create_index("ix_purchases_supplier_purchase_date", "purchases", ["supplier_id", "purchase_date"])
+    _create_index(
+        "ix_purchases_payment_status_purchase_date", "purchases", ["payment_status", "purchase_date"]
+    )
+    _add_column(
+        "purchase_details",
+        sa.Column("quantity_returned_total", sa.Integer(), nullable=False, server_default="0")
+    )
+
+    # Stock ledger: unit cost of each movement
+    _add_column("stock_ledger", sa.Column("unit_cost", sa.Numeric(12, 4), nullable=True))
+
+    # Suppliers: normalized dedupe keys and partial-match search indexes
+    for column, length in (("name_key", 200), ("phone_key", 20), ("whatsapp_key", 20), ("email_key", 100)):
+        _add_column("suppliers", sa.Column(column, sa.String(length), nullable=True))
+        _create_index(f"ix_suppliers_{column}", "suppliers", [column])
+    for column in ("name", "contact_person", "phone_number", "whatsapp_number"):
+        _create_index(
+            f"ix_suppliers_{column}_trgm",
+            "suppliers",
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"}
+        )
+
+    if not _has_table("price_history"):
+        op.create_table(
+            "price_history",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+            sa.Column("product_variation_id", sa.Integer(), sa.ForeignKey("product_variations.id"), nullable=True),
+            sa.Column("selling_price", sa.Numeric(10, 2), nullable=True),
+            sa.Column("purchase_price", sa.Numeric(10, 2), nullable=True),
+            sa.Column("valid_from", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("source", sa.String(50), nullable=True)
+        )
+        op.create_index("ix_price_history_id", "price_history", ["id"])
+        op.create_index(
+            "ix_price_history_variation_valid_from", "price_history", ["product_variation_id", "valid_from"]
+        )
+        op.create_index("ix_price_history_product_valid_from", "price_history", ["product_id", "valid_from"])
+
+    if not _has_table("supplier_stats"):
+        op.create_table(
+            "supplier_stats",
+            sa.Column("supplier_id", sa.Integer(), sa.ForeignKey("suppliers.id"), primary_key=True),
+            sa.Column("purchase_count", sa.Integer(), nullable=False),
+            sa.Column("total_purchased", sa.Numeric(14, 2), nullable=False),
+            sa.Column("total_paid", sa.Numeric(14, 2), nullable=False),
+            sa.Column("quantity_purchased", sa.Integer(), nullable=False),
+            sa.Column("quantity_returned", sa.Integer(), nullable=False),
+            sa.Column("received_count", sa.Integer(), nullable=False),
+            sa.Column("lead_time_days_total", sa.Integer(), nullable=False),
+            sa.Column("last_purchase_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now())
+        )
+
+    if not _has_table("idempotency_keys"):
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("key", sa.String(255), nullable=False),
+            sa.Column("scope", sa.String(255), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("request_hash", sa.String(64), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=True),
+            sa.Column("response_body", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+            sa.UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_keys_user_scope_key")
+        )
+        op.create_index("ix_idempotency_keys_id", "idempotency_keys", ["id"])
+        op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+    if not _has_table("cost_layers"):
+        op.create_table(
+            "cost_layers",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("product_variation_id", sa.Integer(), sa.ForeignKey("product_variations.id"), nullable=False),
+            sa.Column("source_ledger_id", sa.String(), sa.ForeignKey("stock_ledger.id"), nullable=True),
+            sa.Column("unit_cost", sa.Numeric(12, 4), nullable=False),
+            sa.Column("quantity_received", sa.Integer(), nullable=False),
+            sa.Column("quantity_remaining", sa.Integer(), nullable=False),
+            sa.Column("received_at", sa.DateTime(timezone=True), nullable=False)
+        )
+        op.create_index("ix_cost_layers_id", "cost_layers", ["id"])
+        op.create_index(
+            "ix_cost_layers_open",
+            "cost_layers",
+            ["product_variation_id", "id"],
+            postgresql_where=sa.text("quantity_remaining > 0"),
+            sqlite_where=sa.text("quantity_remaining > 0")
+        )
+
+    if not _has_table("purchase_return_documents"):
+        op.create_table(
+            "purchase_return_documents",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("purchase_id", sa.String(), sa.ForeignKey("purchases.id"), nullable=False),
+            sa.Column("return_date", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("reason", sa.Text(), nullable=True),
+            sa.Column("refund_total", sa.Numeric(12, 2), nullable=False),
+            sa.Column("refund_status", _refund_status(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=False)
+        )
+        op.create_index("ix_purchase_return_documents_id", "purchase_return_documents", ["id"])
+        op.create_index("ix_purchase_return_documents_purchase_id", "purchase_return_documents", ["purchase_id"])
+    if not _has_column("purchase_returns", "document_id"):
+        with op.batch_alter_table("purchase_returns") as batch:
+            batch.add_column(sa.Column("document_id", sa.String(), nullable=True))
+            batch.create_foreign_key(
+                "fk_purchase_returns_document_id", "purchase_return_documents", ["document_id"], ["id"]
+            )
+    _create_index("ix_purchase_returns_document_id", "purchase_returns", ["document_id"])
+
+    if not _has_table("stock_reservations"):
+        op.create_table(
+            "stock_reservations",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("sales_order_id", sa.String(), sa.ForeignKey("sales_orders.id"), nullable=False),
+            sa.Column("product_variation_id", sa.Integer(), sa.ForeignKey("product_variations.id"), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now())
+        )
+        op.create_index("ix_stock_reservations_id", "stock_reservations", ["id"])
+        op.create_index("ix_stock_reservations_sales_order_id", "stock_reservations", ["sales_order_id"])
+        op.create_index("ix_stock_reservations_expires_at", "stock_reservations", ["expires_at"])
+
+    if _is_postgresql():
+        # Start allocating after the highest code already in the internal range
+        prefix = settings.EAN13_PREFIX
+        width = 12 - len(prefix)
+        op.execute(sa.text(
+            "SELECT setval('ean13_item_seq', highest) FROM ("
+            "  SELECT MAX(SUBSTRING(barcode FROM :start FOR :width)::bigint) AS highest"
+            "  FROM product_variations WHERE barcode ~ :pattern"
+            ") codes WHERE highest >= (SELECT last_value FROM ean13_item_seq)"
+        ).bindparams(start=len(prefix) + 1, width=width, pattern=f"^{prefix}[0-9]{{{width + 1}}}$"))
+
+
+def downgrade():
+    op.drop_table("stock_reservations")
+    op.drop_index("ix_purchase_returns_document_id", table_name="purchase_returns")
+    with op.batch_alter_table("purchase_returns") as batch:
+        batch.drop_constraint("fk_purchase_returns_document_id", type_="foreignkey")
+        batch.drop_column("document_id")
+    op.drop_table("purchase_return_documents")
+    op.drop_table("cost_layers")
+    op.drop_table("idempotency_keys")
+    op.drop_table("supplier_stats")
+    op.drop_table("price_history")
+
+    for column in ("name", "contact_person", "phone_number", "whatsapp_number"):
+        op.drop_index(f"ix_suppliers_{column}_trgm", table_name="suppliers")
+    for column in ("name_key", "phone_key", "whatsapp_key", "email_key"):
+        op.drop_index(f"ix_suppliers_{column}", table_name="suppliers")
+        op.drop_column("suppliers", column)
+
+    op.drop_column("stock_ledger", "unit_cost")
+    op.drop_column("purchase_details", "quantity_returned_total")
+    op.drop_index("ix_purchases_payment_status_purchase_date", table_name="purchases")
+    op.drop_index("ix_purchases_supplier_purchase_date", table_name="purchases")
+    op.drop_column("purchases", "received_at")
+    op.drop_index("ix_product_variations_barcode", table_name="product_variations")
+    op.drop_column("product_variations", "reserved_stock")
+    op.drop_column("product_variations", "average_cost")
+
+    if _is_postgresql():
+        op.execute("DROP SEQUENCE IF EXISTS ean13_item_seq")
@@ -0,0 +1,23 @@
+"""Add a lease to in-progress idempotency claims
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("idempotency_keys")}
+    if "locked_until" not in columns:
+        op.add_column("idempotency_keys", sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column("idempotency_keys", "locked_until")
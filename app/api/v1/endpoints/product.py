@@ -1,24 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 from app.core.database import get_db
 from app.services.product import product_service
+from app.services.barcode import barcode_service
 from app.schemas.product import (
     ProductCreate, ProductUpdate, ProductResponse, 
-    ProductListResponse, ProductMinimalResponse
+    ProductListResponse, ProductMinimalResponse,
+    ProductBulkFilter, ProductBulkStatusResponse,
+    ProductBulkPriceUpdate, ProductBulkPriceResponse,
+    VariationPriceAsOfResponse, ProductVariationCreate, ProductVariationBulkCreate,
+    ProductVariationUpdate, ProductVariationResponse, ProductClone
 )
+from app.schemas.supplier import SupplierListResponse
 from app.models.product import OwnershipStatus
+from app.models.product_attributes import (
+    ProductCategory, ProductMaterial, ProductStyle,
+    ProductBrand, ProductColor, CountryOfOrigin
+)
+from app.models.user import User
+from app.services.attribute_cache import attribute_cache
+from app.services.auth import get_current_user
 
 router = APIRouter()
 
 
+def _serialize_variation(db: Session, variation) -> dict:
+    """Build a variation response dict with its color name and hex code from the attribute cache"""
+    color = attribute_cache.get(db, ProductColor, variation.color_id)
+    var_dict = variation.__dict__.copy()
+    var_dict.update({
+        "color_name": color["name"] if color else None,
+        "color_hex": color["hex_code"] if color else None
+    })
+    return var_dict
+
+
+def _serialize_product(db: Session, product) -> ProductResponse:
+    """Build a product response with related names resolved from the attribute cache"""
+    product_dict = product.__dict__.copy()
+    product_dict.update({
+        "category_name": attribute_cache.name(db, ProductCategory, product.category_id),
+        "material_name": attribute_cache.name(db, ProductMaterial, product.material_id),
+        "brand_name": attribute_cache.name(db, ProductBrand, product.brand_id),
+        "style_name": attribute_cache.name(db, ProductStyle, product.style_id),
+        "country_name": attribute_cache.name(db, CountryOfOrigin, product.country_id),
+        "supplier_name": product.supplier.name if product.supplier else None,
+    })
+    
+    # Add color names and hex codes to variations
+    product_dict["variations"] = [
+        _serialize_variation(db, variation) for variation in product.variations
+    ]
+    
+    return ProductResponse(**product_dict)
+
+
 @router.post("/", response_model=ProductResponse)
 async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
 ):
     """Create a new product with variations"""
-    return product_service.create(db, product)
+    try:
+        return _serialize_product(db, product_service.create(db, product, current_user.id))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 @router.get("/", response_model=List[ProductListResponse])
@@ -55,8 +107,8 @@ async def get_products(
             "ownership_status": product.ownership_status,
             "is_active": product.is_active,
             "created_at": product.created_at,
-            "category_name": product.category.name if product.category else None,
-            "brand_name": product.brand.name if product.brand else None,
+            "category_name": attribute_cache.name(db, ProductCategory, product.category_id),
+            "brand_name": attribute_cache.name(db, ProductBrand, product.brand_id),
             "supplier_name": product.supplier.name if product.supplier else None,
             "variation_count": len(product.variations) if hasattr(product, 'variations') else 0
         }
@@ -65,6 +117,61 @@ async def get_products(
     return result
 
 
+@router.post("/bulk/deactivate", response_model=ProductBulkStatusResponse)
+async def bulk_deactivate_products(
+    filters: ProductBulkFilter,
+    db: Session = Depends(get_db)
+):
+    """Deactivate all products matching a filter, including their variations"""
+    try:
+        return product_service.bulk_set_active(db, filters, is_active=False)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/bulk/reactivate", response_model=ProductBulkStatusResponse)
+async def bulk_reactivate_products(
+    filters: ProductBulkFilter,
+    db: Session = Depends(get_db)
+):
+    """Reactivate all products matching a filter, including their variations"""
+    try:
+        return product_service.bulk_set_active(db, filters, is_active=True)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/bulk/prices", response_model=ProductBulkPriceResponse)
+async def bulk_update_prices(
+    price_update: ProductBulkPriceUpdate,
+    db: Session = Depends(get_db)
+):
+    """Reprice all products matching a filter (use dry_run to preview changes)"""
+    try:
+        return product_service.bulk_update_prices(db, price_update)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/prices/as-of", response_model=List[VariationPriceAsOfResponse])
+async def get_variation_prices_as_of(
+    at: datetime,
+    variation_ids: List[int] = Query(..., min_length=1),
+    db: Session = Depends(get_db)
+):
+    """Get the prices that were valid at a timestamp for many variations"""
+    return product_service.get_variation_prices_as_of(db, variation_ids, at)
+
+
 @router.get("/minimal", response_model=List[ProductMinimalResponse])
 async def get_products_minimal(
     is_active: bool = True,
@@ -92,30 +199,7 @@ async def get_product(
             detail="Product not found"
         )
     
-    # Add related entity names
-    product_dict = product.__dict__.copy()
-    product_dict.update({
-        "category_name": product.category.name if product.category else None,
-        "material_name": product.material.name if product.material else None,
-        "brand_name": product.brand.name if product.brand else None,
-        "style_name": product.style.name if product.style else None,
-        "country_name": product.country.name if product.country else None,
-        "supplier_name": product.supplier.name if product.supplier else None,
-    })
-    
-    # Add color names and hex codes to variations
-    variations = []
-    for variation in product.variations:
-        var_dict = variation.__dict__.copy()
-        var_dict.update({
-            "color_name": variation.color.name if variation.color else None,
-            "color_hex": variation.color.hex_code if variation.color else None
-        })
-        variations.append(var_dict)
-    
-    product_dict["variations"] = variations
-    
-    return ProductResponse(**product_dict)
+    return _serialize_product(db, product)
 
 
 @router.get("/slug/{slug}", response_model=ProductResponse)
@@ -131,30 +215,161 @@ async def get_product_by_slug(
             detail="Product not found"
         )
     
-    # Add related entity names
-    product_dict = product.__dict__.copy()
-    product_dict.update({
-        "category_name": product.category.name if product.category else None,
-        "material_name": product.material.name if product.material else None,
-        "brand_name": product.brand.name if product.brand else None,
-        "style_name": product.style.name if product.style else None,
-        "country_name": product.country.name if product.country else None,
-        "supplier_name": product.supplier.name if product.supplier else None,
-    })
-    
-    # Add color names and hex codes to variations
-    variations = []
-    for variation in product.variations:
-        var_dict = variation.__dict__.copy()
-        var_dict.update({
-            "color_name": variation.color.name if variation.color else None,
-            "color_hex": variation.color.hex_code if variation.color else None
-        })
-        variations.append(var_dict)
-    
-    product_dict["variations"] = variations
-    
-    return ProductResponse(**product_dict)
+    return _serialize_product(db, product)
+
+
+@router.post("/{product_id}/clone", response_model=ProductResponse)
+async def clone_product(
+    product_id: int,
+    overrides: ProductClone,
+    db: Session = Depends(get_db)
+):
+    """Clone a product and its variations, applying field overrides"""
+    product = product_service.get(db, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    return _serialize_product(db, product_service.clone(db, product, overrides))
+
+
+@router.get("/{product_id}/variations", response_model=List[ProductVariationResponse])
+async def get_product_variations(
+    product_id: int,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(get_db)
+):
+    """Get the variations of a product"""
+    return [
+        _serialize_variation(db, variation)
+        for variation in product_service.get_variations(db, product_id, is_active=is_active)
+    ]
+
+
+@router.post("/{product_id}/variations", response_model=ProductVariationResponse)
+async def create_product_variation(
+    product_id: int,
+    variation: ProductVariationCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Add a variation to a product"""
+    product = product_service.get(db, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    try:
+        variations = product_service.create_variations(
+            db, product, [variation], current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return _serialize_variation(db, variations[0])
+
+
+@router.post("/{product_id}/barcodes", response_model=List[ProductVariationResponse])
+async def assign_product_barcodes(
+    product_id: int,
+    overwrite: bool = Query(False, description="Replace barcodes that are already set"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Allocate internal EAN-13 barcodes for the variations of a product"""
+    if not product_service.get(db, product_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    try:
+        variations = barcode_service.assign_product_barcodes(db, product_id, overwrite=overwrite)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return [_serialize_variation(db, variation) for variation in variations]
+
+
+@router.post("/{product_id}/variations/bulk", response_model=List[ProductVariationResponse])
+async def create_product_variations_bulk(
+    product_id: int,
+    bulk_create: ProductVariationBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Add one variation per color to a product in a single batch"""
+    product = product_service.get(db, product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    variations = [
+        ProductVariationCreate(
+            color_id=color_id,
+            selling_price=bulk_create.selling_price,
+            purchase_price=bulk_create.purchase_price,
+            initial_stock=bulk_create.initial_stock
+        )
+        for color_id in bulk_create.color_ids
+    ]
+    try:
+        created = product_service.create_variations(
+            db, product, variations, current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return [_serialize_variation(db, variation) for variation in created]
+
+
+@router.put("/{product_id}/variations/{variation_id}", response_model=ProductVariationResponse)
+async def update_product_variation(
+    product_id: int,
+    variation_id: int,
+    variation_update: ProductVariationUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update a product variation"""
+    variation = product_service.get_variation(db, product_id, variation_id)
+    if not variation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product variation not found"
+        )
+    try:
+        variation = product_service.update_variation(db, variation, variation_update)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return _serialize_variation(db, variation)
+
+
+@router.delete("/{product_id}/variations/{variation_id}")
+async def delete_product_variation(
+    product_id: int,
+    variation_id: int,
+    db: Session = Depends(get_db)
+):
+    """Delete a product variation"""
+    variation = product_service.get_variation(db, product_id, variation_id)
+    if not variation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product variation not found"
+        )
+    product_service.delete_variation(db, variation)
+    return {"message": "Product variation deleted successfully"}
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -170,7 +385,7 @@ async def update_product(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-    return product_service.update(db, product, product_update)
+    return _serialize_product(db, product_service.update(db, product, product_update))
 
 
 @router.delete("/{product_id}")
@@ -189,10 +404,13 @@ async def delete_product(
     return {"message": "Product deleted successfully"}
 
 
-@router.get("/suppliers/{ownership_status}", response_model=List)
+@router.get("/suppliers/{ownership_status}", response_model=List[SupplierListResponse])
 async def get_suppliers_by_ownership(
     ownership_status: OwnershipStatus,
     db: Session = Depends(get_db)
 ):
     """Get suppliers based on product ownership status"""
-    return product_service.get_suppliers_by_ownership(db, ownership_status)
+    return Response(
+        content=product_service.get_suppliers_by_ownership(db, ownership_status),
+        media_type="application/json"
+    )
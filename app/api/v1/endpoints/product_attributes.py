@@ -1,23 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.services.product_attributes import (
     category_service, material_service, style_service,
-    brand_service, color_service, country_service
+    brand_service, color_service, country_service, attribute_services
 )
+from app.services.bootstrap import bootstrap_service
+from app.services.attribute_resolver import attribute_resolver_service
 from app.schemas.product_attributes import (
     ProductCategoryCreate, ProductCategoryUpdate, ProductCategoryResponse,
     ProductMaterialCreate, ProductMaterialUpdate, ProductMaterialResponse,
     ProductStyleCreate, ProductStyleUpdate, ProductStyleResponse,
     ProductBrandCreate, ProductBrandUpdate, ProductBrandResponse,
     ProductColorCreate, ProductColorUpdate, ProductColorResponse,
-    CountryOfOriginCreate, CountryOfOriginUpdate, CountryOfOriginResponse
+    CountryOfOriginCreate, CountryOfOriginUpdate, CountryOfOriginResponse,
+    AttributeType, ProductAttributeBulkUpsert, ProductAttributeBulkResult,
+    AttributeResolveRequest, AttributeResolveResult
 )
 
 router = APIRouter()
 
 
+@router.get("/bootstrap")
+async def get_bootstrap(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Get all active attribute lists and supplier dropdowns in one cached response"""
+    payload = bootstrap_service.get(db)
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    
+    if request.headers.get("if-none-match") == payload.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzip_body, media_type="application/json", headers=headers)
+    
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+@router.post("/resolve", response_model=List[AttributeResolveResult])
+async def resolve_attributes(
+    resolve_request: AttributeResolveRequest,
+    db: Session = Depends(get_db)
+):
+    """Resolve attribute names (case- and accent-insensitive) to IDs, optionally creating missing ones"""
+    return attribute_resolver_service.resolve(
+        db, resolve_request.items, create_missing=resolve_request.create_missing
+    )
+
+
+@router.post("/{attribute_type}/bulk", response_model=List[ProductAttributeBulkResult])
+async def bulk_upsert_attributes(
+    attribute_type: AttributeType,
+    bulk_upsert: ProductAttributeBulkUpsert,
+    db: Session = Depends(get_db)
+):
+    """Create or update many attributes of one type by name, returning their IDs"""
+    return attribute_services[attribute_type].bulk_upsert(db, bulk_upsert.items)
+
+
 # Category endpoints
 @router.post("/categories", response_model=ProductCategoryResponse)
 async def create_category(
@@ -45,7 +89,7 @@ async def get_category(
     db: Session = Depends(get_db)
 ):
     """Get a product category by ID"""
-    category = category_service.get(db, category_id)
+    category = category_service.get_cached(db, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -113,7 +157,7 @@ async def get_material(
     db: Session = Depends(get_db)
 ):
     """Get a product material by ID"""
-    material = material_service.get(db, material_id)
+    material = material_service.get_cached(db, material_id)
     if not material:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -181,7 +225,7 @@ async def get_style(
     db: Session = Depends(get_db)
 ):
     """Get a product style by ID"""
-    style = style_service.get(db, style_id)
+    style = style_service.get_cached(db, style_id)
     if not style:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -249,7 +293,7 @@ async def get_brand(
     db: Session = Depends(get_db)
 ):
     """Get a product brand by ID"""
-    brand = brand_service.get(db, brand_id)
+    brand = brand_service.get_cached(db, brand_id)
     if not brand:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -317,7 +361,7 @@ async def get_color(
     db: Session = Depends(get_db)
 ):
     """Get a product color by ID"""
-    color = color_service.get(db, color_id)
+    color = color_service.get_cached(db, color_id)
     if not color:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -385,7 +429,7 @@ async def get_country(
     db: Session = Depends(get_db)
 ):
     """Get a country of origin by ID"""
-    country = country_service.get(db, country_id)
+    country = country_service.get_cached(db, country_id)
     if not country:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,45 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 from app.core.database import get_db
-from app.services.purchase import purchase_service
+from app.services.purchase import purchase_service, PurchaseLineError
 from app.models.purchase import PurchaseStatus, PaymentStatus
 from app.schemas.purchase import (
     PurchaseCreate, PurchaseUpdate, PurchaseResponse, 
-    PurchaseListResponse, PaymentHistoryCreate, PaymentHistoryResponse
+    PurchaseListResponse, PaymentHistoryCreate, PaymentHistoryResponse,
+    PurchaseSummary, AgingReportResponse
 )
 from app.models.user import User
 from app.services.auth import get_current_user
+from app.services.idempotency import idempotency_service
+from app.services.payables import payables_service
 
 router = APIRouter()
 
 @router.post("/", response_model=PurchaseResponse)
 async def create_purchase(
     purchase: PurchaseCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new purchase"""
-    return purchase_service.create_purchase(db, purchase, current_user.id)
+    try:
+        return idempotency_service.execute(
+            db, idempotency_key, "POST /purchases", current_user.id, purchase,
+            lambda: purchase_service.create_purchase(db, purchase, current_user.id),
+            PurchaseResponse
+        )
+    except PurchaseLineError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": str(e), "errors": e.errors}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 @router.get("/", response_model=List[PurchaseListResponse])
 async def get_purchases(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    supplier_id: Optional[str] = None,
+    supplier_id: Optional[int] = None,
+    status: Optional[PurchaseStatus] = None,
+    payment_status: Optional[PaymentStatus] = None,
+    purchase_date_from: Optional[date] = None,
+    purchase_date_to: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Get purchases with optional filtering"""
+    purchases = purchase_service.get_purchases(
+        db,
+        skip=skip,
+        limit=limit,
+        supplier_id=supplier_id,
+        status=status,
+        payment_status=payment_status,
+        purchase_date_from=purchase_date_from,
+        purchase_date_to=purchase_date_to
+    )
+    return [
+        PurchaseListResponse(
+            id=purchase.id,
+            supplier_name=purchase.supplier.name,
+            status=purchase.status,
+            payment_status=purchase.payment_status,
+            total_price=purchase.total_price,
+            purchase_date=purchase.purchase_date,
+            created_at=purchase.created_at
+        )
+        for purchase in purchases
+    ]
+
+@router.get("/summary", response_model=PurchaseSummary)
+async def get_purchase_summary(
+    supplier_id: Optional[int] = None,
     status: Optional[PurchaseStatus] = None,
     payment_status: Optional[PaymentStatus] = None,
+    purchase_date_from: Optional[date] = None,
+    purchase_date_to: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all purchases with optional filtering"""
-    return purchase_service.get_purchases(
-        db, skip=skip, limit=limit,
+    """Get totals for all purchases matching the same filters as the list"""
+    return purchase_service.get_purchase_summary(
+        db,
         supplier_id=supplier_id,
         status=status,
-        payment_status=payment_status
+        payment_status=payment_status,
+        purchase_date_from=purchase_date_from,
+        purchase_date_to=purchase_date_to
     )
 
+@router.get("/aging", response_model=AgingReportResponse)
+async def get_payables_aging(
+    as_of: Optional[date] = None,
+    use_snapshot: bool = Query(True, description="Serve today's report from the cached snapshot when fresh"),
+    db: Session = Depends(get_db)
+):
+    """Get the accounts-payable aging report (0-30/31-60/61-90/90+ days) by supplier"""
+    return payables_service.get_aging_report(db, as_of=as_of, use_snapshot=use_snapshot)
+
 @router.get("/{purchase_id}", response_model=PurchaseResponse)
 async def get_purchase(
     purchase_id: str,
@@ -68,8 +133,19 @@ async def update_purchase_status(
 async def add_payment(
     purchase_id: str,
     payment: PaymentHistoryCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Add a payment to a purchase"""
-    return purchase_service.add_payment(db, purchase_id, payment, current_user.id)
\ No newline at end of file
+    try:
+        return idempotency_service.execute(
+            db, idempotency_key, f"POST /purchases/{purchase_id}/payments", current_user.id, payment,
+            lambda: purchase_service.add_payment(db, purchase_id, payment, current_user.id),
+            PaymentHistoryResponse
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
\ No newline at end of file
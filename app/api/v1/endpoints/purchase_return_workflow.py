@@ -1,28 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.services.purchase_return import return_service
+from app.services.purchase import PurchaseLineError
 from app.schemas.purchase_return import (
     PurchaseReturnCreate, PurchaseReturnUpdate, 
-    PurchaseReturnResponse, PurchaseReturnListResponse
+    PurchaseReturnResponse, PurchaseReturnListResponse,
+    PurchaseReturnDocumentCreate, PurchaseReturnDocumentResponse
 )
 from app.models.return_workflow import RefundStatus
 from app.models.user import User
 from app.services.auth import get_current_user
+from app.services.idempotency import idempotency_service
 
 router = APIRouter()
 
 @router.post("/", response_model=PurchaseReturnResponse)
 async def create_purchase_return(
     purchase_return_data: PurchaseReturnCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new purchase return"""
-    return return_service.create_purchase_return(
-        db, purchase_return_data, current_user.id
-    )
+    try:
+        return idempotency_service.execute(
+            db, idempotency_key, "POST /purchase-returns", current_user.id, purchase_return_data,
+            lambda: return_service.create_purchase_return(db, purchase_return_data, current_user.id),
+            PurchaseReturnResponse
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/documents", response_model=PurchaseReturnDocumentResponse)
+async def create_return_document(
+    document_data: PurchaseReturnDocumentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Return many lines of a purchase in one document"""
+    try:
+        return idempotency_service.execute(
+            db, idempotency_key, "POST /purchase-returns/documents", current_user.id, document_data,
+            lambda: return_service.create_return_document(db, document_data, current_user.id),
+            PurchaseReturnDocumentResponse
+        )
+    except PurchaseLineError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": str(e), "errors": e.errors}
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/documents/{document_id}", response_model=PurchaseReturnDocumentResponse)
+async def get_return_document(
+    document_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get a purchase return document"""
+    document = return_service.get_return_document(db, document_id)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Purchase return document not found"
+        )
+    return document
 
 @router.get("/", response_model=List[PurchaseReturnListResponse])
 async def get_purchase_returns(
@@ -55,7 +106,8 @@ async def get_purchase_return(
 async def update_purchase_return(
     purchase_return_id: str,
     purchase_return_update: PurchaseReturnUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
 ):
     """Update a purchase return"""
     purchase_return = return_service.get_purchase_return(db, purchase_return_id)
@@ -64,6 +116,12 @@ async def update_purchase_return(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Purchase return not found"
         )
-    return return_service.update_purchase_return(
-        db, purchase_return, purchase_return_update
-    )
\ No newline at end of file
+    try:
+        return return_service.update_purchase_return(
+            db, purchase_return, purchase_return_update, current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
\ No newline at end of file
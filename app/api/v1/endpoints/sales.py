@@ -0,0 +1,143 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.database import get_db
+from app.services.sales import sales_service, SalesLineError
+from app.models.sales import SalesOrderStatus, SalesPaymentStatus
+from app.schemas.sales import (
+    SalesOrderCreate, SalesOrderUpdate, SalesOrderResponse, SalesOrderListResponse
+)
+from app.models.user import User
+from app.services.auth import get_current_user
+from app.services.idempotency import idempotency_service
+from app.services.reservation import InsufficientStockError
+
+router = APIRouter()
+
+
+def _line_error(e: ValueError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail={"message": str(e), "errors": e.errors}
+    )
+
+
+def _get_order_or_404(db: Session, order_id: str):
+    order = sales_service.get_order(db, order_id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sales order not found"
+        )
+    return order
+
+
+@router.post("/", response_model=SalesOrderResponse)
+async def create_sales_order(
+    order: SalesOrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create a new sales order"""
+    try:
+        return idempotency_service.execute(
+            db, idempotency_key, "POST /sales", current_user.id, order,
+            lambda: sales_service.create_order(db, order, current_user.id),
+            SalesOrderResponse
+        )
+    except (SalesLineError, InsufficientStockError) as e:
+        raise _line_error(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/", response_model=List[SalesOrderListResponse])
+async def get_sales_orders(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[SalesOrderStatus] = None,
+    payment_status: Optional[SalesPaymentStatus] = None,
+    db: Session = Depends(get_db)
+):
+    """Get sales orders with optional filtering"""
+    return sales_service.get_orders(
+        db, skip=skip, limit=limit, status=status, payment_status=payment_status
+    )
+
+@router.get("/{order_id}", response_model=SalesOrderResponse)
+async def get_sales_order(
+    order_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get a sales order by ID"""
+    return _get_order_or_404(db, order_id)
+
+@router.put("/{order_id}", response_model=SalesOrderResponse)
+async def update_sales_order(
+    order_id: str,
+    order_update: SalesOrderUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update a sales order"""
+    _get_order_or_404(db, order_id)
+    try:
+        return sales_service.update_order(db, order_id, order_update, current_user.id)
+    except (SalesLineError, InsufficientStockError) as e:
+        raise _line_error(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.put("/{order_id}/status", response_model=SalesOrderResponse)
+async def update_sales_order_status(
+    order_id: str,
+    new_status: SalesOrderStatus,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update sales order status; confirming reserves stock, fulfilling deducts it"""
+    _get_order_or_404(db, order_id)
+    try:
+        return sales_service.update_order_status(db, order_id, new_status, current_user.id)
+    except (SalesLineError, InsufficientStockError) as e:
+        raise _line_error(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/{order_id}/fulfil", response_model=SalesOrderResponse)
+async def fulfil_sales_order(
+    order_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Fulfil a sales order, deducting stock for every line in one batch"""
+    return await update_sales_order_status(order_id, SalesOrderStatus.FULFILLED, db, current_user)
+
+@router.delete("/{order_id}")
+async def delete_sales_order(
+    order_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete a draft sales order"""
+    try:
+        if not sales_service.delete_order(db, order_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Sales order not found"
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return {"message": "Sales order deleted successfully"}
@@ -3,10 +3,11 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.services.stock import stock_service
+from app.services.cost_layers import fifo_cost_service
 from app.schemas.stock import (
     StockLedgerResponse, InventoryCountCreate,
     InventoryCountResponse, InventoryCountListResponse,
-    StockSummaryResponse
+    StockSummaryResponse, StockValuationResponse, CostLayerRebuildResponse
 )
 from app.models.stock import ChangeType
 from app.models.user import User
@@ -40,6 +41,26 @@ async def get_stock_summary(
         skip=skip, limit=limit
     )
 
+@router.get("/valuation", response_model=List[StockValuationResponse])
+async def get_stock_valuation(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Get FIFO inventory valuation for active product variations"""
+    return fifo_cost_service.get_valuation(db, skip=skip, limit=limit)
+
+@router.post("/cost-layers/rebuild", response_model=CostLayerRebuildResponse)
+async def rebuild_cost_layers(
+    product_variation_ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Rebuild FIFO cost layers by replaying the stock ledger"""
+    result = fifo_cost_service.rebuild(db, product_variation_ids)
+    db.commit()
+    return result
+
 @router.get("/low-stock", response_model=List[StockSummaryResponse])
 async def get_low_stock_items(
     threshold: int = Query(10, ge=0),
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.services.supplier import supplier_service
+from app.services.supplier_directory import supplier_directory
+from app.services.supplier_stats import supplier_stats_service
 from app.schemas.supplier import (
-    SupplierCreate, SupplierUpdate, SupplierResponse, SupplierListResponse
+    SupplierCreate, SupplierUpdate, SupplierResponse, SupplierListResponse,
+    SupplierStatsResponse, SupplierDedupeCheck, SupplierDuplicateMatch,
+    SupplierMergeRequest, SupplierMergeResponse
 )
 from app.models.supplier import SupplierType
 
@@ -14,18 +18,63 @@ router = APIRouter()
 @router.post("/", response_model=SupplierResponse)
 async def create_supplier(
     supplier: SupplierCreate,
+    allow_duplicate: bool = Query(False, description="Create even if likely duplicates exist"),
     db: Session = Depends(get_db)
 ):
     """Create a new supplier"""
+    if not allow_duplicate:
+        duplicates = supplier_service.find_duplicates(
+            db,
+            name=supplier.name,
+            phone_number=supplier.phone_number,
+            whatsapp_number=supplier.whatsapp_number,
+            email_address=supplier.email_address
+        )
+        if duplicates:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": "Possible duplicate suppliers found",
+                    "duplicates": [
+                        SupplierDuplicateMatch(**duplicate).model_dump(mode="json")
+                        for duplicate in duplicates
+                    ]
+                }
+            )
     return supplier_service.create(db, supplier)
 
 
+@router.post("/dedupe-check", response_model=List[SupplierDuplicateMatch])
+async def check_supplier_duplicates(
+    candidate: SupplierDedupeCheck,
+    db: Session = Depends(get_db)
+):
+    """Find existing suppliers matching a candidate's normalized name, phone or email"""
+    return supplier_service.find_duplicates(db, **candidate.dict())
+
+
+@router.post("/merge", response_model=SupplierMergeResponse)
+async def merge_suppliers(
+    merge_request: SupplierMergeRequest,
+    db: Session = Depends(get_db)
+):
+    """Merge duplicate suppliers, re-pointing their purchases and products"""
+    try:
+        return supplier_service.merge(db, merge_request.merges)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.get("/", response_model=List[SupplierResponse])
 async def get_suppliers(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     supplier_type: Optional[SupplierType] = None,
     is_active: Optional[bool] = None,
+    search: Optional[str] = Query(None, max_length=100, description="Partial match on name, contact person, phone or WhatsApp number"),
     db: Session = Depends(get_db)
 ):
     """Get all suppliers with optional filtering"""
@@ -34,7 +83,8 @@ async def get_suppliers(
         skip=skip, 
         limit=limit, 
         supplier_type=supplier_type,
-        is_active=is_active
+        is_active=is_active,
+        search=search
     )
 
 
@@ -45,7 +95,10 @@ async def get_suppliers_list(
     db: Session = Depends(get_db)
 ):
     """Get suppliers list for dropdowns"""
-    return supplier_service.get_by_type(db, supplier_type, is_active) if supplier_type else supplier_service.get_multi(db, is_active=is_active)
+    return Response(
+        content=supplier_directory.get_json(db, supplier_type, is_active),
+        media_type="application/json"
+    )
 
 
 @router.get("/{supplier_id}", response_model=SupplierResponse)
@@ -63,6 +116,21 @@ async def get_supplier(
     return supplier
 
 
+@router.get("/{supplier_id}/stats", response_model=SupplierStatsResponse)
+async def get_supplier_stats(
+    supplier_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get purchasing performance rollups for a supplier"""
+    supplier = supplier_service.get(db, supplier_id)
+    if not supplier:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Supplier not found"
+        )
+    return supplier_stats_service.get_stats(db, supplier_id)
+
+
 @router.put("/{supplier_id}", response_model=SupplierResponse)
 async def update_supplier(
     supplier_id: int,
@@ -102,4 +170,7 @@ async def get_suppliers_by_type(
     db: Session = Depends(get_db)
 ):
     """Get suppliers by type (for product forms)"""
-    return supplier_service.get_by_type(db, supplier_type, is_active)
+    return Response(
+        content=supplier_directory.get_json(db, supplier_type, is_active),
+        media_type="application/json"
+    )
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.schemas.product import (
+    VariationLookupResponse, BarcodeValidationRequest, BarcodeValidationResponse
+)
+from app.services.barcode import barcode_service
+from app.services.variation_lookup import variation_lookup
+
+router = APIRouter()
+
+
+@router.get("/lookup", response_model=VariationLookupResponse)
+async def lookup_variation(
+    code: str = Query(..., min_length=1, max_length=50, description="Scanned barcode or SKU"),
+    db: Session = Depends(get_db)
+):
+    """Resolve a scanned barcode or SKU to its product variation"""
+    body = variation_lookup.get_json(db, code)
+    if body is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No variation matches this code"
+        )
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/barcodes/validate", response_model=BarcodeValidationResponse)
+async def validate_barcodes(
+    request: BarcodeValidationRequest,
+    db: Session = Depends(get_db)
+):
+    """Check a batch of EAN-13 codes before import: check digits, duplicates and codes already in use"""
+    return barcode_service.validate_codes(db, request.codes)
@@ -28,6 +28,24 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = "development"
     
+    # Caching
+    ATTRIBUTE_CACHE_TTL_SECONDS: int = 300
+    SUPPLIER_DIRECTORY_TTL_SECONDS: int = 300
+    AGING_SNAPSHOT_TTL_SECONDS: int = 300
+    VARIATION_LOOKUP_TTL_SECONDS: int = 300
+    VARIATION_LOOKUP_MAX_ENTRIES: int = 50000
+    
+    # Idempotency
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LOCK_SECONDS: int = 300  # In-progress claims older than this can be taken over by a retry
+    
+    # Stock reservations
+    STOCK_RESERVATION_TTL_MINUTES: int = 1440
+    STOCK_RESERVATION_SWEEP_SECONDS: int = 60
+    
+    # Barcodes
+    EAN13_PREFIX: str = "20"  # GS1 restricted-circulation range, for in-store use
+    
     @property
     def database_url(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
@@ -37,6 +37,10 @@ async def init_db():
     from app.models import return_workflow  # noqa
     from app.models import sales  # noqa
     from app.models import stock  # noqa
+    from app.models import price_history  # noqa
+    from app.models import supplier_stats  # noqa
+    from app.models import idempotency  # noqa
+    from app.models import cost_layer  # noqa
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
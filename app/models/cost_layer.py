@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CostLayer(Base):
+    """A FIFO cost layer: units that came in together at one unit cost"""
+    __tablename__ = "cost_layers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_variation_id = Column(Integer, ForeignKey("product_variations.id"), nullable=False)
+    source_ledger_id = Column(String, ForeignKey("stock_ledger.id"), nullable=True)  # Inbound entry that opened the layer
+    unit_cost = Column(Numeric(12, 4), nullable=False)
+    quantity_received = Column(Integer, nullable=False)
+    quantity_remaining = Column(Integer, nullable=False)
+    received_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+
+    __table_args__ = (
+        # Open layers of a variation, oldest first
+        Index(
+            "ix_cost_layers_open",
+            "product_variation_id", "id",
+            postgresql_where=quantity_remaining > 0,
+            sqlite_where=quantity_remaining > 0
+        ),
+    )
+
+    def __repr__(self):
+        return f"<CostLayer(id={self.id}, product_variation_id={self.product_variation_id}, remaining={self.quantity_remaining})>"
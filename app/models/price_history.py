@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PriceHistory(Base):
+    __tablename__ = "price_history"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_variation_id = Column(Integer, ForeignKey("product_variations.id"), nullable=True)  # NULL for product-level prices
+    selling_price = Column(Numeric(10, 2), nullable=True)
+    purchase_price = Column(Numeric(10, 2), nullable=True)
+    valid_from = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    source = Column(String(50), nullable=True)  # e.g., "bulk_reprice", "product_update"
+
+    __table_args__ = (
+        Index("ix_price_history_variation_valid_from", "product_variation_id", "valid_from"),
+        Index("ix_price_history_product_valid_from", "product_id", "valid_from"),
+    )
+
+    def __repr__(self):
+        return f"<PriceHistory(id={self.id}, product_id={self.product_id}, valid_from={self.valid_from})>"
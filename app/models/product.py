@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Numeric, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Numeric, Enum, Sequence
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -11,6 +11,10 @@ class OwnershipStatus(str, enum.Enum):
     NOT_OWNED = "no"
 
 
+# Item references for internally allocated EAN-13 barcodes (see BarcodeService)
+ean13_item_seq = Sequence("ean13_item_seq", start=1, metadata=Base.metadata)
+
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -66,11 +70,13 @@ class ProductVariation(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     color_id = Column(Integer, ForeignKey("product_colors.id"), nullable=False)
     sku = Column(String(50), unique=True, index=True, nullable=False)
-    barcode = Column(String(50), nullable=True)  # EAN/UPC code
+    barcode = Column(String(50), nullable=True, index=True)  # EAN/UPC code
     selling_price = Column(Numeric(10, 2), nullable=False)
     purchase_price = Column(Numeric(10, 2), nullable=True)  # Default cost
+    average_cost = Column(Numeric(12, 4), nullable=True)  # Moving average cost, maintained on receive/return
     initial_stock = Column(Integer, default=0)
     current_stock = Column(Integer, default=0)  # Computed and cached
+    reserved_stock = Column(Integer, nullable=False, default=0)  # Held by confirmed sales orders
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
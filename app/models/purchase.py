@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Numeric, Text, ForeignKey, Enum, Date
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, Text, ForeignKey, Enum, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -28,6 +28,7 @@ class Purchase(Base):
     status = Column(Enum(PurchaseStatus), nullable=False, default=PurchaseStatus.DRAFT)
     payment_status = Column(Enum(PaymentStatus), nullable=False, default=PaymentStatus.UNPAID)
     expected_arrival_date = Column(Date, nullable=True)
+    received_at = Column(DateTime(timezone=True), nullable=True)
     supplier_reference = Column(String(100), nullable=True)
     total_price = Column(Numeric(12, 2), nullable=False, default=0)
     notes = Column(Text, nullable=True)
@@ -35,6 +36,12 @@ class Purchase(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+    __table_args__ = (
+        # Date-range listing, per supplier and by payment status
+        Index("ix_purchases_supplier_purchase_date", "supplier_id", "purchase_date"),
+        Index("ix_purchases_payment_status_purchase_date", "payment_status", "purchase_date"),
+    )
+
     # Relationships
     supplier = relationship("Supplier", back_populates="purchases")
     details = relationship("PurchaseDetail", back_populates="purchase", cascade="all, delete-orphan")
@@ -54,6 +61,7 @@ class PurchaseDetail(Base):
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
     subtotal = Column(Numeric(12, 2), nullable=False)
+    quantity_returned_total = Column(Integer, nullable=False, default=0)  # Maintained by purchase returns
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
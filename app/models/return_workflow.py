@@ -11,10 +11,34 @@ class RefundStatus(str, enum.Enum):
     COMPLETED = "completed"
 
 
+class PurchaseReturnDocument(Base):
+    """A return of many lines of one purchase, sent back together"""
+    __tablename__ = "purchase_return_documents"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    purchase_id = Column(String, ForeignKey("purchases.id"), nullable=False, index=True)
+    return_date = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    reason = Column(Text, nullable=True)
+    refund_total = Column(Numeric(12, 2), nullable=False, default=0)
+    refund_status = Column(Enum(RefundStatus), nullable=False, default=RefundStatus.PENDING)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Relationships
+    purchase = relationship("Purchase")
+    lines = relationship("PurchaseReturn", back_populates="document")
+    creator = relationship("User")
+
+    def __repr__(self):
+        return f"<PurchaseReturnDocument(id={self.id}, purchase_id={self.purchase_id}, refund_total={self.refund_total})>"
+
+
 class PurchaseReturn(Base):
     __tablename__ = "purchase_returns"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    document_id = Column(String, ForeignKey("purchase_return_documents.id"), nullable=True, index=True)
     purchase_detail_id = Column(String, ForeignKey("purchase_details.id"), nullable=False)
     product_variation_id = Column(Integer, ForeignKey("product_variations.id"), nullable=False)
     quantity_returned = Column(Integer, nullable=False)
@@ -27,6 +51,7 @@ class PurchaseReturn(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     # Relationships
+    document = relationship("PurchaseReturnDocument", back_populates="lines")
     purchase_detail = relationship("PurchaseDetail", back_populates="returns")
     product_variation = relationship("ProductVariation", back_populates="purchase_returns")
     creator = relationship("User", back_populates="created_returns")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Numeric, Text, ForeignKey, Enum
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -35,6 +35,7 @@ class SalesOrder(Base):
 
     # Relationships
     details = relationship("SalesDetail", back_populates="sales_order", cascade="all, delete-orphan")
+    reservations = relationship("StockReservation", back_populates="sales_order", cascade="all, delete-orphan")
     creator = relationship("User", back_populates="created_sales_orders")
 
     def __repr__(self):
@@ -59,3 +60,25 @@ class SalesDetail(Base):
 
     def __repr__(self):
         return f"<SalesDetail(id={self.id}, sales_order_id={self.sales_order_id}, quantity={self.quantity})>"
+
+
+class StockReservation(Base):
+    """Stock held for a confirmed sales order until it is fulfilled, cancelled or expires"""
+    __tablename__ = "stock_reservations"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
+    sales_order_id = Column(String, ForeignKey("sales_orders.id"), nullable=False, index=True)
+    product_variation_id = Column(Integer, ForeignKey("product_variations.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    sales_order = relationship("SalesOrder", back_populates="reservations")
+
+    __table_args__ = (
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<StockReservation(id={self.id}, sales_order_id={self.sales_order_id}, quantity={self.quantity})>"
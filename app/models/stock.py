@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey, Enum
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, Text, ForeignKey, Enum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -24,6 +24,7 @@ class StockLedger(Base):
     source_id = Column(String, nullable=True)  # UUID of the source document
     quantity_change = Column(Integer, nullable=False)
     running_balance = Column(Integer, nullable=False)
+    unit_cost = Column(Numeric(12, 4), nullable=True)  # Inbound: layer cost; outbound: FIFO cost consumed per unit
     timestamp = Column(DateTime(timezone=True), nullable=False, default=func.now())
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     notes = Column(Text, nullable=True)
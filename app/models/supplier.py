@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, Index, DDL, event
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.utils.normalize import normalize_name, normalize_phone, normalize_email
 import enum
 
 
@@ -23,12 +24,50 @@ class Supplier(Base):
     email_address = Column(String(100), nullable=True)
     facebook_profile_url = Column(String(500), nullable=True)
     is_active = Column(Boolean, default=True)
+    
+    # Normalized keys for duplicate detection, kept in sync by the validators below
+    name_key = Column(String(200), nullable=True, index=True)
+    phone_key = Column(String(20), nullable=True, index=True)
+    whatsapp_key = Column(String(20), nullable=True, index=True)
+    email_key = Column(String(100), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Trigram indexes for partial-match search (PostgreSQL pg_trgm; plain
+    # indexes elsewhere)
+    __table_args__ = tuple(
+        Index(
+            f"ix_suppliers_{column}_trgm",
+            column,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"}
+        )
+        for column in ("name", "contact_person", "phone_number", "whatsapp_number")
+    )
+    
     # Relationships
     products = relationship("Product", back_populates="supplier")
     purchases = relationship("Purchase", back_populates="supplier")
 
+    @validates("name", "phone_number", "whatsapp_number", "email_address")
+    def _update_dedupe_key(self, key, value):
+        if key == "name":
+            self.name_key = normalize_name(value)
+        elif key == "phone_number":
+            self.phone_key = normalize_phone(value)
+        elif key == "whatsapp_number":
+            self.whatsapp_key = normalize_phone(value)
+        else:
+            self.email_key = normalize_email(value)
+        return value
+
     def __repr__(self):
         return f"<Supplier(id={self.id}, name='{self.name}', type='{self.supplier_type}')>"
+
+
+# The trigram operator classes live in the pg_trgm extension
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Numeric
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class SupplierStats(Base):
+    """Per-supplier purchasing rollup, maintained incrementally by the purchase and return services"""
+    __tablename__ = "supplier_stats"
+
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), primary_key=True)
+    purchase_count = Column(Integer, nullable=False, default=0)
+    total_purchased = Column(Numeric(14, 2), nullable=False, default=0)
+    total_paid = Column(Numeric(14, 2), nullable=False, default=0)
+    quantity_purchased = Column(Integer, nullable=False, default=0)
+    quantity_returned = Column(Integer, nullable=False, default=0)
+    received_count = Column(Integer, nullable=False, default=0)  # received purchases with an expected arrival date
+    lead_time_days_total = Column(Integer, nullable=False, default=0)  # sum of (received date - expected arrival date)
+    last_purchase_date = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<SupplierStats(supplier_id={self.supplier_id}, purchase_count={self.purchase_count})>"
@@ -3,27 +3,43 @@ from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
 from app.models.product import OwnershipStatus
+import enum
 
 
 # Product Variation Schemas
 class ProductVariationBase(BaseModel):
     color_id: int
-    stock_quantity: int = 0
+    barcode: Optional[str] = Field(None, max_length=50)
+    selling_price: Optional[Decimal] = Field(None, ge=0)  # Defaults to the product price
+    purchase_price: Optional[Decimal] = Field(None, ge=0)  # Defaults to the product price
+    initial_stock: int = Field(0, ge=0)
 
 
 class ProductVariationCreate(ProductVariationBase):
     pass
 
 
+class ProductVariationBulkCreate(BaseModel):
+    color_ids: List[int] = Field(..., min_length=1)
+    selling_price: Optional[Decimal] = Field(None, ge=0)
+    purchase_price: Optional[Decimal] = Field(None, ge=0)
+    initial_stock: int = Field(0, ge=0)
+
+
 class ProductVariationUpdate(BaseModel):
     color_id: Optional[int] = None
-    stock_quantity: Optional[int] = None
+    barcode: Optional[str] = Field(None, max_length=50)
+    selling_price: Optional[Decimal] = Field(None, ge=0)
+    purchase_price: Optional[Decimal] = Field(None, ge=0)
     is_active: Optional[bool] = None
 
 
 class ProductVariationResponse(ProductVariationBase):
     id: int
+    product_id: int
     sku: str
+    current_stock: int
+    reserved_stock: int = 0
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -34,6 +50,37 @@ class ProductVariationResponse(ProductVariationBase):
         from_attributes = True
 
 
+class VariationLookupResponse(BaseModel):
+    """A variation resolved from a scanned barcode or SKU"""
+    id: int
+    product_id: int
+    product_name: str
+    sku: str
+    barcode: Optional[str] = None
+    color_name: Optional[str] = None
+    selling_price: Decimal
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+class BarcodeValidationRequest(BaseModel):
+    codes: List[str] = Field(..., min_length=1, max_length=100000)
+
+
+class BarcodeValidationError(BaseModel):
+    index: int
+    code: str
+    error: str
+
+
+class BarcodeValidationResponse(BaseModel):
+    total: int
+    valid: int
+    errors: List[BarcodeValidationError] = []
+
+
 # Product Schemas
 class ProductBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=200)
@@ -74,6 +121,10 @@ class ProductUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class ProductClone(ProductUpdate):
+    pass
+
+
 class ProductResponse(ProductBase):
     id: int
     slug: str
@@ -111,6 +162,55 @@ class ProductListResponse(BaseModel):
         from_attributes = True
 
 
+# Bulk operation schemas
+class ProductBulkFilter(BaseModel):
+    product_ids: Optional[List[int]] = None
+    category_id: Optional[int] = None
+    brand_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+
+
+class ProductBulkStatusResponse(BaseModel):
+    products_updated: int
+    variations_updated: int
+
+
+class PriceAdjustmentMode(str, enum.Enum):
+    ABSOLUTE = "absolute"      # Set the price to value
+    PERCENTAGE = "percentage"  # Change the price by value percent
+    ROUND = "round"            # Round the price to the nearest multiple of value
+
+
+class ProductBulkPriceUpdate(BaseModel):
+    filters: ProductBulkFilter
+    mode: PriceAdjustmentMode
+    value: Decimal
+    round_to: Optional[Decimal] = Field(None, gt=0)  # Rounding applied after absolute/percentage
+    apply_to_variations: bool = True
+    dry_run: bool = False
+
+
+class PriceChangePreview(BaseModel):
+    product_id: int
+    product_variation_id: Optional[int] = None
+    old_price: Decimal
+    new_price: Decimal
+
+
+class ProductBulkPriceResponse(BaseModel):
+    dry_run: bool
+    products_updated: int
+    variations_updated: int
+    changes: List[PriceChangePreview] = []
+
+
+class VariationPriceAsOfResponse(BaseModel):
+    product_variation_id: int
+    selling_price: Decimal
+    purchase_price: Optional[Decimal] = None
+    valid_from: Optional[datetime] = None  # None when no price change was ever recorded
+
+
 # Product with minimal data for dropdowns
 class ProductMinimalResponse(BaseModel):
     id: int
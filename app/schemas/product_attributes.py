@@ -1,6 +1,16 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
+import enum
+
+
+class AttributeType(str, enum.Enum):
+    CATEGORIES = "categories"
+    MATERIALS = "materials"
+    STYLES = "styles"
+    BRANDS = "brands"
+    COLORS = "colors"
+    COUNTRIES = "countries"
 
 
 # Base schemas for product attributes
@@ -107,3 +117,39 @@ class CountryOfOriginUpdate(ProductAttributeUpdate):
 
 class CountryOfOriginResponse(ProductAttributeResponse):
     pass
+
+
+# Bulk upsert schemas
+class ProductAttributeBulkItem(ProductAttributeCreate):
+    # Only used for colors
+    hex_code: Optional[str] = Field(None, pattern=r'^#[0-9A-Fa-f]{6}$')
+    rgb_code: Optional[str] = Field(None, pattern=r'^rgb\(\d{1,3},\s*\d{1,3},\s*\d{1,3}\)$')
+
+
+class ProductAttributeBulkUpsert(BaseModel):
+    items: List[ProductAttributeBulkItem] = Field(..., min_length=1, max_length=1000)
+
+
+class ProductAttributeBulkResult(BaseModel):
+    id: int
+    name: str
+    slug: str
+    created: bool
+
+
+# Name resolver schemas
+class AttributeResolveItem(BaseModel):
+    attribute_type: AttributeType
+    name: str = Field(..., min_length=1, max_length=100)
+
+
+class AttributeResolveRequest(BaseModel):
+    items: List[AttributeResolveItem] = Field(..., min_length=1, max_length=1000)
+    create_missing: bool = False
+
+
+class AttributeResolveResult(BaseModel):
+    attribute_type: AttributeType
+    name: str
+    id: Optional[int] = None  # None when the name is unknown and was not created
+    created: bool = False
@@ -7,7 +7,7 @@ from app.models.purchase import PurchaseStatus, PaymentStatus
 
 # Purchase Detail Schemas
 class PurchaseDetailBase(BaseModel):
-    product_variation_id: str
+    product_variation_id: int
     quantity: int = Field(..., gt=0)
     unit_price: Decimal = Field(..., gt=0)
 
@@ -25,6 +25,7 @@ class PurchaseDetailResponse(PurchaseDetailBase):
     id: str
     purchase_id: str
     subtotal: Decimal
+    quantity_returned_total: int = 0
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -55,7 +56,7 @@ class PaymentHistoryResponse(PaymentHistoryBase):
 
 # Purchase Schemas
 class PurchaseBase(BaseModel):
-    supplier_id: str
+    supplier_id: int
     purchase_date: Optional[datetime] = None
     expected_arrival_date: Optional[date] = None
     supplier_reference: Optional[str] = Field(None, max_length=100)
@@ -63,7 +64,7 @@ class PurchaseBase(BaseModel):
 
 
 class PurchaseCreate(PurchaseBase):
-    details: List[PurchaseDetailCreate] = []
+    details: List[PurchaseDetailCreate] = Field([], max_length=2000)
 
 
 class PurchaseUpdate(BaseModel):
@@ -80,7 +81,7 @@ class PurchaseResponse(PurchaseBase):
     total_price: Decimal
     created_at: datetime
     updated_at: Optional[datetime] = None
-    created_by: str
+    created_by: int
     details: List[PurchaseDetailResponse] = []
     payments: List[PaymentHistoryResponse] = []
     
@@ -103,3 +104,39 @@ class PurchaseListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PurchaseStatusSummary(BaseModel):
+    payment_status: PaymentStatus
+    count: int
+    total_price: Decimal
+    total_paid: Decimal
+    outstanding: Decimal
+
+
+class PurchaseSummary(BaseModel):
+    count: int
+    total_price: Decimal
+    total_paid: Decimal
+    outstanding: Decimal
+    by_payment_status: List[PurchaseStatusSummary] = []
+
+
+class AgingBuckets(BaseModel):
+    days_0_30: Decimal
+    days_31_60: Decimal
+    days_61_90: Decimal
+    days_over_90: Decimal
+    total_outstanding: Decimal
+
+
+class SupplierAgingRow(AgingBuckets):
+    supplier_id: int
+    supplier_name: str
+    purchase_count: int
+
+
+class AgingReportResponse(BaseModel):
+    as_of: date
+    suppliers: List[SupplierAgingRow] = []
+    totals: AgingBuckets
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from app.models.return_workflow import RefundStatus
@@ -7,7 +7,7 @@ from app.models.return_workflow import RefundStatus
 
 class PurchaseReturnBase(BaseModel):
     purchase_detail_id: str
-    product_variation_id: str
+    product_variation_id: int
     quantity_returned: int = Field(..., gt=0)
     reason: Optional[str] = None
     refund_amount: Optional[Decimal] = Field(None, ge=0)
@@ -27,10 +27,11 @@ class PurchaseReturnUpdate(BaseModel):
 
 class PurchaseReturnResponse(PurchaseReturnBase):
     id: str
+    document_id: Optional[str] = None
     return_date: datetime
     created_at: datetime
     updated_at: Optional[datetime] = None
-    created_by: str
+    created_by: int
     
     # Related entity names for display
     product_name: Optional[str] = None
@@ -54,3 +55,30 @@ class PurchaseReturnListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PurchaseReturnDocumentLine(BaseModel):
+    purchase_detail_id: str
+    quantity_returned: int = Field(..., gt=0)
+    reason: Optional[str] = None
+
+
+class PurchaseReturnDocumentCreate(BaseModel):
+    purchase_id: str
+    reason: Optional[str] = None
+    lines: List[PurchaseReturnDocumentLine] = Field(..., min_length=1, max_length=1000)
+
+
+class PurchaseReturnDocumentResponse(BaseModel):
+    id: str
+    purchase_id: str
+    return_date: datetime
+    reason: Optional[str] = None
+    refund_total: Decimal
+    refund_status: RefundStatus
+    created_at: datetime
+    created_by: int
+    lines: List[PurchaseReturnResponse] = []
+
+    class Config:
+        from_attributes = True
@@ -7,13 +7,13 @@ from app.models.sales import SalesOrderStatus, SalesPaymentStatus
 
 # Sales Detail Schemas
 class SalesDetailBase(BaseModel):
-    product_variation_id: str
+    product_variation_id: int
     quantity: int = Field(..., gt=0)
     unit_price: Decimal = Field(..., gt=0)
 
 
 class SalesDetailCreate(SalesDetailBase):
-    pass
+    unit_price: Optional[Decimal] = Field(None, gt=0)  # Defaults to the variation's selling price
 
 
 class SalesDetailUpdate(BaseModel):
@@ -39,7 +39,8 @@ class SalesOrderBase(BaseModel):
 
 
 class SalesOrderCreate(SalesOrderBase):
-    details: List[SalesDetailCreate] = []
+    status: SalesOrderStatus = SalesOrderStatus.DRAFT  # CONFIRMED reserves stock, FULFILLED deducts it
+    details: List[SalesDetailCreate] = Field(..., min_length=1, max_length=2000)
 
 
 class SalesOrderUpdate(BaseModel):
@@ -57,7 +58,7 @@ class SalesOrderResponse(SalesOrderBase):
     total_price: Decimal
     created_at: datetime
     updated_at: Optional[datetime] = None
-    created_by: str
+    created_by: int
     details: List[SalesDetailResponse] = []
     
     # Related entity names for display
@@ -1,12 +1,13 @@
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
+from decimal import Decimal
 from app.models.stock import ChangeType
 
 
 # Stock Ledger Schemas
 class StockLedgerBase(BaseModel):
-    product_variation_id: str
+    product_variation_id: int
     change_type: ChangeType
     source_type: Optional[str] = Field(None, max_length=50)
     source_id: Optional[str] = None
@@ -15,14 +16,15 @@ class StockLedgerBase(BaseModel):
 
 
 class StockLedgerCreate(StockLedgerBase):
-    pass
+    unit_cost: Optional[Decimal] = Field(None, ge=0)  # Cost of inbound units; defaults to the variation's cost
 
 
 class StockLedgerResponse(StockLedgerBase):
     id: str
     running_balance: int
+    unit_cost: Optional[Decimal] = None
     timestamp: datetime
-    user_id: str
+    user_id: int
     
     # Related entity names for display
     product_name: Optional[str] = None
@@ -85,15 +87,31 @@ class InventoryCountListResponse(BaseModel):
 
 # Stock Summary Schemas
 class StockSummaryResponse(BaseModel):
-    product_variation_id: str
+    product_variation_id: int
     product_name: str
     color_name: str
     sku: str
     current_stock: int
+    reserved_stock: int = 0  # Held by confirmed sales orders
     selling_price: float
     purchase_price: Optional[float]
+    average_cost: Optional[float] = None  # Moving average cost
     total_value: float  # current_stock * selling_price
+    cost_value: Optional[float] = None  # current_stock * average_cost (purchase_price until first receipt)
     is_low_stock: bool
 
     class Config:
         from_attributes = True
+
+
+class StockValuationResponse(BaseModel):
+    product_variation_id: int
+    sku: str
+    current_stock: int
+    layered_quantity: int  # Units in open FIFO cost layers
+    fifo_value: Decimal
+
+
+class CostLayerRebuildResponse(BaseModel):
+    layers_created: int
+    ledger_entries_costed: int
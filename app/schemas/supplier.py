@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+from decimal import Decimal
 from app.models.supplier import SupplierType
 
 
@@ -51,3 +52,46 @@ class SupplierListResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SupplierStatsResponse(BaseModel):
+    supplier_id: int
+    purchase_count: int
+    total_purchased: Decimal
+    total_paid: Decimal
+    outstanding_balance: Decimal
+    average_lead_time_days: Optional[float] = None  # received date minus expected arrival date
+    quantity_purchased: int
+    quantity_returned: int
+    return_rate: float
+    last_purchase_date: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class SupplierDedupeCheck(BaseModel):
+    name: Optional[str] = Field(None, max_length=200)
+    phone_number: Optional[str] = Field(None, max_length=20)
+    whatsapp_number: Optional[str] = Field(None, max_length=20)
+    email_address: Optional[str] = Field(None, max_length=100)
+    exclude_id: Optional[int] = None
+
+
+class SupplierDuplicateMatch(SupplierListResponse):
+    whatsapp_number: Optional[str] = None
+    email_address: Optional[str] = None
+    matched_on: List[str] = []  # "name", "phone", "email"
+
+
+class SupplierMergeItem(BaseModel):
+    target_id: int
+    source_ids: List[int] = Field(..., min_length=1)
+
+
+class SupplierMergeRequest(BaseModel):
+    merges: List[SupplierMergeItem] = Field(..., min_length=1, max_length=500)
+
+
+class SupplierMergeResponse(BaseModel):
+    suppliers_merged: int
+    purchases_repointed: int
+    products_repointed: int
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Dict, List, Optional, Type
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.utils.slug import generate_slug
+from app.models.product_attributes import (
+    ProductCategory, ProductMaterial, ProductStyle,
+    ProductBrand, ProductColor, CountryOfOrigin
+)
+
+ATTRIBUTE_MODELS = (
+    ProductCategory, ProductMaterial, ProductStyle,
+    ProductBrand, ProductColor, CountryOfOrigin
+)
+
+
+class AttributeCatalogCache:
+    """
+    Process-local cache of the product attribute tables.
+    
+    Each table is held as id -> row and slug -> row maps of plain dicts. Writes
+    through ProductAttributeService bump the table's version, and the next read
+    reloads it. Tables are also reloaded after ATTRIBUTE_CACHE_TTL_SECONDS so
+    changes made by other worker processes show up eventually.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id: Dict[Type, Dict[int, dict]] = {}
+        self._by_slug: Dict[Type, Dict[str, dict]] = {}
+        self._by_normalized_name: Dict[Type, Dict[str, dict]] = {}
+        self._versions: Dict[Type, int] = {model: 0 for model in ATTRIBUTE_MODELS}
+        self._loaded: Dict[Type, tuple] = {}  # model -> (version, loaded_at)
+    
+    def load(self, db: Session, model: Optional[Type] = None) -> None:
+        """Load one attribute table (or all of them) from the database"""
+        for attribute_model in ([model] if model else ATTRIBUTE_MODELS):
+            with self._lock:
+                version = self._versions[attribute_model]
+            
+            columns = [column.key for column in attribute_model.__table__.columns]
+            rows = [
+                {column: getattr(obj, column) for column in columns}
+                for obj in db.query(attribute_model).order_by(attribute_model.id)
+            ]
+            
+            with self._lock:
+                self._by_id[attribute_model] = {row["id"]: row for row in rows}
+                self._by_slug[attribute_model] = {row["slug"]: row for row in rows}
+                self._by_normalized_name.pop(attribute_model, None)
+                self._loaded[attribute_model] = (version, time.monotonic())
+    
+    def invalidate(self, model: Type) -> None:
+        """Mark an attribute table as changed so the next read reloads it"""
+        with self._lock:
+            self._versions[model] += 1
+    
+    def version(self, model: Type) -> int:
+        """Get the current version of an attribute table"""
+        with self._lock:
+            return self._versions[model]
+    
+    def get(self, db: Session, model: Type, id: int) -> Optional[dict]:
+        """Get a cached attribute row by ID, reloading the table if the row is new"""
+        self._ensure_loaded(db, model)
+        row = self._by_id[model].get(id)
+        if row is None and self._reload_if_exists(db, model, model.id == id):
+            row = self._by_id[model].get(id)
+        return row
+    
+    def get_by_slug(self, db: Session, model: Type, slug: str) -> Optional[dict]:
+        """Get a cached attribute row by slug, reloading the table if the row is new"""
+        self._ensure_loaded(db, model)
+        row = self._by_slug[model].get(slug)
+        if row is None and self._reload_if_exists(db, model, model.slug == slug):
+            row = self._by_slug[model].get(slug)
+        return row
+    
+    def get_all(self, db: Session, model: Type, is_active: Optional[bool] = None) -> List[dict]:
+        """Get all cached rows of an attribute table ordered by ID"""
+        self._ensure_loaded(db, model)
+        rows = list(self._by_id[model].values())
+        if is_active is not None:
+            rows = [row for row in rows if row["is_active"] == is_active]
+        return rows
+    
+    def get_by_normalized_name(self, db: Session, model: Type, name: str) -> Optional[dict]:
+        """
+        Get a cached attribute row by name, ignoring case, accents and punctuation
+        
+        Names are normalized with generate_slug; when several rows normalize to
+        the same key, active rows win over inactive ones, then the lowest ID.
+        """
+        self._ensure_loaded(db, model)
+        with self._lock:
+            index = self._by_normalized_name.get(model)
+            if index is None:
+                index = {}
+                for row in sorted(self._by_id[model].values(), key=lambda row: (not row["is_active"], row["id"])):
+                    index.setdefault(generate_slug(row["name"]), row)
+                self._by_normalized_name[model] = index
+        return index.get(generate_slug(name))
+    
+    def name(self, db: Session, model: Type, id: Optional[int]) -> Optional[str]:
+        """Resolve an attribute ID to its name"""
+        if id is None:
+            return None
+        row = self.get(db, model, id)
+        return row["name"] if row else None
+    
+    def _reload_if_exists(self, db: Session, model: Type, condition) -> bool:
+        """
+        Reload a table after a cache miss if the row exists in the database
+        
+        Rows created by another worker process are otherwise missing until the
+        TTL expires. Misses on rows that really do not exist cost one indexed
+        lookup rather than a table reload.
+        """
+        if db.query(model.id).filter(condition).first() is None:
+            return False
+        self.load(db, model)
+        return True
+    
+    def _ensure_loaded(self, db: Session, model: Type) -> None:
+        """Reload a table if it was never loaded, has been invalidated or has expired"""
+        with self._lock:
+            loaded = self._loaded.get(model)
+            fresh = (
+                loaded is not None
+                and loaded[0] == self._versions[model]
+                and time.monotonic() - loaded[1] < settings.ATTRIBUTE_CACHE_TTL_SECONDS
+            )
+        if not fresh:
+            self.load(db, model)
+
+
+attribute_cache = AttributeCatalogCache()
@@ -0,0 +1,63 @@
+from sqlalchemy.orm import Session
+from typing import List
+from app.schemas.product_attributes import (
+    AttributeResolveItem, ProductAttributeBulkItem
+)
+from app.services.attribute_cache import attribute_cache
+from app.services.product_attributes import attribute_services
+from app.utils.slug import generate_slug
+
+
+class AttributeResolverService:
+    def resolve(
+        self,
+        db: Session,
+        items: List[AttributeResolveItem],
+        create_missing: bool = False
+    ) -> List[dict]:
+        """
+        Resolve (attribute_type, name) pairs to attribute IDs
+        
+        Names are matched against the cached normalized-name index (case- and
+        accent-folded with generate_slug). With create_missing, unknown names
+        are created with one bulk upsert per attribute type.
+        """
+        results = []
+        missing = {}  # attribute_type -> {normalized name: name to create}
+        
+        for item in items:
+            model = attribute_services[item.attribute_type].model
+            row = attribute_cache.get_by_normalized_name(db, model, item.name)
+            results.append({
+                "attribute_type": item.attribute_type,
+                "name": item.name,
+                "id": row["id"] if row else None,
+                "created": False
+            })
+            
+            key = generate_slug(item.name)
+            if row is None and key:
+                missing.setdefault(item.attribute_type, {}).setdefault(key, item.name)
+        
+        if not create_missing or not missing:
+            return results
+        
+        created_ids = {}  # (attribute_type, normalized name) -> id
+        for attribute_type, names in missing.items():
+            created = attribute_services[attribute_type].bulk_upsert(
+                db, [ProductAttributeBulkItem(name=name) for name in names.values()]
+            )
+            for row in created:
+                created_ids[(attribute_type, generate_slug(row["name"]))] = row["id"]
+        
+        for result in results:
+            if result["id"] is None:
+                key = (result["attribute_type"], generate_slug(result["name"]))
+                if key in created_ids:
+                    result["id"] = created_ids[key]
+                    result["created"] = True
+        
+        return results
+
+
+attribute_resolver_service = AttributeResolverService()
@@ -0,0 +1,151 @@
+import itertools
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, case
+from typing import List, Optional
+from app.core.config import settings
+from app.models.product import Product, ProductVariation, ean13_item_seq
+from app.services.variation_lookup import variation_lookup
+from app.utils.ean import build_ean13, validate_ean13_batch
+
+
+class BarcodeService:
+    """
+    Allocates internal EAN-13 barcodes.
+    
+    Codes are EAN13_PREFIX followed by a zero-padded item reference and the
+    check digit. Item references come from the ean13_item_seq sequence, so
+    concurrent allocations never hand out the same code, and codes already
+    assigned in the range are skipped; on databases without sequences (SQLite
+    local tooling) the next reference follows the highest code already
+    assigned in the range.
+    """
+    
+    def allocate(self, db: Session, count: int) -> List[str]:
+        """
+        Allocate a block of new EAN-13 codes
+        
+        References are drawn in one round trip per block. Codes in the range
+        can also be set by hand or imported, so drawn codes that are already
+        assigned to a variation (one IN query) are skipped and replaced from
+        the next draw.
+        """
+        if count <= 0:
+            return []
+        
+        prefix = settings.EAN13_PREFIX
+        if not prefix.isdigit() or not 1 <= len(prefix) <= 11:
+            raise ValueError("EAN13_PREFIX must be 1 to 11 digits")
+        
+        if db.get_bind().dialect.name == "postgresql":
+            def draw(size: int) -> List[int]:
+                return db.scalars(
+                    select(ean13_item_seq.next_value())
+                    .select_from(func.generate_series(1, size))
+                ).all()
+        else:
+            references = itertools.count(self._next_reference_without_sequence(db, prefix))
+            
+            def draw(size: int) -> List[int]:
+                return list(itertools.islice(references, size))
+        
+        codes: List[str] = []
+        while len(codes) < count:
+            drawn = sorted(draw(count - len(codes)))
+            if drawn[-1] >= 10 ** (12 - len(prefix)):
+                raise ValueError(f"EAN-13 range {prefix} is exhausted")
+            
+            candidates = [build_ean13(prefix, reference) for reference in drawn]
+            taken = set(db.scalars(
+                select(ProductVariation.barcode).where(ProductVariation.barcode.in_(candidates))
+            ))
+            codes.extend(code for code in candidates if code not in taken)
+        
+        return codes
+    
+    def assign_product_barcodes(
+        self,
+        db: Session,
+        product_id: int,
+        overwrite: bool = False
+    ) -> List[ProductVariation]:
+        """
+        Give every variation of a product an allocated barcode in one UPDATE.
+        
+        Variations that already have a barcode keep it unless overwrite is set.
+        """
+        if db.query(Product.id).filter(Product.id == product_id).first() is None:
+            raise ValueError(f"Product {product_id} not found")
+        
+        query = select(ProductVariation.id).where(ProductVariation.product_id == product_id)
+        if not overwrite:
+            query = query.where(
+                (ProductVariation.barcode.is_(None)) | (ProductVariation.barcode == "")
+            )
+        variation_ids = db.scalars(query.order_by(ProductVariation.id).with_for_update()).all()
+        
+        if variation_ids:
+            codes = self.allocate(db, len(variation_ids))
+            db.execute(
+                update(ProductVariation)
+                .where(ProductVariation.id.in_(variation_ids))
+                .values(barcode=case(dict(zip(variation_ids, codes)), value=ProductVariation.id)),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+            variation_lookup.invalidate()
+        
+        return db.query(ProductVariation).filter(
+            ProductVariation.product_id == product_id
+        ).order_by(ProductVariation.id).populate_existing().all()
+    
+    def validate_codes(self, db: Session, codes: List[str]) -> dict:
+        """
+        Validate a batch of EAN-13 codes for import.
+        
+        Check digits are validated for the whole batch at once; codes repeated
+        within the batch or already assigned to a variation (one IN query) are
+        reported too.
+        """
+        codes = [code.strip() for code in codes]
+        well_formed = validate_ean13_batch(codes)
+        
+        assigned = dict(db.execute(
+            select(ProductVariation.barcode, func.min(ProductVariation.id))
+            .where(ProductVariation.barcode.in_(
+                {code for code, valid in zip(codes, well_formed) if valid}
+            ))
+            .group_by(ProductVariation.barcode)
+        ).all())
+        
+        seen = set()
+        errors = []
+        for index, (code, valid) in enumerate(zip(codes, well_formed)):
+            if not valid:
+                error = "Invalid EAN-13 code or check digit"
+            elif code in seen:
+                error = "Duplicate code in batch"
+            elif code in assigned:
+                error = f"Already assigned to variation {assigned[code]}"
+            else:
+                error = None
+            seen.add(code)
+            if error:
+                errors.append({"index": index, "code": code, "error": error})
+        
+        return {
+            "total": len(codes),
+            "valid": len(codes) - len(errors),
+            "errors": errors
+        }
+    
+    def _next_reference_without_sequence(self, db: Session, prefix: str) -> int:
+        highest: Optional[str] = db.scalar(
+            select(func.max(ProductVariation.barcode)).where(
+                ProductVariation.barcode.like(f"{prefix}%"),
+                func.length(ProductVariation.barcode) == 13
+            )
+        )
+        return int(highest[len(prefix):12]) + 1 if highest and highest.isdigit() else 1
+
+
+barcode_service = BarcodeService()
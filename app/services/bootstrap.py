@@ -0,0 +1,88 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.supplier import SupplierType
+from app.schemas.product_attributes import (
+    AttributeType, ProductAttributeResponse, ProductColorResponse
+)
+from app.services.attribute_cache import attribute_cache
+from app.services.product_attributes import attribute_services
+from app.services.supplier_directory import supplier_directory
+
+
+class BootstrapPayload:
+    """A pre-serialized bootstrap response"""
+    
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzip_body = gzip.compress(body)
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+class BootstrapService:
+    """
+    Builds the product-form bootstrap blob: every active attribute list plus
+    the supplier dropdown lists, serialized and gzip-compressed once.
+    
+    The blob is rebuilt only when an attribute table version or the supplier
+    directory version changes (or after ATTRIBUTE_CACHE_TTL_SECONDS, to pick
+    up changes made by other worker processes).
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._payload: Optional[BootstrapPayload] = None
+        self._key: Optional[tuple] = None
+        self._built_at = 0.0
+    
+    def get(self, db: Session) -> BootstrapPayload:
+        """Get the current bootstrap payload, rebuilding it if anything changed"""
+        key = self._current_key()
+        with self._lock:
+            if (
+                self._payload is not None
+                and self._key == key
+                and time.monotonic() - self._built_at < settings.ATTRIBUTE_CACHE_TTL_SECONDS
+            ):
+                return self._payload
+        
+        payload = BootstrapPayload(self._build(db))
+        with self._lock:
+            self._payload = payload
+            self._key = key
+            self._built_at = time.monotonic()
+        return payload
+    
+    def _current_key(self) -> tuple:
+        """Versions of everything the payload is built from"""
+        return tuple(
+            attribute_cache.version(service.model) for service in attribute_services.values()
+        ) + (supplier_directory.version(),)
+    
+    def _build(self, db: Session) -> bytes:
+        """Serialize all active attribute lists and supplier dropdowns to JSON"""
+        data = {}
+        for attribute_type, service in attribute_services.items():
+            schema = (
+                ProductColorResponse if attribute_type == AttributeType.COLORS
+                else ProductAttributeResponse
+            )
+            data[attribute_type.value] = [
+                schema.model_validate(row).model_dump(mode="json")
+                for row in attribute_cache.get_all(db, service.model, is_active=True)
+            ]
+        
+        data["suppliers"] = {
+            supplier_type.value: supplier_directory.get_list(db, supplier_type, is_active=True)
+            for supplier_type in SupplierType
+        }
+        
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+bootstrap_service = BootstrapService()
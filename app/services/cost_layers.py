@@ -0,0 +1,339 @@
+from collections import deque
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+from sqlalchemy import Numeric, select, insert, update, delete, and_, case, func, literal, union_all
+from sqlalchemy.orm import Session
+from app.models.cost_layer import CostLayer
+from app.models.product import ProductVariation
+from app.models.purchase import PurchaseDetail
+from app.models.stock import StockLedger
+
+COST_QUANTUM = Decimal("0.0001")
+
+
+class LayerPlan:
+    """Cost layer writes computed for a batch of ledger rows"""
+    
+    def __init__(self):
+        self.new_layers: List[dict] = []
+        self.layer_updates: List[dict] = []
+
+
+class FifoCostService:
+    """
+    FIFO cost layers.
+    
+    Every inbound stock entry opens a layer at its unit cost; outbound
+    entries consume the oldest open layers of their variation and record the
+    consumed cost per unit on the ledger row. Stock going negative is costed
+    at the variation's fallback cost for the missing units.
+    """
+    
+    def plan(
+        self,
+        db: Session,
+        ledger_rows: List[dict],
+        fallback_costs: Dict[int, Optional[Decimal]]
+    ) -> LayerPlan:
+        """
+        Cost a batch of ledger rows against the open layers
+        
+        Sets "unit_cost" on each row. Open layers of variations with outbound
+        rows are loaded and locked with one query; the caller inserts the
+        ledger rows and then passes the plan to write().
+        """
+        plan = LayerPlan()
+        outbound_ids = sorted({
+            row["product_variation_id"] for row in ledger_rows if row["quantity_change"] < 0
+        })
+        
+        queues: Dict[int, deque] = {}
+        loaded = []
+        if outbound_ids:
+            for layer_id, variation_id, unit_cost, remaining in db.execute(
+                select(
+                    CostLayer.id,
+                    CostLayer.product_variation_id,
+                    CostLayer.unit_cost,
+                    CostLayer.quantity_remaining
+                )
+                .where(
+                    CostLayer.product_variation_id.in_(outbound_ids),
+                    CostLayer.quantity_remaining > 0
+                )
+                .order_by(CostLayer.product_variation_id, CostLayer.id)
+                .with_for_update()
+            ):
+                layer = {"id": layer_id, "unit_cost": Decimal(unit_cost), "quantity_remaining": remaining}
+                queues.setdefault(variation_id, deque()).append(layer)
+                loaded.append((layer, remaining))
+        
+        for row in ledger_rows:
+            variation_id = row["product_variation_id"]
+            fallback = Decimal(fallback_costs.get(variation_id) or 0)
+            queue = queues.setdefault(variation_id, deque())
+            quantity = row["quantity_change"]
+            
+            if quantity > 0:
+                unit_cost = Decimal(row["unit_cost"]) if row.get("unit_cost") is not None else fallback
+                row["unit_cost"] = unit_cost.quantize(COST_QUANTUM, rounding=ROUND_HALF_UP)
+                layer = {
+                    "product_variation_id": variation_id,
+                    "source_ledger_id": row["id"],
+                    "unit_cost": row["unit_cost"],
+                    "quantity_received": quantity,
+                    "quantity_remaining": quantity
+                }
+                plan.new_layers.append(layer)
+                queue.append(layer)
+            elif quantity < 0:
+                row["unit_cost"] = self._consume(queue, -quantity, fallback)
+            else:
+                row["unit_cost"] = None
+        
+        plan.layer_updates = [
+            {"id": layer["id"], "quantity_remaining": layer["quantity_remaining"]}
+            for layer, remaining in loaded if layer["quantity_remaining"] != remaining
+        ]
+        return plan
+    
+    def write(self, db: Session, plan: LayerPlan) -> None:
+        """Persist a plan's new layers and consumed quantities (does not commit)"""
+        if plan.new_layers:
+            db.execute(insert(CostLayer), plan.new_layers)
+        if plan.layer_updates:
+            db.execute(update(CostLayer), plan.layer_updates)
+    
+    def rebuild(self, db: Session, variation_ids: Optional[List[int]] = None) -> dict:
+        """
+        Rebuild cost layers from stock_ledger in set-based SQL (does not commit)
+        
+        The in-scope variations are locked first, so the rebuild sees every
+        ledger row and concurrent stock entries wait for it.
+        
+        Instead of replaying rows one by one, each variation's ledger is
+        turned into running totals with window functions: every inbound row
+        is a layer covering an interval of cumulative inbound units, and
+        every outbound row consumes an interval of cumulative outbound units.
+        Units shipped while stock is at zero are costed at the fallback cost
+        and never taken from later layers (as in plan()), which is the
+        running balance floored at zero: the running shortfall is minus the
+        running minimum of the unfloored balance. Outbound costs then come
+        from one interval-overlap join against the layers, and the layers
+        and ledger costs are written with one INSERT ... SELECT and one
+        UPDATE ... FROM.
+        
+        Inbound rows keep their recorded unit cost, falling back to the
+        purchase line price and then the variation's purchase_price.
+        Purchase returns are outbound rows like any other and consume the
+        oldest layers, not the layer of the purchase line being returned.
+        """
+        # Lock the in-scope variations (in id order, like create_stock_entries)
+        # so no stock entry consumes or opens layers while they are rebuilt
+        locked = select(ProductVariation.id).order_by(ProductVariation.id).with_for_update()
+        if variation_ids is not None:
+            locked = locked.where(ProductVariation.id.in_(variation_ids))
+        db.execute(locked).all()
+        
+        scope = [CostLayer.product_variation_id.in_(variation_ids)] if variation_ids is not None else []
+        db.execute(delete(CostLayer).where(*scope))
+        
+        ledger = self._ledger_running_totals(variation_ids)
+        layers = (
+            select(
+                ledger.c.product_variation_id,
+                ledger.c.id.label("source_ledger_id"),
+                ledger.c.inbound_cost.label("unit_cost"),
+                ledger.c.quantity.label("quantity_received"),
+                case(
+                    (ledger.c.consumed_total >= ledger.c.inbound_end, 0),
+                    (ledger.c.consumed_total <= ledger.c.inbound_end - ledger.c.quantity, ledger.c.quantity),
+                    else_=ledger.c.inbound_end - ledger.c.consumed_total
+                ).label("quantity_remaining"),
+                ledger.c.timestamp.label("received_at"),
+                (ledger.c.inbound_end - ledger.c.quantity).label("inbound_start"),
+                ledger.c.inbound_end
+            )
+            .where(ledger.c.quantity > 0)
+        )
+        layers_created = db.execute(
+            insert(CostLayer).from_select(
+                ["product_variation_id", "source_ledger_id", "unit_cost",
+                 "quantity_received", "quantity_remaining", "received_at"],
+                layers.with_only_columns(*list(layers.selected_columns)[:6])
+                .order_by(ledger.c.product_variation_id, ledger.c.timestamp, ledger.c.id)
+            ),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        
+        # Each outbound row's cost: the layer units its consumption interval
+        # overlaps, plus its shortfall at the fallback cost
+        layer = layers.subquery("layer")
+        outbound = ledger.alias("outbound")
+        overlap = (
+            case(
+                (layer.c.inbound_end < outbound.c.consumed_end, layer.c.inbound_end),
+                else_=outbound.c.consumed_end
+            )
+            - case(
+                (layer.c.inbound_start > outbound.c.consumed_start, layer.c.inbound_start),
+                else_=outbound.c.consumed_start
+            )
+        )
+        consumed_value = (
+            func.coalesce(func.sum(overlap * layer.c.unit_cost), 0)
+            + outbound.c.shortfall * outbound.c.fallback
+        )
+        costs = union_all(
+            select(ledger.c.id, ledger.c.inbound_cost.label("unit_cost")).where(ledger.c.quantity > 0),
+            select(
+                outbound.c.id,
+                func.round(
+                    consumed_value * literal(Decimal(1), Numeric(12, 4)) / -outbound.c.quantity,
+                    4
+                ).label("unit_cost")
+            )
+            .outerjoin(
+                layer,
+                and_(
+                    layer.c.product_variation_id == outbound.c.product_variation_id,
+                    layer.c.inbound_start < outbound.c.consumed_end,
+                    layer.c.inbound_end > outbound.c.consumed_start
+                )
+            )
+            .where(outbound.c.quantity < 0)
+            .group_by(outbound.c.id, outbound.c.quantity, outbound.c.shortfall, outbound.c.fallback)
+        ).subquery("costs")
+        ledger_entries_costed = db.execute(
+            update(StockLedger)
+            .values(unit_cost=costs.c.unit_cost)
+            .where(StockLedger.id == costs.c.id),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        
+        return {
+            "layers_created": layers_created,
+            "ledger_entries_costed": ledger_entries_costed
+        }
+    
+    def _ledger_running_totals(self, variation_ids: Optional[List[int]]):
+        """
+        Ledger rows with their per-variation running totals, as a subquery
+        
+        Columns: quantity, inbound_cost (rounded layer cost), fallback,
+        inbound_end (cumulative inbound units), consumed_start/consumed_end
+        (cumulative outbound units taken from layers), shortfall (units of
+        this row shipped from zero stock) and consumed_total (units taken
+        from layers over the variation's whole ledger).
+        """
+        quantity = StockLedger.quantity_change
+        ordering = {
+            "partition_by": StockLedger.product_variation_id,
+            "order_by": (StockLedger.timestamp, StockLedger.id)
+        }
+        totals = select(
+            StockLedger.id,
+            StockLedger.product_variation_id,
+            StockLedger.timestamp,
+            quantity.label("quantity"),
+            func.round(
+                func.coalesce(StockLedger.unit_cost, PurchaseDetail.unit_price, ProductVariation.purchase_price, 0),
+                4
+            ).label("inbound_cost"),
+            func.coalesce(ProductVariation.purchase_price, 0).label("fallback"),
+            func.sum(quantity).over(**ordering).label("balance"),
+            func.sum(case((quantity > 0, quantity), else_=0)).over(**ordering).label("inbound_end"),
+            func.sum(case((quantity < 0, -quantity), else_=0)).over(**ordering).label("outbound_end")
+        ).join(
+            ProductVariation, ProductVariation.id == StockLedger.product_variation_id
+        ).outerjoin(
+            PurchaseDetail,
+            and_(
+                StockLedger.source_type == "PurchaseDetail",
+                PurchaseDetail.id == StockLedger.source_id
+            )
+        )
+        if variation_ids is not None:
+            totals = totals.where(StockLedger.product_variation_id.in_(variation_ids))
+        totals = totals.subquery("totals")
+        
+        # Shortfall so far = -min(0, lowest running balance so far)
+        ordering = {"partition_by": totals.c.product_variation_id, "order_by": (totals.c.timestamp, totals.c.id)}
+        lowest = func.min(totals.c.balance)
+        shortfalls = select(
+            totals,
+            func.coalesce(lowest.over(**ordering), 0).label("lowest_end"),
+            func.coalesce(lowest.over(rows=(None, -1), **ordering), 0).label("lowest_start")
+        ).subquery("shortfalls")
+        
+        shortfall_end = case((shortfalls.c.lowest_end < 0, -shortfalls.c.lowest_end), else_=0)
+        shortfall_start = case((shortfalls.c.lowest_start < 0, -shortfalls.c.lowest_start), else_=0)
+        consumed_end = shortfalls.c.outbound_end - shortfall_end
+        return select(
+            shortfalls.c.id,
+            shortfalls.c.product_variation_id,
+            shortfalls.c.timestamp,
+            shortfalls.c.quantity,
+            shortfalls.c.inbound_cost,
+            shortfalls.c.fallback,
+            shortfalls.c.inbound_end,
+            (shortfalls.c.outbound_end + shortfalls.c.quantity - shortfall_start).label("consumed_start"),
+            consumed_end.label("consumed_end"),
+            (shortfall_end - shortfall_start).label("shortfall"),
+            func.max(consumed_end).over(partition_by=shortfalls.c.product_variation_id).label("consumed_total")
+        ).subquery("ledger")
+    
+    def get_valuation(self, db: Session, skip: int = 0, limit: int = 100) -> List[dict]:
+        """Get FIFO inventory value per active variation from the open layers"""
+        open_layers = (
+            select(
+                CostLayer.product_variation_id,
+                func.sum(CostLayer.quantity_remaining).label("layered_quantity"),
+                func.sum(CostLayer.quantity_remaining * CostLayer.unit_cost).label("fifo_value")
+            )
+            .where(CostLayer.quantity_remaining > 0)
+            .group_by(CostLayer.product_variation_id)
+            .subquery()
+        )
+        rows = db.execute(
+            select(
+                ProductVariation.id,
+                ProductVariation.sku,
+                ProductVariation.current_stock,
+                func.coalesce(open_layers.c.layered_quantity, 0),
+                func.coalesce(open_layers.c.fifo_value, 0)
+            )
+            .outerjoin(open_layers, open_layers.c.product_variation_id == ProductVariation.id)
+            .where(ProductVariation.is_active == True)
+            .order_by(ProductVariation.id)
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        return [
+            {
+                "product_variation_id": id,
+                "sku": sku,
+                "current_stock": current_stock,
+                "layered_quantity": layered_quantity,
+                "fifo_value": Decimal(fifo_value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            }
+            for id, sku, current_stock, layered_quantity, fifo_value in rows
+        ]
+    
+    def _consume(self, queue: deque, quantity: int, fallback: Decimal) -> Decimal:
+        """Take units from the oldest layers; returns the average cost per unit consumed"""
+        needed = quantity
+        total = Decimal(0)
+        while needed and queue:
+            layer = queue[0]
+            taken = min(needed, layer["quantity_remaining"])
+            total += taken * Decimal(layer["unit_cost"])
+            layer["quantity_remaining"] -= taken
+            needed -= taken
+            if layer["quantity_remaining"] == 0:
+                queue.popleft()
+        total += needed * fallback
+        return (total / quantity).quantize(COST_QUANTUM, rounding=ROUND_HALF_UP)
+
+
+fifo_cost_service = FifoCostService()
@@ -0,0 +1,92 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.product import ProductVariation
+
+COST_QUANTUM = Decimal("0.0001")
+
+# (product_variation_id, quantity, unit_cost)
+CostLine = Tuple[int, int, Decimal]
+
+
+class CostingService:
+    """
+    Maintains the moving (weighted) average cost of each variation.
+    
+    Receipts blend their unit cost into the average in proportion to the
+    stock on hand; returns to the supplier take their units back out at the
+    cost they were bought at. Both must run before the matching stock entries
+    are posted, inside the same transaction, since they read current_stock as
+    the quantity on hand. A variation without an average yet starts from its
+    purchase_price.
+    """
+    
+    def apply_receipts(self, db: Session, lines: List[CostLine]) -> Dict[int, Decimal]:
+        """Blend received units into average costs (does not commit)"""
+        return self._apply(db, lines, direction=1)
+    
+    def apply_returns(self, db: Session, lines: List[CostLine]) -> Dict[int, Decimal]:
+        """Take returned units out of average costs (does not commit)"""
+        return self._apply(db, lines, direction=-1)
+    
+    def _apply(self, db: Session, lines: List[CostLine], direction: int) -> Dict[int, Decimal]:
+        """Recompute average costs for a batch of lines under row locks"""
+        if not lines:
+            return {}
+        
+        variation_ids = sorted({variation_id for variation_id, _, _ in lines})
+        rows = db.execute(
+            select(
+                ProductVariation.id,
+                ProductVariation.current_stock,
+                ProductVariation.average_cost,
+                ProductVariation.purchase_price
+            )
+            .where(ProductVariation.id.in_(variation_ids))
+            .order_by(ProductVariation.id)
+            .with_for_update()
+        ).all()
+        
+        state = {
+            id: [current_stock or 0, average_cost if average_cost is not None else purchase_price]
+            for id, current_stock, average_cost, purchase_price in rows
+        }
+        missing = [str(id) for id in variation_ids if id not in state]
+        if missing:
+            raise ValueError(f"Product variation(s) not found: {', '.join(missing)}")
+        
+        for variation_id, quantity, unit_cost in lines:
+            on_hand, average = state[variation_id]
+            unit_cost = Decimal(unit_cost)
+            
+            if direction > 0:
+                if on_hand <= 0 or average is None:
+                    average = unit_cost
+                else:
+                    average = (on_hand * Decimal(average) + quantity * unit_cost) / (on_hand + quantity)
+                on_hand += quantity
+            else:
+                remaining = on_hand - quantity
+                if remaining > 0 and average is not None:
+                    average = max(
+                        (on_hand * Decimal(average) - quantity * unit_cost) / remaining,
+                        Decimal(0)
+                    )
+                on_hand = remaining
+            
+            state[variation_id] = [on_hand, average]
+        
+        averages = {
+            id: Decimal(average).quantize(COST_QUANTUM, rounding=ROUND_HALF_UP)
+            for id, (_, average) in state.items() if average is not None
+        }
+        if averages:
+            db.execute(
+                update(ProductVariation),
+                [{"id": id, "average_cost": average} for id, average in averages.items()]
+            )
+        return averages
+
+
+costing_service = CostingService()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Tuple, Type
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select, update, delete, and_, or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.utils.sql import dialect_insert
+
+
+class IdempotencyService:
+    """
+    Replays stored responses for retried POSTs carrying an Idempotency-Key.
+    
+    The first request claims the key by inserting a placeholder row (committed
+    before the operation runs), so a concurrent retry sees it and gets 409
+    instead of repeating the write. On success the serialized response is
+    stored and later retries with the same payload get it back unchanged; a
+    retry with a different payload gets 422. If the operation fails the claim
+    is released so the client can retry. Keys expire after
+    IDEMPOTENCY_KEY_TTL_HOURS.
+    
+    A claim is only held for IDEMPOTENCY_LOCK_SECONDS while in progress: if
+    the worker dies without finishing or releasing it, a retry after the
+    lease lapses takes the key over instead of getting 409 until the key
+    expires. The lease must outlast the slowest operation.
+    """
+    
+    REPLAY_HEADER = "Idempotent-Replayed"
+    
+    def execute(
+        self,
+        db: Session,
+        key: Optional[str],
+        scope: str,
+        user_id: int,
+        payload: Any,
+        operation: Callable[[], Any],
+        response_model: Type[BaseModel]
+    ) -> Any:
+        """Run an operation once per idempotency key, replaying its response on retries"""
+        if not key:
+            return operation()
+        
+        request_hash = self._hash(scope, payload)
+        claim_id, record = self._claim(db, key, scope, user_id, request_hash)
+        if record is not None:
+            return self._replay(record, request_hash)
+        
+        try:
+            result = operation()
+        except BaseException:
+            db.rollback()
+            self._release(db, claim_id)
+            raise
+        
+        # Only this request's claim row: a retry may have taken the key over
+        body = jsonable_encoder(response_model.model_validate(result))
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == claim_id)
+            .values(
+                status_code=status.HTTP_200_OK,
+                response_body=json.dumps(body),
+                locked_until=None
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        return JSONResponse(content=body, status_code=status.HTTP_200_OK)
+    
+    def purge_expired(self, db: Session) -> int:
+        """Delete expired idempotency keys"""
+        result = db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+        )
+        db.commit()
+        return result.rowcount
+    
+    def _claim(
+        self,
+        db: Session,
+        key: str,
+        scope: str,
+        user_id: int,
+        request_hash: str
+    ) -> Tuple[Optional[int], Optional[IdempotencyKey]]:
+        """
+        Claim a key
+        
+        Returns (claim id, None) when this request claimed the key, or
+        (None, existing record) when it was already claimed.
+        """
+        now = datetime.now(timezone.utc)
+        
+        # An expired key, or an unfinished claim whose lease lapsed, is free to reuse
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expires_at < now,
+                    and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_until < now)
+                )
+            )
+        )
+        claimed = db.execute(
+            dialect_insert(db, IdempotencyKey)
+            .values(
+                key=key,
+                scope=scope,
+                user_id=user_id,
+                request_hash=request_hash,
+                locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "scope", "key"])
+            .returning(IdempotencyKey.id)
+        ).scalar()
+        db.commit()
+        
+        if claimed is not None:
+            return claimed, None
+        return None, db.scalars(
+            select(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key
+            )
+        ).first()
+    
+    def _replay(self, record: IdempotencyKey, request_hash: str) -> JSONResponse:
+        """Return the stored response for a claimed key"""
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if record.status_code is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        return JSONResponse(
+            content=json.loads(record.response_body),
+            status_code=record.status_code,
+            headers={self.REPLAY_HEADER: "true"}
+        )
+    
+    def _release(self, db: Session, claim_id: int) -> None:
+        """Drop an unfinished claim so the request can be retried"""
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.id == claim_id,
+                IdempotencyKey.status_code.is_(None)
+            )
+        )
+        db.commit()
+    
+    def _hash(self, scope: str, payload: Any) -> str:
+        """Fingerprint a request by scope and canonical JSON payload"""
+        canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{scope}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+idempotency_service = IdempotencyService()
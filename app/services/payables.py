@@ -0,0 +1,131 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import select, func, case, literal, and_, Date
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.purchase import Purchase, PaymentHistory
+from app.models.supplier import Supplier
+from app.utils.sql import date_diff_days
+
+AGING_BUCKETS = ("days_0_30", "days_31_60", "days_61_90", "days_over_90")
+
+
+class PayablesService:
+    """
+    Accounts-payable reporting.
+    
+    The aging report for today is kept as a snapshot that purchase and
+    payment writes invalidate; it also expires after
+    AGING_SNAPSHOT_TTL_SECONDS so other worker processes catch up.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        # (version, as_of, built_at, report)
+        self._snapshot: Optional[tuple] = None
+    
+    def invalidate(self) -> None:
+        """Mark the aging snapshot as stale"""
+        with self._lock:
+            self._version += 1
+    
+    def get_aging_report(
+        self,
+        db: Session,
+        as_of: Optional[date] = None,
+        use_snapshot: bool = True
+    ) -> dict:
+        """Get outstanding purchase balances by supplier, bucketed by age in days"""
+        today = date.today()
+        as_of = as_of or today
+        use_snapshot = use_snapshot and as_of == today
+        
+        if use_snapshot:
+            with self._lock:
+                version = self._version
+                snapshot = self._snapshot
+            if (
+                snapshot is not None
+                and snapshot[0] == version
+                and snapshot[1] == as_of
+                and time.monotonic() - snapshot[2] < settings.AGING_SNAPSHOT_TTL_SECONDS
+            ):
+                return snapshot[3]
+        
+        report = self._build_aging_report(db, as_of)
+        
+        if use_snapshot:
+            with self._lock:
+                self._snapshot = (version, as_of, time.monotonic(), report)
+        return report
+    
+    def _build_aging_report(self, db: Session, as_of: date) -> dict:
+        """
+        Compute the aging report with one grouped query
+        
+        Purchases and payments are counted up to the end of as_of, so
+        historical reports show what was open on that day.
+        """
+        cutoff = datetime.combine(as_of + timedelta(days=1), datetime.min.time())
+        paid = (
+            select(
+                PaymentHistory.purchase_id,
+                func.sum(PaymentHistory.amount_paid).label("amount_paid")
+            )
+            .where(PaymentHistory.payment_date < cutoff)
+            .group_by(PaymentHistory.purchase_id)
+            .subquery()
+        )
+        outstanding = Purchase.total_price - func.coalesce(paid.c.amount_paid, 0)
+        age_days = date_diff_days(db, literal(as_of, Date), Purchase.purchase_date)
+        
+        def bucket(condition):
+            return func.coalesce(func.sum(case((condition, outstanding))), 0)
+        
+        rows = db.execute(
+            select(
+                Purchase.supplier_id,
+                Supplier.name,
+                func.count(Purchase.id),
+                bucket(age_days <= 30),
+                bucket(and_(age_days > 30, age_days <= 60)),
+                bucket(and_(age_days > 60, age_days <= 90)),
+                bucket(age_days > 90),
+                func.sum(outstanding)
+            )
+            .join(Supplier, Supplier.id == Purchase.supplier_id)
+            .outerjoin(paid, paid.c.purchase_id == Purchase.id)
+            .where(
+                Purchase.purchase_date < cutoff,
+                outstanding > 0
+            )
+            .group_by(Purchase.supplier_id, Supplier.name)
+            .order_by(func.sum(outstanding).desc(), Purchase.supplier_id)
+        ).all()
+        
+        suppliers = [
+            {
+                "supplier_id": supplier_id,
+                "supplier_name": supplier_name,
+                "purchase_count": purchase_count,
+                **{name: Decimal(amount) for name, amount in zip(AGING_BUCKETS, amounts)},
+                "total_outstanding": Decimal(total)
+            }
+            for supplier_id, supplier_name, purchase_count, *amounts, total in rows
+        ]
+        totals = {
+            name: sum((row[name] for row in suppliers), Decimal(0))
+            for name in AGING_BUCKETS + ("total_outstanding",)
+        }
+        return {
+            "as_of": as_of,
+            "suppliers": suppliers,
+            "totals": totals
+        }
+
+
+payables_service = PayablesService()
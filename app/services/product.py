@@ -1,71 +1,68 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, update, insert, func, literal, Numeric, exists, case
 from typing import List, Optional
+from datetime import datetime, timezone
+from decimal import Decimal
 from app.models.product import Product, ProductVariation, OwnershipStatus
-from app.models.supplier import Supplier, SupplierType
-from app.schemas.product import ProductCreate, ProductUpdate, ProductVariationCreate
+from app.models.price_history import PriceHistory
+from app.models.product_attributes import ProductColor, ProductBrand, ProductCategory
+from app.models.supplier import SupplierType
+from app.models.stock import ChangeType
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductVariationCreate, ProductVariationUpdate,
+    ProductBulkFilter, ProductBulkPriceUpdate, PriceAdjustmentMode, ProductClone
+)
+from app.schemas.stock import StockLedgerCreate
+from app.services.stock import stock_service
+from app.services.attribute_cache import attribute_cache
+from app.services.supplier_directory import supplier_directory
+from app.services.variation_lookup import variation_lookup
 from app.utils.slug import generate_slug, ensure_unique_slug
 from app.utils.sku import generate_sku
+from app.utils.sql import insert_with_fresh_keys
 
 
 class ProductService:
-    def create(self, db: Session, obj_in: ProductCreate) -> Product:
+    def create(self, db: Session, obj_in: ProductCreate, user_id: int) -> Product:
         """Create a new product with variations"""
-        # Generate slug
-        slug = generate_slug(obj_in.name)
-        existing_slugs = [item.slug for item in db.query(Product).all()]
-        unique_slug = ensure_unique_slug(slug, existing_slugs)
-        
         # Create product data
         product_data = obj_in.dict(exclude={'variations'})
-        product_data['slug'] = unique_slug
+        
+        def insert_product() -> Product:
+            product = Product(**product_data, slug=self._unique_slug(db, obj_in.name))
+            db.add(product)
+            db.flush()  # Flush to get the ID
+            return product
         
         # Create product
-        db_obj = Product(**product_data)
-        db.add(db_obj)
-        db.flush()  # Flush to get the ID
+        db_obj = insert_with_fresh_keys(db, insert_product)
+        
+        db.add(PriceHistory(
+            product_id=db_obj.id,
+            selling_price=db_obj.selling_price,
+            purchase_price=db_obj.purchase_price,
+            source="product_create"
+        ))
         
         # Create variations
-        for variation_data in obj_in.variations:
-            # Generate SKU
-            sku = self._generate_sku_for_variation(
-                db, db_obj, variation_data.color_id
-            )
-            
-            variation_obj = ProductVariation(
-                product_id=db_obj.id,
-                color_id=variation_data.color_id,
-                sku=sku,
-                stock_quantity=variation_data.stock_quantity
-            )
-            db.add(variation_obj)
+        self._insert_variations(db, db_obj, obj_in.variations, user_id)
         
         db.commit()
         db.refresh(db_obj)
         return db_obj
     
     def get(self, db: Session, id: int) -> Optional[Product]:
-        """Get a product by ID with all relationships"""
+        """Get a product by ID with its supplier and variations (attribute names come from the cache)"""
         return db.query(Product).options(
-            joinedload(Product.category),
-            joinedload(Product.material),
-            joinedload(Product.brand),
-            joinedload(Product.style),
-            joinedload(Product.country),
             joinedload(Product.supplier),
-            joinedload(Product.variations).joinedload(ProductVariation.color)
+            joinedload(Product.variations)
         ).filter(Product.id == id).first()
     
     def get_by_slug(self, db: Session, slug: str) -> Optional[Product]:
-        """Get a product by slug with all relationships"""
+        """Get a product by slug with its supplier and variations (attribute names come from the cache)"""
         return db.query(Product).options(
-            joinedload(Product.category),
-            joinedload(Product.material),
-            joinedload(Product.brand),
-            joinedload(Product.style),
-            joinedload(Product.country),
             joinedload(Product.supplier),
-            joinedload(Product.variations).joinedload(ProductVariation.color)
+            joinedload(Product.variations)
         ).filter(Product.slug == slug).first()
     
     def get_multi(
@@ -81,8 +78,6 @@ class ProductService:
     ) -> List[Product]:
         """Get multiple products with optional filtering"""
         query = db.query(Product).options(
-            joinedload(Product.category),
-            joinedload(Product.brand),
             joinedload(Product.supplier)
         )
         
@@ -115,36 +110,506 @@ class ProductService:
         
         # If name is being updated, regenerate slug
         if 'name' in update_data and update_data['name'] != db_obj.name:
-            slug = generate_slug(update_data['name'])
-            existing_slugs = [
-                item.slug for item in db.query(Product)
-                .filter(Product.id != db_obj.id)
-                .all()
-            ]
-            update_data['slug'] = ensure_unique_slug(slug, existing_slugs)
+            update_data['slug'] = insert_with_fresh_keys(
+                db, lambda: self._claim_slug(db, db_obj.id, update_data['name'])
+            )
+        
+        old_prices = (db_obj.selling_price, db_obj.purchase_price)
         
         for field, value in update_data.items():
             if value is not None:
                 setattr(db_obj, field, value)
         
+        if (db_obj.selling_price, db_obj.purchase_price) != old_prices:
+            self._record_price_baselines(db, [Product.id == db_obj.id])
+            valid_from = datetime.now(timezone.utc)
+            db.add(PriceHistory(
+                product_id=db_obj.id,
+                selling_price=db_obj.selling_price,
+                purchase_price=db_obj.purchase_price,
+                valid_from=valid_from,
+                source="product_update"
+            ))
+            self._follow_product_prices(db, db_obj, old_prices, valid_from)
+        
         db.add(db_obj)
         db.commit()
+        variation_lookup.invalidate()
         db.refresh(db_obj)
         return db_obj
     
+    def clone(self, db: Session, source: Product, overrides: ProductClone) -> Product:
+        """
+        Copy a product and all its variations server-side in one transaction.
+        
+        The product row and its variation rows are copied with INSERT ... SELECT;
+        the new slug and SKUs are allocated in batch and the clone starts with
+        no stock and no barcodes.
+        """
+        override_data = {
+            field: value
+            for field, value in overrides.dict(exclude_unset=True).items()
+            if value is not None
+        }
+        name = override_data.pop('name', None) or f"{source.name} Copy"
+        
+        copied_columns = [
+            "category_id", "material_id", "brand_id", "style_id", "country_id",
+            "ownership_status", "supplier_id", "purchase_price", "selling_price",
+            "description", "keywords", "youtube_video_url", "facebook_post_url", "is_active"
+        ]
+        product_columns = Product.__table__.c
+        
+        def insert_product() -> int:
+            product_select = select(
+                literal(name, product_columns.name.type),
+                literal(self._unique_slug(db, name), product_columns.slug.type),
+                *[
+                    literal(override_data[column], product_columns[column].type)
+                    if column in override_data else product_columns[column]
+                    for column in copied_columns
+                ]
+            ).where(Product.id == source.id)
+            return db.execute(
+                insert(Product)
+                .from_select(["name", "slug", *copied_columns], product_select)
+                .returning(Product.id)
+            ).scalar_one()
+        
+        new_id = insert_with_fresh_keys(db, insert_product)
+        new_product = db.get(Product, new_id)
+        
+        source_variations = db.execute(
+            select(ProductVariation.id, ProductVariation.color_id)
+            .where(ProductVariation.product_id == source.id)
+            .order_by(ProductVariation.id)
+        ).all()
+        
+        if source_variations:
+            color_names = [
+                attribute_cache.name(db, ProductColor, row.color_id) for row in source_variations
+            ]
+            variation_columns = ProductVariation.__table__.c
+            
+            def insert_variations() -> None:
+                skus = self._allocate_skus(db, new_product, color_names)
+                sku_by_source = {row.id: sku for row, sku in zip(source_variations, skus)}
+                db.execute(
+                    insert(ProductVariation).from_select(
+                        [
+                            "product_id", "color_id", "sku", "selling_price", "purchase_price",
+                            "initial_stock", "current_stock", "is_active"
+                        ],
+                        select(
+                            literal(new_id, variation_columns.product_id.type),
+                            variation_columns.color_id,
+                            case(sku_by_source, value=variation_columns.id),
+                            literal(override_data['selling_price'], variation_columns.selling_price.type)
+                            if 'selling_price' in override_data else variation_columns.selling_price,
+                            literal(override_data['purchase_price'], variation_columns.purchase_price.type)
+                            if 'purchase_price' in override_data else variation_columns.purchase_price,
+                            literal(0, variation_columns.initial_stock.type),
+                            literal(0, variation_columns.current_stock.type),
+                            variation_columns.is_active
+                        ).where(variation_columns.product_id == source.id)
+                    )
+                )
+            
+            insert_with_fresh_keys(db, insert_variations)
+        
+        db.add(PriceHistory(
+            product_id=new_id,
+            selling_price=new_product.selling_price,
+            purchase_price=new_product.purchase_price,
+            source="product_clone"
+        ))
+        db.execute(
+            insert(PriceHistory).from_select(
+                ["product_id", "product_variation_id", "selling_price", "purchase_price", "source"],
+                select(
+                    ProductVariation.product_id,
+                    ProductVariation.id,
+                    ProductVariation.selling_price,
+                    ProductVariation.purchase_price,
+                    literal("product_clone")
+                ).where(ProductVariation.product_id == new_id)
+            )
+        )
+        
+        db.commit()
+        return self.get(db, new_id)
+    
+    def get_variation_prices_as_of(
+        self,
+        db: Session,
+        variation_ids: List[int],
+        at: datetime
+    ) -> List[dict]:
+        """Resolve the prices valid at a timestamp for many variations in one query"""
+        ranked = select(
+            PriceHistory.product_variation_id,
+            PriceHistory.selling_price,
+            PriceHistory.purchase_price,
+            PriceHistory.valid_from,
+            func.row_number().over(
+                partition_by=PriceHistory.product_variation_id,
+                order_by=PriceHistory.valid_from.desc()
+            ).label("rank")
+        ).where(
+            PriceHistory.product_variation_id.in_(variation_ids),
+            PriceHistory.valid_from <= at
+        ).subquery()
+        
+        rows = db.execute(
+            select(
+                ProductVariation.id,
+                ProductVariation.selling_price,
+                ProductVariation.purchase_price,
+                ranked.c.selling_price.label("history_selling_price"),
+                ranked.c.purchase_price.label("history_purchase_price"),
+                ranked.c.valid_from
+            )
+            .outerjoin(
+                ranked,
+                and_(
+                    ranked.c.product_variation_id == ProductVariation.id,
+                    ranked.c.rank == 1
+                )
+            )
+            .where(ProductVariation.id.in_(variation_ids))
+            .order_by(ProductVariation.id)
+        ).all()
+        
+        # Variations without any recorded history have only ever had their current price
+        return [
+            {
+                "product_variation_id": row.id,
+                "selling_price": row.history_selling_price if row.valid_from else row.selling_price,
+                "purchase_price": row.history_purchase_price if row.valid_from else row.purchase_price,
+                "valid_from": row.valid_from
+            }
+            for row in rows
+        ]
+    
     def delete(self, db: Session, id: int) -> Optional[Product]:
         """Delete a product (soft delete by setting is_active=False)"""
         db_obj = db.query(Product).filter(Product.id == id).first()
         if db_obj:
-            db_obj.is_active = False
-            # Also deactivate all variations
-            for variation in db_obj.variations:
-                variation.is_active = False
-            db.add(db_obj)
+            # Deactivate the product and all its variations set-based
+            self._set_active(db, [Product.id == id], False)
             db.commit()
+            variation_lookup.invalidate()
             db.refresh(db_obj)
         return db_obj
     
+    def bulk_set_active(
+        self,
+        db: Session,
+        filters: ProductBulkFilter,
+        is_active: bool
+    ) -> dict:
+        """Activate or deactivate all products matching a filter, with their variations"""
+        conditions = self._bulk_filter_conditions(filters)
+        if not conditions:
+            raise ValueError("At least one filter is required for bulk updates")
+        
+        products_updated, variations_updated = self._set_active(db, conditions, is_active)
+        db.commit()
+        variation_lookup.invalidate()
+        
+        return {
+            "products_updated": products_updated,
+            "variations_updated": variations_updated
+        }
+    
+    def bulk_update_prices(
+        self,
+        db: Session,
+        price_update: ProductBulkPriceUpdate
+    ) -> dict:
+        """Apply a pricing rule to all products (and variations) matching a filter"""
+        conditions = self._bulk_filter_conditions(price_update.filters)
+        if not conditions:
+            raise ValueError("At least one filter is required for bulk updates")
+        
+        if price_update.mode == PriceAdjustmentMode.ABSOLUTE and price_update.value < 0:
+            raise ValueError("Absolute price must not be negative")
+        if price_update.mode == PriceAdjustmentMode.PERCENTAGE and price_update.value < -100:
+            raise ValueError("Percentage decrease cannot exceed 100")
+        if price_update.mode == PriceAdjustmentMode.ROUND and price_update.value <= 0:
+            raise ValueError("Rounding increment must be positive")
+        
+        product_price = self._price_expression(Product.selling_price, price_update)
+        variation_price = self._price_expression(ProductVariation.selling_price, price_update)
+        product_ids = select(Product.id).where(*conditions)
+        
+        if price_update.dry_run:
+            changes = [
+                {
+                    "product_id": row.id,
+                    "old_price": row.selling_price,
+                    "new_price": row.new_price
+                }
+                for row in db.execute(
+                    select(Product.id, Product.selling_price, product_price.label("new_price"))
+                    .where(*conditions, Product.selling_price != product_price)
+                    .order_by(Product.id)
+                )
+            ]
+            product_count = len(changes)
+            
+            if price_update.apply_to_variations:
+                changes.extend(
+                    {
+                        "product_id": row.product_id,
+                        "product_variation_id": row.id,
+                        "old_price": row.selling_price,
+                        "new_price": row.new_price
+                    }
+                    for row in db.execute(
+                        select(
+                            ProductVariation.product_id,
+                            ProductVariation.id,
+                            ProductVariation.selling_price,
+                            variation_price.label("new_price")
+                        )
+                        .where(
+                            ProductVariation.product_id.in_(product_ids),
+                            ProductVariation.selling_price != variation_price
+                        )
+                        .order_by(ProductVariation.id)
+                    )
+                )
+            
+            return {
+                "dry_run": True,
+                "products_updated": product_count,
+                "variations_updated": len(changes) - product_count,
+                "changes": changes
+            }
+        
+        self._record_price_baselines(
+            db, conditions, include_variations=price_update.apply_to_variations
+        )
+        
+        updated_products = db.execute(
+            update(Product)
+            .where(*conditions, Product.selling_price != product_price)
+            .values(selling_price=product_price)
+            .returning(Product.id, Product.selling_price, Product.purchase_price),
+            execution_options={"synchronize_session": False}
+        ).all()
+        
+        updated_variations = []
+        if price_update.apply_to_variations:
+            updated_variations = db.execute(
+                update(ProductVariation)
+                .where(
+                    ProductVariation.product_id.in_(product_ids),
+                    ProductVariation.selling_price != variation_price
+                )
+                .values(selling_price=variation_price)
+                .returning(
+                    ProductVariation.product_id,
+                    ProductVariation.id,
+                    ProductVariation.selling_price,
+                    ProductVariation.purchase_price
+                ),
+                execution_options={"synchronize_session": False}
+            ).all()
+        
+        # One price-history row per change, written in a single executemany
+        valid_from = datetime.now(timezone.utc)
+        history_rows = [
+            {
+                "product_id": row.id,
+                "product_variation_id": None,
+                "selling_price": row.selling_price,
+                "purchase_price": row.purchase_price,
+                "valid_from": valid_from,
+                "source": "bulk_reprice"
+            }
+            for row in updated_products
+        ] + [
+            {
+                "product_id": row.product_id,
+                "product_variation_id": row.id,
+                "selling_price": row.selling_price,
+                "purchase_price": row.purchase_price,
+                "valid_from": valid_from,
+                "source": "bulk_reprice"
+            }
+            for row in updated_variations
+        ]
+        if history_rows:
+            db.execute(insert(PriceHistory), history_rows)
+        
+        db.commit()
+        variation_lookup.invalidate()
+        
+        return {
+            "dry_run": False,
+            "products_updated": len(updated_products),
+            "variations_updated": len(updated_variations),
+            "changes": []
+        }
+    
+    def _record_price_baselines(
+        self,
+        db: Session,
+        conditions: list,
+        include_variations: bool = True
+    ) -> None:
+        """Snapshot pre-change prices for products/variations that have no history yet"""
+        product_history = exists().where(
+            PriceHistory.product_id == Product.id,
+            PriceHistory.product_variation_id.is_(None)
+        )
+        db.execute(
+            insert(PriceHistory).from_select(
+                ["product_id", "selling_price", "purchase_price", "valid_from", "source"],
+                select(
+                    Product.id,
+                    Product.selling_price,
+                    Product.purchase_price,
+                    func.coalesce(Product.created_at, func.now()),
+                    literal("baseline")
+                ).where(*conditions, ~product_history)
+            )
+        )
+        
+        if include_variations:
+            variation_history = exists().where(
+                PriceHistory.product_variation_id == ProductVariation.id
+            )
+            db.execute(
+                insert(PriceHistory).from_select(
+                    [
+                        "product_id", "product_variation_id", "selling_price",
+                        "purchase_price", "valid_from", "source"
+                    ],
+                    select(
+                        ProductVariation.product_id,
+                        ProductVariation.id,
+                        ProductVariation.selling_price,
+                        ProductVariation.purchase_price,
+                        func.coalesce(ProductVariation.created_at, func.now()),
+                        literal("baseline")
+                    ).where(
+                        ProductVariation.product_id.in_(select(Product.id).where(*conditions)),
+                        ~variation_history
+                    )
+                )
+            )
+    
+    def _follow_product_prices(
+        self,
+        db: Session,
+        product: Product,
+        old_prices: tuple,
+        valid_from: datetime
+    ) -> None:
+        """
+        Move variations still on the product's old prices to its new ones
+        
+        Variations default to the product price, so those whose price equals
+        the old product price follow the change; variations with their own
+        price keep it. One UPDATE ... RETURNING, then one price-history row
+        per updated variation in a single executemany.
+        """
+        values = {}
+        follows = []
+        for column, old_price, new_price in (
+            (ProductVariation.selling_price, old_prices[0], product.selling_price),
+            (ProductVariation.purchase_price, old_prices[1], product.purchase_price)
+        ):
+            if new_price != old_price:
+                condition = column.is_not_distinct_from(old_price)
+                values[column.key] = case((condition, new_price), else_=column)
+                follows.append(condition)
+        
+        updated_variations = db.execute(
+            update(ProductVariation)
+            .where(ProductVariation.product_id == product.id, or_(*follows))
+            .values(**values)
+            .returning(
+                ProductVariation.id,
+                ProductVariation.selling_price,
+                ProductVariation.purchase_price
+            ),
+            execution_options={"synchronize_session": False}
+        ).all()
+        
+        if updated_variations:
+            db.execute(insert(PriceHistory), [
+                {
+                    "product_id": product.id,
+                    "product_variation_id": row.id,
+                    "selling_price": row.selling_price,
+                    "purchase_price": row.purchase_price,
+                    "valid_from": valid_from,
+                    "source": "product_update"
+                }
+                for row in updated_variations
+            ])
+    
+    def _price_expression(self, column, price_update: ProductBulkPriceUpdate):
+        """Build the SQL expression computing a new price from the current one"""
+        value = price_update.value
+        
+        if price_update.mode == PriceAdjustmentMode.ABSOLUTE:
+            expression = literal(value, Numeric(10, 2))
+        elif price_update.mode == PriceAdjustmentMode.PERCENTAGE:
+            expression = column * (Decimal(100) + value) / Decimal(100)
+        else:
+            expression = func.round(column / value) * value
+        
+        if price_update.round_to and price_update.mode != PriceAdjustmentMode.ROUND:
+            expression = func.round(expression / price_update.round_to) * price_update.round_to
+        
+        return func.round(expression, 2)
+    
+    def _bulk_filter_conditions(self, filters: ProductBulkFilter) -> list:
+        """Build WHERE conditions on products from a bulk filter"""
+        conditions = []
+        
+        if filters.product_ids:
+            conditions.append(Product.id.in_(filters.product_ids))
+        
+        if filters.category_id is not None:
+            conditions.append(Product.category_id == filters.category_id)
+        
+        if filters.brand_id is not None:
+            conditions.append(Product.brand_id == filters.brand_id)
+        
+        if filters.supplier_id is not None:
+            conditions.append(Product.supplier_id == filters.supplier_id)
+        
+        return conditions
+    
+    def _set_active(self, db: Session, conditions: list, is_active: bool) -> tuple:
+        """Flip is_active on matching products and their variations with two UPDATEs"""
+        product_ids = select(Product.id).where(*conditions)
+        
+        variations_updated = db.execute(
+            update(ProductVariation)
+            .where(
+                ProductVariation.product_id.in_(product_ids),
+                ProductVariation.is_active.isnot(is_active)
+            )
+            .values(is_active=is_active),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        
+        products_updated = db.execute(
+            update(Product)
+            .where(*conditions, Product.is_active.isnot(is_active))
+            .values(is_active=is_active),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        
+        return products_updated, variations_updated
+    
     def hard_delete(self, db: Session, id: int) -> Optional[Product]:
         """Permanently delete a product and its variations"""
         db_obj = db.query(Product).filter(Product.id == id).first()
@@ -156,50 +621,267 @@ class ProductService:
             
             db.delete(db_obj)
             db.commit()
+            variation_lookup.invalidate()
         return db_obj
     
-    def _generate_sku_for_variation(
-        self, 
-        db: Session, 
-        product: Product, 
-        color_id: int
-    ) -> str:
-        """Generate SKU for a product variation"""
-        # Get color name
-        from app.models.product_attributes import ProductColor
-        color = db.query(ProductColor).filter(ProductColor.id == color_id).first()
-        color_name = color.name if color else "UNKNOWN"
-        
-        return generate_sku(
-            product_name=product.name,
-            color_name=color_name,
-            brand_name=product.brand.name,
-            category_name=product.category.name,
-            product_id=product.id
+    def get_variations(
+        self,
+        db: Session,
+        product_id: int,
+        is_active: Optional[bool] = None
+    ) -> List[ProductVariation]:
+        """Get the variations of a product"""
+        query = db.query(ProductVariation).filter(ProductVariation.product_id == product_id)
+        
+        if is_active is not None:
+            query = query.filter(ProductVariation.is_active == is_active)
+        
+        return query.order_by(ProductVariation.id).all()
+    
+    def get_variation(
+        self,
+        db: Session,
+        product_id: int,
+        variation_id: int
+    ) -> Optional[ProductVariation]:
+        """Get a single variation of a product"""
+        return db.query(ProductVariation).filter(
+            ProductVariation.product_id == product_id,
+            ProductVariation.id == variation_id
+        ).first()
+    
+    def create_variations(
+        self,
+        db: Session,
+        product: Product,
+        variations: List[ProductVariationCreate],
+        user_id: int
+    ) -> List[ProductVariation]:
+        """Add variations to an existing product in one batch"""
+        variation_ids = self._insert_variations(db, product, variations, user_id)
+        db.commit()
+        
+        return db.query(ProductVariation).filter(
+            ProductVariation.id.in_(variation_ids)
+        ).order_by(ProductVariation.id).all()
+    
+    def update_variation(
+        self,
+        db: Session,
+        db_obj: ProductVariation,
+        obj_in: ProductVariationUpdate
+    ) -> ProductVariation:
+        """Update a product variation (the SKU is kept stable)"""
+        update_data = obj_in.dict(exclude_unset=True)
+        
+        new_color_id = update_data.get('color_id')
+        if new_color_id is not None and new_color_id != db_obj.color_id:
+            if attribute_cache.get(db, ProductColor, new_color_id) is None:
+                raise ValueError(f"Color {new_color_id} not found")
+            if db.query(exists().where(
+                ProductVariation.product_id == db_obj.product_id,
+                ProductVariation.color_id == new_color_id
+            )).scalar():
+                raise ValueError(f"Product already has a variation with color {new_color_id}")
+        
+        old_prices = (db_obj.selling_price, db_obj.purchase_price)
+        new_prices = tuple(
+            old if update_data.get(field) is None else update_data[field]
+            for field, old in zip(('selling_price', 'purchase_price'), old_prices)
         )
+        
+        # Keep the pre-change prices for as-of lookups, before anything changes
+        if new_prices != old_prices:
+            self._record_price_baselines(db, [Product.id == db_obj.product_id])
+        
+        for field, value in update_data.items():
+            if value is not None:
+                setattr(db_obj, field, value)
+        
+        if (db_obj.selling_price, db_obj.purchase_price) != old_prices:
+            db.add(PriceHistory(
+                product_id=db_obj.product_id,
+                product_variation_id=db_obj.id,
+                selling_price=db_obj.selling_price,
+                purchase_price=db_obj.purchase_price,
+                valid_from=datetime.now(timezone.utc),
+                source="variation_update"
+            ))
+        
+        db.add(db_obj)
+        db.commit()
+        variation_lookup.invalidate()
+        db.refresh(db_obj)
+        return db_obj
+    
+    def delete_variation(self, db: Session, db_obj: ProductVariation) -> ProductVariation:
+        """Delete a product variation (soft delete by setting is_active=False)"""
+        db_obj.is_active = False
+        db.add(db_obj)
+        db.commit()
+        variation_lookup.invalidate()
+        db.refresh(db_obj)
+        return db_obj
+    
+    def _insert_variations(
+        self,
+        db: Session,
+        product: Product,
+        variations: List[ProductVariationCreate],
+        user_id: int
+    ) -> List[int]:
+        """
+        Insert variations for a product without committing.
+        
+        Colors and existing variations are checked with one query each, SKUs are
+        allocated in batch, the rows go in with a single INSERT ... RETURNING and
+        opening stock is posted to the ledger as one batch.
+        """
+        if not variations:
+            return []
+        
+        color_ids = [variation.color_id for variation in variations]
+        if len(set(color_ids)) != len(color_ids):
+            raise ValueError("Each color can only be added once per product")
+        
+        colors = {
+            id: attribute_cache.name(db, ProductColor, id) for id in color_ids
+        }
+        missing = [str(id) for id, name in colors.items() if name is None]
+        if missing:
+            raise ValueError(f"Color(s) not found: {', '.join(missing)}")
+        
+        existing_colors = {
+            row.color_id for row in db.query(ProductVariation.color_id).filter(
+                ProductVariation.product_id == product.id,
+                ProductVariation.color_id.in_(color_ids)
+            )
+        }
+        if existing_colors:
+            raise ValueError(
+                "Product already has variations for color(s): "
+                + ", ".join(str(id) for id in sorted(existing_colors))
+            )
+        
+        def insert_rows() -> tuple:
+            skus = self._allocate_skus(db, product, [colors[id] for id in color_ids])
+            rows = [
+                {
+                    "product_id": product.id,
+                    "color_id": variation.color_id,
+                    "sku": sku,
+                    "barcode": variation.barcode,
+                    "selling_price": (
+                        variation.selling_price if variation.selling_price is not None
+                        else product.selling_price
+                    ),
+                    "purchase_price": (
+                        variation.purchase_price if variation.purchase_price is not None
+                        else product.purchase_price
+                    ),
+                    "initial_stock": variation.initial_stock,
+                    "current_stock": 0,
+                    "is_active": True
+                }
+                for variation, sku in zip(variations, skus)
+            ]
+            variation_ids = db.execute(
+                insert(ProductVariation).returning(ProductVariation.id, sort_by_parameter_order=True),
+                rows
+            ).scalars().all()
+            return rows, variation_ids
+        
+        rows, variation_ids = insert_with_fresh_keys(db, insert_rows)
+        
+        db.execute(insert(PriceHistory), [
+            {
+                "product_id": product.id,
+                "product_variation_id": variation_id,
+                "selling_price": row["selling_price"],
+                "purchase_price": row["purchase_price"],
+                "source": "variation_create"
+            }
+            for variation_id, row in zip(variation_ids, rows)
+        ])
+        
+        stock_service.create_stock_entries(
+            db,
+            [
+                StockLedgerCreate(
+                    product_variation_id=variation_id,
+                    change_type=ChangeType.ADJUSTMENT,
+                    source_type="ProductVariation",
+                    source_id=str(variation_id),
+                    quantity_change=row["initial_stock"],
+                    notes="Opening stock"
+                )
+                for variation_id, row in zip(variation_ids, rows)
+                if row["initial_stock"]
+            ],
+            user_id=user_id
+        )
+        
+        return variation_ids
+    
+    def _claim_slug(self, db: Session, product_id: int, name: str) -> str:
+        """Set a product's slug for a new name with one UPDATE; returns the slug"""
+        slug = self._unique_slug(db, name, exclude_id=product_id)
+        db.execute(
+            update(Product).where(Product.id == product_id).values(slug=slug),
+            execution_options={"synchronize_session": False}
+        )
+        return slug
+    
+    def _unique_slug(self, db: Session, name: str, exclude_id: Optional[int] = None) -> str:
+        """Generate a unique product slug, looking up only slugs sharing its prefix"""
+        slug = generate_slug(name)
+        query = db.query(Product.slug).filter(Product.slug.like(f"{slug}%"))
+        if exclude_id is not None:
+            query = query.filter(Product.id != exclude_id)
+        
+        return ensure_unique_slug(slug, {row.slug for row in query})
+    
+    def _allocate_skus(self, db: Session, product: Product, color_names: List[str]) -> List[str]:
+        """Generate unique SKUs for a batch of colors with one lookup of existing SKUs"""
+        candidates = [
+            generate_sku(
+                product_name=product.name,
+                color_name=color_name,
+                brand_name=attribute_cache.name(db, ProductBrand, product.brand_id),
+                category_name=attribute_cache.name(db, ProductCategory, product.category_id),
+                product_id=product.id
+            )
+            for color_name in color_names
+        ]
+        
+        taken = {
+            row.sku for row in db.query(ProductVariation.sku).filter(
+                or_(*[ProductVariation.sku.like(f"{sku}%") for sku in set(candidates)])
+            )
+        }
+        
+        skus = []
+        for sku in candidates:
+            unique_sku = ensure_unique_slug(sku, taken, max_length=50)
+            taken.add(unique_sku)
+            skus.append(unique_sku)
+        
+        return skus
     
     def get_suppliers_by_ownership(
         self, 
         db: Session, 
         ownership_status: OwnershipStatus
-    ) -> List:
-        """Get suppliers based on product ownership status"""
+    ) -> bytes:
+        """Get suppliers based on product ownership status (pre-serialized JSON)"""
         if ownership_status == OwnershipStatus.OWNED:
             # Owned products should use factory suppliers
-            return db.query(Supplier).filter(
-                and_(
-                    Supplier.supplier_type == SupplierType.FACTORY,
-                    Supplier.is_active == True
-                )
-            ).all()
+            supplier_type = SupplierType.FACTORY
         else:
             # Not owned products should use wholesaler suppliers
-            return db.query(Supplier).filter(
-                and_(
-                    Supplier.supplier_type == SupplierType.WHOLESALER,
-                    Supplier.is_active == True
-                )
-            ).all()
+            supplier_type = SupplierType.WHOLESALER
+        
+        return supplier_directory.get_json(db, supplier_type, is_active=True)
 
 
 product_service = ProductService()
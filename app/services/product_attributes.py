@@ -1,19 +1,23 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select, func
 from typing import List, Optional, Type, TypeVar
 from app.models.product_attributes import (
     ProductCategory, ProductMaterial, ProductStyle, 
     ProductBrand, ProductColor, CountryOfOrigin
 )
 from app.schemas.product_attributes import (
+    AttributeType,
     ProductCategoryCreate, ProductCategoryUpdate,
     ProductMaterialCreate, ProductMaterialUpdate,
     ProductStyleCreate, ProductStyleUpdate,
     ProductBrandCreate, ProductBrandUpdate,
     ProductColorCreate, ProductColorUpdate,
-    CountryOfOriginCreate, CountryOfOriginUpdate
+    CountryOfOriginCreate, CountryOfOriginUpdate,
+    ProductAttributeBulkItem
 )
 from app.utils.slug import generate_slug, ensure_unique_slug
+from app.utils.sql import dialect_insert, insert_with_fresh_keys
+from app.services.attribute_cache import attribute_cache
 
 ModelType = TypeVar('ModelType')
 
@@ -39,12 +43,71 @@ class ProductAttributeService:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        attribute_cache.invalidate(self.model)
         return db_obj
     
+    def bulk_upsert(self, db: Session, items: List[ProductAttributeBulkItem]) -> List[dict]:
+        """
+        Create or update many attributes by name in one round-trip.
+        
+        Existing names and slugs are read with a single query, slugs for new
+        names are allocated in batch, and all rows are written with one
+        INSERT ... ON CONFLICT (name) DO UPDATE ... RETURNING. Existing rows keep
+        their slug; if a concurrent insert takes a new slug first, the upsert
+        is retried with slugs allocated afresh.
+        """
+        # Last occurrence of a name wins
+        items_by_name = {item.name: item for item in items}
+        color_fields = hasattr(self.model, 'hex_code')
+        
+        def upsert_rows() -> tuple:
+            existing = dict(db.execute(select(self.model.name, self.model.slug)).all())
+            taken_slugs = set(existing.values())
+            
+            rows = []
+            for name, item in items_by_name.items():
+                row = {"name": name, "is_active": item.is_active}
+                if name in existing:
+                    row["slug"] = existing[name]
+                else:
+                    row["slug"] = ensure_unique_slug(generate_slug(name), taken_slugs)
+                    taken_slugs.add(row["slug"])
+                if color_fields:
+                    row["hex_code"] = item.hex_code
+                    row["rgb_code"] = item.rgb_code
+                rows.append(row)
+            
+            stmt = dialect_insert(db, self.model).values(rows)
+            update_set = {
+                "is_active": stmt.excluded.is_active,
+                "updated_at": func.now()
+            }
+            if color_fields:
+                update_set["hex_code"] = func.coalesce(stmt.excluded.hex_code, self.model.hex_code)
+                update_set["rgb_code"] = func.coalesce(stmt.excluded.rgb_code, self.model.rgb_code)
+            
+            return existing, db.execute(
+                stmt.on_conflict_do_update(index_elements=[self.model.name], set_=update_set)
+                .returning(self.model.id, self.model.name, self.model.slug)
+            ).all()
+        
+        existing, result = insert_with_fresh_keys(db, upsert_rows)
+        db.commit()
+        attribute_cache.invalidate(self.model)
+        
+        return [
+            {"id": row.id, "name": row.name, "slug": row.slug, "created": row.name not in existing}
+            for row in result
+        ]
+    
     def get(self, db: Session, id: int) -> Optional[ModelType]:
         """Get a product attribute by ID"""
         return db.query(self.model).filter(self.model.id == id).first()
     
+    def get_cached(self, db: Session, id: int) -> Optional[dict]:
+        """Get a product attribute by ID from the attribute cache"""
+        return attribute_cache.get(db, self.model, id)
+    
     def get_by_slug(self, db: Session, slug: str) -> Optional[ModelType]:
         """Get a product attribute by slug"""
         return db.query(self.model).filter(self.model.slug == slug).first()
@@ -56,13 +119,8 @@ class ProductAttributeService:
         limit: int = 100,
         is_active: Optional[bool] = None
     ) -> List[ModelType]:
-        """Get multiple product attributes with optional filtering"""
-        query = db.query(self.model)
-        
-        if is_active is not None:
-            query = query.filter(self.model.is_active == is_active)
-        
-        return query.offset(skip).limit(limit).all()
+        """Get multiple product attributes with optional filtering (served from the cache)"""
+        return attribute_cache.get_all(db, self.model, is_active=is_active)[skip:skip + limit]
     
     def update(self, db: Session, db_obj: ModelType, obj_in: dict) -> ModelType:
         """Update a product attribute"""
@@ -85,6 +143,7 @@ class ProductAttributeService:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        attribute_cache.invalidate(self.model)
         return db_obj
     
     def delete(self, db: Session, id: int) -> Optional[ModelType]:
@@ -95,6 +154,7 @@ class ProductAttributeService:
             db.add(db_obj)
             db.commit()
             db.refresh(db_obj)
+            attribute_cache.invalidate(self.model)
         return db_obj
     
     def hard_delete(self, db: Session, id: int) -> Optional[ModelType]:
@@ -103,6 +163,7 @@ class ProductAttributeService:
         if db_obj:
             db.delete(db_obj)
             db.commit()
+            attribute_cache.invalidate(self.model)
         return db_obj
 
 
@@ -113,3 +174,14 @@ style_service = ProductAttributeService(ProductStyle)
 brand_service = ProductAttributeService(ProductBrand)
 color_service = ProductAttributeService(ProductColor)
 country_service = ProductAttributeService(CountryOfOrigin)
+
+
+# Service instances keyed by attribute type (as used in /attributes/{type} paths)
+attribute_services = {
+    AttributeType.CATEGORIES: category_service,
+    AttributeType.MATERIALS: material_service,
+    AttributeType.STYLES: style_service,
+    AttributeType.BRANDS: brand_service,
+    AttributeType.COLORS: color_service,
+    AttributeType.COUNTRIES: country_service,
+}
@@ -1,11 +1,26 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, select, insert, func
 from typing import List, Optional
 from decimal import Decimal
+from datetime import datetime, date, time, timedelta, timezone
 from app.models.purchase import Purchase, PurchaseDetail, PaymentHistory, PurchaseStatus, PaymentStatus
+from app.models.product import ProductVariation
+from app.models.supplier import Supplier
 from app.schemas.purchase import PurchaseCreate, PurchaseUpdate, PaymentHistoryCreate
 from app.services.stock import stock_service
+from app.services.costing import costing_service
+from app.services.supplier_stats import supplier_stats_service
+from app.services.payables import payables_service
 from app.models.stock import ChangeType
+from app.schemas.stock import StockLedgerCreate
+
+
+class PurchaseLineError(ValueError):
+    """Raised when purchase detail lines fail validation; carries one error per bad line"""
+    
+    def __init__(self, errors: List[dict]):
+        super().__init__(f"{len(errors)} purchase line(s) failed validation")
+        self.errors = errors
 
 
 class PurchaseService:
@@ -17,6 +32,36 @@ class PurchaseService:
     ) -> Purchase:
         """Create a new purchase with details"""
         
+        if db.get(Supplier, purchase_data.supplier_id) is None:
+            raise ValueError(f"Supplier {purchase_data.supplier_id} not found")
+        
+        # Validate every line's variation with one query
+        variation_ids = {detail.product_variation_id for detail in purchase_data.details}
+        active_by_id = dict(
+            db.execute(
+                select(ProductVariation.id, ProductVariation.is_active)
+                .where(ProductVariation.id.in_(variation_ids))
+            ).all()
+        ) if variation_ids else {}
+        
+        errors = []
+        for line, detail_data in enumerate(purchase_data.details):
+            variation_id = detail_data.product_variation_id
+            if variation_id not in active_by_id:
+                errors.append({
+                    "line": line,
+                    "product_variation_id": variation_id,
+                    "error": "Product variation not found"
+                })
+            elif not active_by_id[variation_id]:
+                errors.append({
+                    "line": line,
+                    "product_variation_id": variation_id,
+                    "error": "Product variation is inactive"
+                })
+        if errors:
+            raise PurchaseLineError(errors)
+        
         # Calculate total price
         total_price = sum(
             detail.quantity * detail.unit_price 
@@ -37,21 +82,37 @@ class PurchaseService:
         db.add(purchase)
         db.flush()  # Get purchase ID
         
-        # Create purchase details
-        for detail_data in purchase_data.details:
-            subtotal = detail_data.quantity * detail_data.unit_price
-            
-            detail = PurchaseDetail(
-                purchase_id=purchase.id,
-                product_variation_id=detail_data.product_variation_id,
-                quantity=detail_data.quantity,
-                unit_price=detail_data.unit_price,
-                subtotal=subtotal
-            )
-            
-            db.add(detail)
+        # Create purchase details in a single multi-row INSERT; ids come
+        # back through RETURNING
+        if purchase_data.details:
+            detail_ids = db.scalars(
+                insert(PurchaseDetail)
+                .values([
+                    {
+                        "purchase_id": purchase.id,
+                        "product_variation_id": detail_data.product_variation_id,
+                        "quantity": detail_data.quantity,
+                        "unit_price": detail_data.unit_price,
+                        "subtotal": detail_data.quantity * detail_data.unit_price
+                    }
+                    for detail_data in purchase_data.details
+                ])
+                .returning(PurchaseDetail.id)
+            ).all()
+            if len(detail_ids) != len(purchase_data.details):
+                raise ValueError("Failed to insert all purchase lines")
+        
+        supplier_stats_service.apply(
+            db,
+            purchase.supplier_id,
+            last_purchase_date=purchase.purchase_date,
+            purchase_count=1,
+            total_purchased=total_price,
+            quantity_purchased=sum(detail.quantity for detail in purchase_data.details)
+        )
         
         db.commit()
+        payables_service.invalidate()
         db.refresh(purchase)
         
         return purchase
@@ -65,26 +126,53 @@ class PurchaseService:
     ) -> Purchase:
         """Update purchase status and handle stock changes"""
         
-        purchase = db.query(Purchase).filter(Purchase.id == purchase_id).first()
+        # Lock the purchase so concurrent status changes cannot both post the receipt
+        purchase = db.query(Purchase).filter(
+            Purchase.id == purchase_id
+        ).with_for_update().populate_existing().first()
         if not purchase:
             raise ValueError(f"Purchase {purchase_id} not found")
         
         old_status = purchase.status
         purchase.status = new_status
         
-        # If status changed to RECEIVED, update stock
-        if old_status != PurchaseStatus.RECEIVED and new_status == PurchaseStatus.RECEIVED:
-            for detail in purchase.details:
-                stock_service.create_stock_entry(
-                    db=db,
-                    product_variation_id=detail.product_variation_id,
-                    change_type=ChangeType.PURCHASE,
-                    quantity_change=detail.quantity,
-                    source_type="PurchaseDetail",
-                    source_id=detail.id,
-                    user_id=user_id,
-                    notes=f"Purchase received: {purchase.supplier_reference or purchase.id}"
+        # The first time the purchase is received, post it to stock and cost.
+        # received_at marks the receipt as posted, so moving away from RECEIVED
+        # and back does not post it again.
+        if (
+            old_status != PurchaseStatus.RECEIVED
+            and new_status == PurchaseStatus.RECEIVED
+            and purchase.received_at is None
+        ):
+            purchase.received_at = datetime.now(timezone.utc)
+            if purchase.expected_arrival_date:
+                supplier_stats_service.apply(
+                    db,
+                    purchase.supplier_id,
+                    received_count=1,
+                    lead_time_days_total=(purchase.received_at.date() - purchase.expected_arrival_date).days
                 )
+            
+            costing_service.apply_receipts(db, [
+                (detail.product_variation_id, detail.quantity, detail.unit_price)
+                for detail in purchase.details
+            ])
+            stock_service.create_stock_entries(
+                db,
+                [
+                    StockLedgerCreate(
+                        product_variation_id=detail.product_variation_id,
+                        change_type=ChangeType.PURCHASE,
+                        quantity_change=detail.quantity,
+                        source_type="PurchaseDetail",
+                        source_id=detail.id,
+                        unit_cost=detail.unit_price,
+                        notes=f"Purchase received: {purchase.supplier_reference or purchase.id}"
+                    )
+                    for detail in purchase.details
+                ],
+                user_id=user_id
+            )
         
         db.commit()
         db.refresh(purchase)
@@ -125,7 +213,10 @@ class PurchaseService:
         else:
             purchase.payment_status = PaymentStatus.UNPAID
         
+        supplier_stats_service.apply(db, purchase.supplier_id, total_paid=payment_data.amount_paid)
+        
         db.commit()
+        payables_service.invalidate()
         db.refresh(payment)
         
         return payment
@@ -138,8 +229,8 @@ class PurchaseService:
         """Get a purchase by ID with all relationships"""
         return db.query(Purchase).options(
             joinedload(Purchase.supplier),
-            joinedload(Purchase.details).joinedload(PurchaseDetail.product_variation).joinedload("product"),
-            joinedload(Purchase.details).joinedload(PurchaseDetail.product_variation).joinedload("color"),
+            joinedload(Purchase.details).joinedload(PurchaseDetail.product_variation).joinedload(ProductVariation.product),
+            joinedload(Purchase.details).joinedload(PurchaseDetail.product_variation).joinedload(ProductVariation.color),
             joinedload(Purchase.payments),
             joinedload(Purchase.creator)
         ).filter(Purchase.id == purchase_id).first()
@@ -149,26 +240,105 @@ class PurchaseService:
         db: Session,
         skip: int = 0,
         limit: int = 100,
-        supplier_id: Optional[str] = None,
+        supplier_id: Optional[int] = None,
         status: Optional[PurchaseStatus] = None,
-        payment_status: Optional[PaymentStatus] = None
+        payment_status: Optional[PaymentStatus] = None,
+        purchase_date_from: Optional[date] = None,
+        purchase_date_to: Optional[date] = None
     ) -> List[Purchase]:
         """Get purchases with optional filtering"""
         query = db.query(Purchase).options(
             joinedload(Purchase.supplier),
             joinedload(Purchase.creator)
+        ).filter(*self._filter_conditions(
+            supplier_id, status, payment_status, purchase_date_from, purchase_date_to
+        ))
+        
+        return query.order_by(desc(Purchase.created_at)).offset(skip).limit(limit).all()
+    
+    def get_purchase_summary(
+        self,
+        db: Session,
+        supplier_id: Optional[int] = None,
+        status: Optional[PurchaseStatus] = None,
+        payment_status: Optional[PaymentStatus] = None,
+        purchase_date_from: Optional[date] = None,
+        purchase_date_to: Optional[date] = None
+    ) -> dict:
+        """Aggregate count, total, paid and outstanding amounts for a purchase filter"""
+        paid = (
+            select(
+                PaymentHistory.purchase_id,
+                func.sum(PaymentHistory.amount_paid).label("amount_paid")
+            )
+            .group_by(PaymentHistory.purchase_id)
+            .subquery()
         )
+        amount_paid = func.coalesce(paid.c.amount_paid, 0)
+        rows = db.execute(
+            select(
+                Purchase.payment_status,
+                func.count(Purchase.id),
+                func.coalesce(func.sum(Purchase.total_price), 0),
+                func.coalesce(func.sum(amount_paid), 0)
+            )
+            .outerjoin(paid, paid.c.purchase_id == Purchase.id)
+            .where(*self._filter_conditions(
+                supplier_id, status, payment_status, purchase_date_from, purchase_date_to
+            ))
+            .group_by(Purchase.payment_status)
+        ).all()
+        
+        by_payment_status = [
+            {
+                "payment_status": row_status,
+                "count": count,
+                "total_price": Decimal(total),
+                "total_paid": Decimal(total_paid),
+                "outstanding": Decimal(total) - Decimal(total_paid)
+            }
+            for row_status, count, total, total_paid in rows
+        ]
+        total_price = sum((group["total_price"] for group in by_payment_status), Decimal(0))
+        total_paid = sum((group["total_paid"] for group in by_payment_status), Decimal(0))
+        return {
+            "count": sum(group["count"] for group in by_payment_status),
+            "total_price": total_price,
+            "total_paid": total_paid,
+            "outstanding": total_price - total_paid,
+            "by_payment_status": by_payment_status
+        }
+    
+    def _filter_conditions(
+        self,
+        supplier_id: Optional[int],
+        status: Optional[PurchaseStatus],
+        payment_status: Optional[PaymentStatus],
+        purchase_date_from: Optional[date],
+        purchase_date_to: Optional[date]
+    ) -> list:
+        """Build WHERE conditions shared by the purchase list and its summary"""
+        conditions = []
         
         if supplier_id:
-            query = query.filter(Purchase.supplier_id == supplier_id)
+            conditions.append(Purchase.supplier_id == supplier_id)
         
         if status:
-            query = query.filter(Purchase.status == status)
+            conditions.append(Purchase.status == status)
         
         if payment_status:
-            query = query.filter(Purchase.payment_status == payment_status)
+            conditions.append(Purchase.payment_status == payment_status)
         
-        return query.order_by(desc(Purchase.created_at)).offset(skip).limit(limit).all()
+        # Date bounds are inclusive whole days
+        if purchase_date_from:
+            conditions.append(Purchase.purchase_date >= datetime.combine(purchase_date_from, time.min))
+        
+        if purchase_date_to:
+            conditions.append(
+                Purchase.purchase_date < datetime.combine(purchase_date_to + timedelta(days=1), time.min)
+            )
+        
+        return conditions
     
     def update_purchase(
         self,
@@ -188,6 +358,10 @@ class PurchaseService:
             if value is not None:
                 setattr(purchase, field, value)
         
+        # Lead time of an already received purchase depends on its expected date
+        if purchase.received_at is not None and update_dict.get("expected_arrival_date") is not None:
+            supplier_stats_service.rebuild(db, [purchase.supplier_id])
+        
         db.commit()
         db.refresh(purchase)
         
@@ -208,7 +382,9 @@ class PurchaseService:
             raise ValueError("Can only delete draft purchases")
         
         db.delete(purchase)
+        supplier_stats_service.rebuild(db, [purchase.supplier_id])
         db.commit()
+        payables_service.invalidate()
         
         return True
 
@@ -1,11 +1,18 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, select, update, insert, func
 from typing import List, Optional
 from decimal import Decimal
-from app.models.return_workflow import PurchaseReturn, RefundStatus
+from app.models.return_workflow import PurchaseReturn, PurchaseReturnDocument, RefundStatus
+from app.models.purchase import Purchase, PurchaseDetail, PurchaseStatus
 from app.models.stock import ChangeType
-from app.schemas.purchase_return import PurchaseReturnCreate, PurchaseReturnUpdate
+from app.schemas.stock import StockLedgerCreate
+from app.schemas.purchase_return import (
+    PurchaseReturnCreate, PurchaseReturnUpdate, PurchaseReturnDocumentCreate
+)
 from app.services.stock import stock_service
+from app.services.costing import costing_service
+from app.services.supplier_stats import supplier_stats_service
+from app.services.purchase import PurchaseLineError
 
 
 class PurchaseReturnService:
@@ -17,6 +24,14 @@ class PurchaseReturnService:
     ) -> PurchaseReturn:
         """Create a new purchase return and update stock"""
         
+        # Validates and counts the return against the purchase line under its row lock
+        unit_cost = self._add_returned_quantity(
+            db,
+            return_data.purchase_detail_id,
+            return_data.product_variation_id,
+            return_data.quantity_returned
+        )
+        
         # Create return record
         db_obj = PurchaseReturn(
             **return_data.dict(),
@@ -25,22 +40,172 @@ class PurchaseReturnService:
         db.add(db_obj)
         db.flush()
         
-        # Update stock
-        stock_service.create_stock_entry(
-            db=db,
-            product_variation_id=return_data.product_variation_id,
-            change_type=ChangeType.RETURN,
-            quantity_change=return_data.quantity_returned,
-            source_type="PurchaseReturn",
-            source_id=db_obj.id,
-            user_id=user_id,
-            notes=f"Purchase return: {return_data.reason if return_data.reason else 'No reason provided'}"
+        supplier_stats_service.apply(
+            db,
+            self._supplier_id(db, db_obj.purchase_detail_id),
+            quantity_returned=db_obj.quantity_returned
+        )
+        
+        # Returned units leave average cost at the price they were bought at
+        costing_service.apply_returns(db, [
+            (db_obj.product_variation_id, db_obj.quantity_returned, unit_cost)
+        ])
+        
+        # Returned units leave stock
+        stock_service.create_stock_entries(
+            db,
+            [StockLedgerCreate(
+                product_variation_id=return_data.product_variation_id,
+                change_type=ChangeType.RETURN,
+                quantity_change=-return_data.quantity_returned,
+                source_type="PurchaseReturn",
+                source_id=db_obj.id,
+                notes=f"Purchase return: {return_data.reason if return_data.reason else 'No reason provided'}"
+            )],
+            user_id=user_id
         )
         
         db.commit()
         db.refresh(db_obj)
         return db_obj
     
+    def create_return_document(
+        self,
+        db: Session,
+        document_data: PurchaseReturnDocumentCreate,
+        user_id: int
+    ) -> PurchaseReturnDocument:
+        """
+        Return many lines of one purchase together
+        
+        All lines are validated against one locked query of their purchase
+        lines, return rows are inserted in one batched INSERT, stock and
+        cost updates are posted as one batch, and the refund is computed from
+        the purchase line prices.
+        """
+        purchase = db.query(Purchase).filter(Purchase.id == document_data.purchase_id).first()
+        if not purchase:
+            raise ValueError(f"Purchase {document_data.purchase_id} not found")
+        if purchase.status != PurchaseStatus.RECEIVED:
+            raise ValueError("Only received purchases can be returned")
+        
+        detail_ids = {line.purchase_detail_id for line in document_data.lines}
+        details = {
+            row.id: row
+            for row in db.execute(
+                select(
+                    PurchaseDetail.id,
+                    PurchaseDetail.purchase_id,
+                    PurchaseDetail.product_variation_id,
+                    PurchaseDetail.quantity,
+                    PurchaseDetail.quantity_returned_total,
+                    PurchaseDetail.unit_price
+                )
+                .where(PurchaseDetail.id.in_(detail_ids))
+                .order_by(PurchaseDetail.id)
+                .with_for_update()
+            )
+        }
+        
+        errors = []
+        returned_totals = {}
+        for line_number, line in enumerate(document_data.lines):
+            detail = details.get(line.purchase_detail_id)
+            error = None
+            if detail is None or detail.purchase_id != purchase.id:
+                error = "Purchase detail not found on this purchase"
+            elif line.purchase_detail_id in returned_totals:
+                error = "Purchase detail appears more than once"
+            else:
+                remaining = detail.quantity - detail.quantity_returned_total
+                if line.quantity_returned > remaining:
+                    error = f"Only {remaining} of {detail.quantity} units remain returnable"
+                else:
+                    returned_totals[line.purchase_detail_id] = (
+                        detail.quantity_returned_total + line.quantity_returned
+                    )
+            if error:
+                errors.append({
+                    "line": line_number,
+                    "purchase_detail_id": line.purchase_detail_id,
+                    "error": error
+                })
+        if errors:
+            raise PurchaseLineError(errors)
+        
+        # Counters are safe to set directly: the lines are locked above
+        db.execute(
+            update(PurchaseDetail),
+            [
+                {"id": detail_id, "quantity_returned_total": total}
+                for detail_id, total in returned_totals.items()
+            ]
+        )
+        
+        return_rows = [
+            {
+                "purchase_detail_id": line.purchase_detail_id,
+                "product_variation_id": details[line.purchase_detail_id].product_variation_id,
+                "quantity_returned": line.quantity_returned,
+                "reason": line.reason or document_data.reason,
+                "refund_amount": line.quantity_returned * details[line.purchase_detail_id].unit_price,
+                "created_by": user_id
+            }
+            for line in document_data.lines
+        ]
+        
+        document = PurchaseReturnDocument(
+            purchase_id=purchase.id,
+            reason=document_data.reason,
+            refund_total=sum(row["refund_amount"] for row in return_rows),
+            created_by=user_id
+        )
+        db.add(document)
+        db.flush()
+        
+        return_ids = db.scalars(
+            insert(PurchaseReturn).returning(PurchaseReturn.id, sort_by_parameter_order=True),
+            [{**row, "document_id": document.id} for row in return_rows]
+        ).all()
+        
+        supplier_stats_service.apply(
+            db,
+            purchase.supplier_id,
+            quantity_returned=sum(row["quantity_returned"] for row in return_rows)
+        )
+        costing_service.apply_returns(db, [
+            (
+                row["product_variation_id"],
+                row["quantity_returned"],
+                details[row["purchase_detail_id"]].unit_price
+            )
+            for row in return_rows
+        ])
+        stock_service.create_stock_entries(
+            db,
+            [
+                StockLedgerCreate(
+                    product_variation_id=row["product_variation_id"],
+                    change_type=ChangeType.RETURN,
+                    quantity_change=-row["quantity_returned"],
+                    source_type="PurchaseReturn",
+                    source_id=return_id,
+                    notes=f"Purchase return document {document.id}"
+                )
+                for row, return_id in zip(return_rows, return_ids)
+            ],
+            user_id=user_id
+        )
+        
+        db.commit()
+        return self.get_return_document(db, document.id)
+    
+    def get_return_document(self, db: Session, document_id: str) -> Optional[PurchaseReturnDocument]:
+        """Get a purchase return document with its lines"""
+        return db.query(PurchaseReturnDocument).options(
+            joinedload(PurchaseReturnDocument.lines)
+        ).filter(PurchaseReturnDocument.id == document_id).first()
+    
     def get_purchase_return(self, db: Session, return_id: str) -> Optional[PurchaseReturn]:
         """Get a purchase return by ID"""
         return db.query(PurchaseReturn).options(
@@ -70,19 +235,151 @@ class PurchaseReturnService:
         self,
         db: Session,
         db_obj: PurchaseReturn,
-        obj_in: PurchaseReturnUpdate
+        obj_in: PurchaseReturnUpdate,
+        user_id: int
     ) -> PurchaseReturn:
-        """Update a purchase return"""
+        """Update a purchase return, moving stock for any change in quantity"""
         update_data = obj_in.dict(exclude_unset=True)
+        old_quantity = db_obj.quantity_returned
+        new_quantity = update_data.get("quantity_returned")
+        delta = new_quantity - old_quantity if new_quantity is not None else 0
+        
+        # Validate (and count) the change before touching the return
+        if delta:
+            unit_cost = self._add_returned_quantity(
+                db, db_obj.purchase_detail_id, db_obj.product_variation_id, delta
+            )
         
         for field, value in update_data.items():
             if value is not None:
                 setattr(db_obj, field, value)
         
+        if delta:
+            supplier_stats_service.apply(
+                db,
+                self._supplier_id(db, db_obj.purchase_detail_id),
+                quantity_returned=delta
+            )
+            cost_line = [(db_obj.product_variation_id, abs(delta), unit_cost)]
+            if delta > 0:
+                costing_service.apply_returns(db, cost_line)
+            else:
+                costing_service.apply_receipts(db, cost_line)
+            stock_service.create_stock_entries(
+                db,
+                [StockLedgerCreate(
+                    product_variation_id=db_obj.product_variation_id,
+                    change_type=ChangeType.RETURN,
+                    quantity_change=-delta,
+                    source_type="PurchaseReturn",
+                    source_id=db_obj.id,
+                    # Units coming back into stock re-enter at the purchase line's cost
+                    unit_cost=unit_cost if delta < 0 else None,
+                    notes=f"Purchase return quantity changed: {old_quantity} -> {db_obj.quantity_returned}"
+                )],
+                user_id=user_id
+            )
+            
+            # Document lines are refunded at the purchase price unless a refund is given
+            if db_obj.document_id and update_data.get("refund_amount") is None:
+                db_obj.refund_amount = db_obj.quantity_returned * unit_cost
+        
         db.add(db_obj)
+        
+        if db_obj.document_id and (delta or update_data.get("refund_amount") is not None):
+            db.flush()
+            self._update_refund_total(db, db_obj.document_id)
+        
         db.commit()
         db.refresh(db_obj)
         return db_obj
+    
+    def rebuild_returned_quantities(self, db: Session) -> int:
+        """
+        Recompute every purchase line's returned counter from its purchase returns.
+        
+        The counter is maintained on write, so this is needed once for returns
+        recorded before it existed. One correlated UPDATE; the caller commits.
+        Returns the number of purchase lines updated.
+        """
+        returned = (
+            select(func.coalesce(func.sum(PurchaseReturn.quantity_returned), 0))
+            .where(PurchaseReturn.purchase_detail_id == PurchaseDetail.id)
+            .scalar_subquery()
+        )
+        return db.execute(
+            update(PurchaseDetail).values(quantity_returned_total=returned),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+    
+    def _add_returned_quantity(
+        self,
+        db: Session,
+        purchase_detail_id: str,
+        product_variation_id: int,
+        quantity: int
+    ) -> Decimal:
+        """
+        Add to a purchase line's returned counter if it stays within the line quantity
+        
+        A single conditional UPDATE both validates and counts the return, so
+        concurrent returns against the same line cannot over-return. Returns
+        the line's unit price.
+        """
+        received_purchases = select(Purchase.id).where(Purchase.status == PurchaseStatus.RECEIVED)
+        unit_price = db.execute(
+            update(PurchaseDetail)
+            .where(
+                PurchaseDetail.id == purchase_detail_id,
+                PurchaseDetail.product_variation_id == product_variation_id,
+                PurchaseDetail.purchase_id.in_(received_purchases),
+                PurchaseDetail.quantity_returned_total + quantity <= PurchaseDetail.quantity,
+                PurchaseDetail.quantity_returned_total + quantity >= 0
+            )
+            .values(quantity_returned_total=PurchaseDetail.quantity_returned_total + quantity)
+            .returning(PurchaseDetail.unit_price),
+            execution_options={"synchronize_session": False}
+        ).scalar()
+        if unit_price is not None:
+            return unit_price
+        
+        # Explain why the line was not updated
+        detail = db.query(PurchaseDetail).filter(PurchaseDetail.id == purchase_detail_id).first()
+        if detail is None:
+            raise ValueError(f"Purchase detail {purchase_detail_id} not found")
+        if detail.product_variation_id != product_variation_id:
+            raise ValueError(
+                f"Purchase detail {purchase_detail_id} is for product variation {detail.product_variation_id}"
+            )
+        if detail.purchase.status != PurchaseStatus.RECEIVED:
+            raise ValueError("Only received purchases can be returned")
+        remaining = detail.quantity - detail.quantity_returned_total
+        raise ValueError(
+            f"Cannot return {quantity} units: {remaining} of {detail.quantity} remain returnable"
+        )
+    
+    def _update_refund_total(self, db: Session, document_id: str) -> None:
+        """Recompute a return document's refund total from its lines"""
+        line_total = (
+            select(func.coalesce(func.sum(PurchaseReturn.refund_amount), 0))
+            .where(PurchaseReturn.document_id == document_id)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(PurchaseReturnDocument)
+            .where(PurchaseReturnDocument.id == document_id)
+            .values(refund_total=line_total),
+            execution_options={"synchronize_session": False}
+        )
+    
+    def _supplier_id(self, db: Session, purchase_detail_id: str) -> int:
+        """Get the supplier of the purchase a detail line belongs to"""
+        supplier_id = db.query(Purchase.supplier_id).join(
+            PurchaseDetail, PurchaseDetail.purchase_id == Purchase.id
+        ).filter(PurchaseDetail.id == purchase_detail_id).scalar()
+        if supplier_id is None:
+            raise ValueError(f"Purchase detail {purchase_detail_id} not found")
+        return supplier_id
 
 
 return_service = PurchaseReturnService()
\ No newline at end of file
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, insert, case
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.product import ProductVariation
+from app.models.sales import SalesOrder, SalesOrderStatus, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStockError(ValueError):
+    """Raised when a reservation cannot be made; carries one error per short variation"""
+    
+    def __init__(self, errors: List[dict]):
+        super().__init__(f"{len(errors)} variation(s) have insufficient stock")
+        self.errors = errors
+
+
+class ReservationService:
+    """
+    Holds stock for confirmed sales orders.
+    
+    ProductVariation.reserved_stock is the sum of the open reservations of a
+    variation; available-to-sell is current_stock - reserved_stock. None of
+    these methods commit.
+    """
+    
+    def reserve(self, db: Session, sales_order_id: str, quantities: Dict[int, int]) -> None:
+        """
+        Reserve stock for every variation of an order with one conditional UPDATE.
+        
+        The UPDATE only touches rows whose available stock covers the requested
+        quantity, so concurrent orders cannot reserve the same units. If any
+        variation is short nothing is kept: the caller's transaction must be
+        rolled back, which the raised error causes in the request path.
+        """
+        if not quantities:
+            return
+        
+        requested = case(quantities, value=ProductVariation.id)
+        reserved_ids = set(db.scalars(
+            update(ProductVariation)
+            .where(
+                ProductVariation.id.in_(quantities),
+                ProductVariation.is_active == True,
+                ProductVariation.current_stock - ProductVariation.reserved_stock >= requested
+            )
+            .values(reserved_stock=ProductVariation.reserved_stock + requested)
+            .returning(ProductVariation.id),
+            execution_options={"synchronize_session": False}
+        ))
+        if len(reserved_ids) != len(quantities):
+            raise InsufficientStockError(self._shortages(db, {
+                variation_id: quantity
+                for variation_id, quantity in quantities.items()
+                if variation_id not in reserved_ids
+            }))
+        
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.STOCK_RESERVATION_TTL_MINUTES)
+        db.execute(insert(StockReservation), [
+            {
+                "sales_order_id": sales_order_id,
+                "product_variation_id": variation_id,
+                "quantity": quantity,
+                "expires_at": expires_at
+            }
+            for variation_id, quantity in quantities.items()
+        ])
+    
+    def release(self, db: Session, sales_order_id: str) -> Dict[int, int]:
+        """
+        Release an order's reservations; returns the released quantity per variation.
+        
+        The reservation rows are claimed with DELETE ... RETURNING and only the
+        returned quantities are unreserved, so a release that overlaps another
+        release or the sweeper cannot unreserve the same units twice. Callers
+        hold the order's row lock (see SalesService).
+        """
+        claimed = db.execute(
+            delete(StockReservation)
+            .where(StockReservation.sales_order_id == sales_order_id)
+            .returning(StockReservation.product_variation_id, StockReservation.quantity),
+            execution_options={"synchronize_session": False}
+        ).all()
+        
+        released = self._sum_by_variation(claimed)
+        self._unreserve(db, released)
+        return released
+    
+    def expire(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Release every expired reservation and move its order back to DRAFT.
+        
+        Orders are locked first, in id order and skipping any that a request
+        is working on (they are picked up on the next sweep), then their
+        expired reservations are claimed with DELETE ... RETURNING.
+        
+        Returns the number of orders whose reservations expired.
+        """
+        now = now or datetime.now(timezone.utc)
+        order_ids = db.scalars(
+            select(SalesOrder.id)
+            .where(SalesOrder.id.in_(
+                select(StockReservation.sales_order_id).where(StockReservation.expires_at <= now)
+            ))
+            .order_by(SalesOrder.id)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not order_ids:
+            return 0
+        
+        claimed = db.execute(
+            delete(StockReservation)
+            .where(
+                StockReservation.sales_order_id.in_(order_ids),
+                StockReservation.expires_at <= now
+            )
+            .returning(
+                StockReservation.product_variation_id,
+                StockReservation.quantity,
+                StockReservation.sales_order_id
+            ),
+            execution_options={"synchronize_session": False}
+        ).all()
+        if not claimed:
+            return 0
+        
+        expired_order_ids = {row.sales_order_id for row in claimed}
+        self._unreserve(db, self._sum_by_variation(claimed))
+        db.execute(
+            update(SalesOrder)
+            .where(SalesOrder.id.in_(expired_order_ids), SalesOrder.status == SalesOrderStatus.CONFIRMED)
+            .values(status=SalesOrderStatus.DRAFT),
+            execution_options={"synchronize_session": False}
+        )
+        return len(expired_order_ids)
+    
+    async def run_sweeper(self, interval_seconds: int) -> None:
+        """Expire reservations every interval until cancelled"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self._sweep)
+            except Exception:
+                logger.exception("Stock reservation sweep failed")
+    
+    def _sweep(self) -> None:
+        db = SessionLocal()
+        try:
+            self.expire(db)
+            db.commit()
+        finally:
+            db.close()
+    
+    def _sum_by_variation(self, rows) -> Dict[int, int]:
+        quantities: Dict[int, int] = {}
+        for row in rows:
+            quantities[row.product_variation_id] = quantities.get(row.product_variation_id, 0) + row.quantity
+        return quantities
+    
+    def _unreserve(self, db: Session, quantities: Dict[int, int]) -> None:
+        if not quantities:
+            return
+        
+        db.execute(
+            update(ProductVariation)
+            .where(ProductVariation.id.in_(quantities))
+            .values(reserved_stock=ProductVariation.reserved_stock - case(quantities, value=ProductVariation.id)),
+            execution_options={"synchronize_session": False}
+        )
+    
+    def _shortages(self, db: Session, quantities: Dict[int, int]) -> List[dict]:
+        """Explain why these (unreserved) variations could not be reserved"""
+        rows = {
+            row.id: row
+            for row in db.execute(
+                select(
+                    ProductVariation.id,
+                    ProductVariation.is_active,
+                    ProductVariation.current_stock,
+                    ProductVariation.reserved_stock
+                )
+                .where(ProductVariation.id.in_(quantities))
+            )
+        }
+        
+        errors = []
+        for variation_id, quantity in sorted(quantities.items()):
+            row = rows.get(variation_id)
+            if row is None:
+                errors.append({"product_variation_id": variation_id, "error": "Product variation not found"})
+            elif not row.is_active:
+                errors.append({"product_variation_id": variation_id, "error": "Product variation is inactive"})
+            elif row.current_stock - row.reserved_stock < quantity:
+                errors.append({
+                    "product_variation_id": variation_id,
+                    "requested": quantity,
+                    "available": row.current_stock - row.reserved_stock,
+                    "error": "Insufficient stock"
+                })
+        return errors
+
+
+reservation_service = ReservationService()
@@ -0,0 +1,260 @@
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, select, insert
+from typing import Dict, List, Optional
+from app.models.sales import SalesOrder, SalesDetail, SalesOrderStatus, SalesPaymentStatus
+from app.models.product import ProductVariation
+from app.models.stock import ChangeType
+from app.schemas.sales import SalesOrderCreate, SalesOrderUpdate
+from app.schemas.stock import StockLedgerCreate
+from app.services.stock import stock_service
+from app.services.reservation import reservation_service
+
+
+class SalesLineError(ValueError):
+    """Raised when sales order lines fail validation; carries one error per bad line"""
+    
+    def __init__(self, errors: List[dict]):
+        super().__init__(f"{len(errors)} sales line(s) failed validation")
+        self.errors = errors
+
+
+class SalesService:
+    # Allowed status changes
+    TRANSITIONS = {
+        SalesOrderStatus.DRAFT: {SalesOrderStatus.CONFIRMED, SalesOrderStatus.FULFILLED, SalesOrderStatus.CANCELLED},
+        SalesOrderStatus.CONFIRMED: {SalesOrderStatus.FULFILLED, SalesOrderStatus.CANCELLED},
+        SalesOrderStatus.FULFILLED: set(),
+        SalesOrderStatus.CANCELLED: set(),
+    }
+    
+    def create_order(
+        self,
+        db: Session,
+        order_data: SalesOrderCreate,
+        user_id: int
+    ) -> SalesOrder:
+        """Create a sales order, checking and deducting stock as its status requires"""
+        
+        # Validate every line's variation with one query
+        variation_ids = {detail.product_variation_id for detail in order_data.details}
+        variations = {
+            row.id: row
+            for row in db.execute(
+                select(ProductVariation.id, ProductVariation.is_active, ProductVariation.selling_price)
+                .where(ProductVariation.id.in_(variation_ids))
+            )
+        }
+        
+        errors = []
+        for line, detail_data in enumerate(order_data.details):
+            variation = variations.get(detail_data.product_variation_id)
+            if variation is None:
+                error = "Product variation not found"
+            elif not variation.is_active:
+                error = "Product variation is inactive"
+            else:
+                continue
+            errors.append({
+                "line": line,
+                "product_variation_id": detail_data.product_variation_id,
+                "error": error
+            })
+        if errors:
+            raise SalesLineError(errors)
+        
+        detail_rows = []
+        for detail_data in order_data.details:
+            unit_price = detail_data.unit_price or variations[detail_data.product_variation_id].selling_price
+            detail_rows.append({
+                "product_variation_id": detail_data.product_variation_id,
+                "quantity": detail_data.quantity,
+                "unit_price": unit_price,
+                "subtotal": detail_data.quantity * unit_price
+            })
+        
+        order = SalesOrder(
+            customer_name=order_data.customer_name,
+            notes=order_data.notes,
+            status=SalesOrderStatus.DRAFT,
+            total_price=sum(row["subtotal"] for row in detail_rows),
+            created_by=user_id
+        )
+        db.add(order)
+        db.flush()
+        
+        db.execute(
+            insert(SalesDetail).values([{**row, "sales_order_id": order.id} for row in detail_rows])
+        )
+        
+        if order_data.status != SalesOrderStatus.DRAFT:
+            self._change_status(db, order, order_data.status, user_id)
+        
+        db.commit()
+        return self.get_order(db, order.id)
+    
+    def update_order_status(
+        self,
+        db: Session,
+        order_id: str,
+        new_status: SalesOrderStatus,
+        user_id: int
+    ) -> SalesOrder:
+        """Move a sales order to a new status, deducting stock on fulfilment"""
+        order = self._lock_order(db, order_id)
+        if not order:
+            raise ValueError(f"Sales order {order_id} not found")
+        
+        self._change_status(db, order, new_status, user_id)
+        
+        db.commit()
+        return self.get_order(db, order.id)
+    
+    def get_order(self, db: Session, order_id: str) -> Optional[SalesOrder]:
+        """Get a sales order by ID with its details"""
+        return db.query(SalesOrder).options(
+            joinedload(SalesOrder.details),
+            joinedload(SalesOrder.creator)
+        ).filter(SalesOrder.id == order_id).first()
+    
+    def get_orders(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[SalesOrderStatus] = None,
+        payment_status: Optional[SalesPaymentStatus] = None
+    ) -> List[SalesOrder]:
+        """Get sales orders with optional filtering"""
+        query = db.query(SalesOrder)
+        
+        if status:
+            query = query.filter(SalesOrder.status == status)
+        
+        if payment_status:
+            query = query.filter(SalesOrder.payment_status == payment_status)
+        
+        return query.order_by(desc(SalesOrder.created_at)).offset(skip).limit(limit).all()
+    
+    def update_order(
+        self,
+        db: Session,
+        order_id: str,
+        update_data: SalesOrderUpdate,
+        user_id: int
+    ) -> SalesOrder:
+        """Update a sales order; status changes go through the same checks as update_order_status"""
+        order = self._lock_order(db, order_id)
+        if not order:
+            raise ValueError(f"Sales order {order_id} not found")
+        
+        update_dict = update_data.dict(exclude_unset=True)
+        new_status = update_dict.pop("status", None)
+        
+        for field, value in update_dict.items():
+            if value is not None:
+                setattr(order, field, value)
+        
+        if new_status is not None and new_status != order.status:
+            self._change_status(db, order, new_status, user_id)
+        
+        db.commit()
+        return self.get_order(db, order.id)
+    
+    def delete_order(self, db: Session, order_id: str) -> bool:
+        """Delete a sales order (only if status is DRAFT)"""
+        order = self._lock_order(db, order_id)
+        if not order:
+            return False
+        
+        if order.status != SalesOrderStatus.DRAFT:
+            raise ValueError("Can only delete draft sales orders")
+        
+        db.delete(order)
+        db.commit()
+        
+        return True
+    
+    def _lock_order(self, db: Session, order_id: str) -> Optional[SalesOrder]:
+        """
+        Load a sales order with its row locked (and its status freshly read).
+        
+        Status transitions are checked against the locked row, so concurrent
+        requests for the same order (e.g. a double-clicked fulfil) run one
+        after the other and the second sees the first one's status.
+        """
+        return db.query(SalesOrder).filter(
+            SalesOrder.id == order_id
+        ).with_for_update().populate_existing().first()
+    
+    def _change_status(
+        self,
+        db: Session,
+        order: SalesOrder,
+        new_status: SalesOrderStatus,
+        user_id: int
+    ) -> None:
+        """Apply a status transition (does not commit)"""
+        if new_status not in self.TRANSITIONS[order.status]:
+            raise ValueError(f"Cannot change sales order status from {order.status.value} to {new_status.value}")
+        
+        # Confirmed orders hold their stock until they are fulfilled or cancelled
+        if order.status == SalesOrderStatus.CONFIRMED:
+            reservation_service.release(db, order.id)
+        
+        if new_status in (SalesOrderStatus.CONFIRMED, SalesOrderStatus.FULFILLED):
+            lines = db.execute(
+                select(SalesDetail.id, SalesDetail.product_variation_id, SalesDetail.quantity)
+                .where(SalesDetail.sales_order_id == order.id)
+                .order_by(SalesDetail.product_variation_id, SalesDetail.id)
+            ).all()
+            
+            quantities: Dict[int, int] = {}
+            for line in lines:
+                quantities[line.product_variation_id] = quantities.get(line.product_variation_id, 0) + line.quantity
+            
+            if new_status == SalesOrderStatus.CONFIRMED:
+                reservation_service.reserve(db, order.id, quantities)
+            else:
+                self._check_availability(db, quantities)
+                stock_service.create_stock_entries(
+                    db,
+                    [
+                        StockLedgerCreate(
+                            product_variation_id=line.product_variation_id,
+                            change_type=ChangeType.SALE,
+                            quantity_change=-line.quantity,
+                            source_type="SalesDetail",
+                            source_id=line.id,
+                            notes=f"Sales order fulfilled: {order.customer_name or order.id}"
+                        )
+                        for line in lines
+                    ],
+                    user_id=user_id
+                )
+        
+        order.status = new_status
+    
+    def _check_availability(self, db: Session, quantities: Dict[int, int]) -> None:
+        """Lock all ordered variations at once and check there is enough unreserved stock"""
+        available = dict(db.execute(
+            select(ProductVariation.id, ProductVariation.current_stock - ProductVariation.reserved_stock)
+            .where(ProductVariation.id.in_(quantities))
+            .order_by(ProductVariation.id)
+            .with_for_update()
+        ).all())
+        
+        errors = [
+            {
+                "product_variation_id": variation_id,
+                "requested": quantity,
+                "available": available.get(variation_id) or 0,
+                "error": "Insufficient stock"
+            }
+            for variation_id, quantity in sorted(quantities.items())
+            if quantity > (available.get(variation_id) or 0)
+        ]
+        if errors:
+            raise SalesLineError(errors)
+
+
+sales_service = SalesService()
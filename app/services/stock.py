@@ -1,10 +1,13 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, select, insert, update
 from typing import List, Optional
 from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+import uuid
 from app.models.stock import StockLedger, InventoryCount, ChangeType
 from app.models.product import ProductVariation
 from app.schemas.stock import StockLedgerCreate, InventoryCountCreate
+from app.services.cost_layers import fifo_cost_service
 from app.utils.sku import generate_sku
 
 
@@ -12,49 +15,109 @@ class StockService:
     def create_stock_entry(
         self,
         db: Session,
-        product_variation_id: str,
+        product_variation_id: int,
         change_type: ChangeType,
         quantity_change: int,
         source_type: Optional[str] = None,
         source_id: Optional[str] = None,
-        user_id: str = "system",
-        notes: Optional[str] = None
+        user_id: int = None,
+        notes: Optional[str] = None,
+        unit_cost: Optional[Decimal] = None
     ) -> StockLedger:
         """Create a stock ledger entry and update current stock"""
+        ledger_ids = self.create_stock_entries(
+            db,
+            [StockLedgerCreate(
+                product_variation_id=product_variation_id,
+                change_type=change_type,
+                source_type=source_type,
+                source_id=source_id,
+                quantity_change=quantity_change,
+                notes=notes,
+                unit_cost=unit_cost
+            )],
+            user_id=user_id
+        )
         
-        # Get current stock
-        variation = db.query(ProductVariation).filter(
-            ProductVariation.id == product_variation_id
-        ).first()
+        db.commit()
         
-        if not variation:
-            raise ValueError(f"Product variation {product_variation_id} not found")
+        return db.get(StockLedger, ledger_ids[0])
+    
+    def create_stock_entries(
+        self,
+        db: Session,
+        entries: List[StockLedgerCreate],
+        user_id: int
+    ) -> List[str]:
+        """
+        Write many stock ledger entries and update current stock in one batch.
         
-        current_stock = variation.current_stock
-        new_balance = current_stock + quantity_change
+        All affected variations are locked with a single SELECT ... FOR UPDATE
+        (in id order, to avoid deadlocks), running balances are computed in
+        entry order, ledger rows are inserted with one executemany and
+        current_stock is updated with one bulk UPDATE. FIFO cost layers are
+        opened and consumed for the whole batch at once. The caller commits.
         
-        # Create stock ledger entry
-        ledger_entry = StockLedger(
-            product_variation_id=product_variation_id,
-            change_type=change_type,
-            source_type=source_type,
-            source_id=source_id,
-            quantity_change=quantity_change,
-            running_balance=new_balance,
-            user_id=user_id,
-            notes=notes
-        )
+        Returns the ledger entry ids in entry order.
+        """
+        if not entries:
+            return []
         
-        db.add(ledger_entry)
+        variation_ids = sorted({entry.product_variation_id for entry in entries})
+        balances = {}
+        fallback_costs = {}
+        for id, current_stock, average_cost, purchase_price in db.execute(
+            select(
+                ProductVariation.id,
+                ProductVariation.current_stock,
+                ProductVariation.average_cost,
+                ProductVariation.purchase_price
+            )
+            .where(ProductVariation.id.in_(variation_ids))
+            .order_by(ProductVariation.id)
+            .with_for_update()
+        ):
+            balances[id] = current_stock
+            fallback_costs[id] = average_cost if average_cost is not None else purchase_price
         
-        # Update current stock
-        variation.current_stock = new_balance
-        db.add(variation)
+        missing = [str(id) for id in variation_ids if id not in balances]
+        if missing:
+            raise ValueError(f"Product variation(s) not found: {', '.join(missing)}")
         
-        db.commit()
-        db.refresh(ledger_entry)
+        # Distinct, ordered timestamps (taken after the row locks) so the
+        # ledger can be replayed in entry order
+        now = datetime.now(timezone.utc)
+        
+        ledger_rows = []
+        for index, entry in enumerate(entries):
+            balances[entry.product_variation_id] = (
+                (balances[entry.product_variation_id] or 0) + entry.quantity_change
+            )
+            ledger_rows.append({
+                "id": str(uuid.uuid4()),
+                "product_variation_id": entry.product_variation_id,
+                "change_type": entry.change_type,
+                "source_type": entry.source_type,
+                "source_id": entry.source_id,
+                "quantity_change": entry.quantity_change,
+                "running_balance": balances[entry.product_variation_id],
+                "unit_cost": entry.unit_cost,
+                "timestamp": now + timedelta(microseconds=index),
+                "user_id": user_id,
+                "notes": entry.notes
+            })
+        
+        # Open FIFO layers for inbound rows and consume them for outbound rows
+        layer_plan = fifo_cost_service.plan(db, ledger_rows, fallback_costs)
+        
+        db.execute(insert(StockLedger), ledger_rows)
+        fifo_cost_service.write(db, layer_plan)
+        db.execute(
+            update(ProductVariation),
+            [{"id": id, "current_stock": balance} for id, balance in balances.items()]
+        )
         
-        return ledger_entry
+        return [row["id"] for row in ledger_rows]
     
     def get_stock_ledger(
         self,
@@ -99,6 +162,7 @@ class StockService:
         summary = []
         for variation in variations:
             total_value = float(variation.current_stock * variation.selling_price)
+            unit_cost = variation.average_cost if variation.average_cost is not None else variation.purchase_price
             is_low_stock = variation.current_stock <= low_stock_threshold
             
             summary.append({
@@ -107,9 +171,12 @@ class StockService:
                 "color_name": variation.color.name,
                 "sku": variation.sku,
                 "current_stock": variation.current_stock,
+                "reserved_stock": variation.reserved_stock,
                 "selling_price": float(variation.selling_price),
                 "purchase_price": float(variation.purchase_price) if variation.purchase_price else None,
+                "average_cost": float(variation.average_cost) if variation.average_cost is not None else None,
                 "total_value": total_value,
+                "cost_value": float(variation.current_stock * unit_cost) if unit_cost is not None else None,
                 "is_low_stock": is_low_stock
             })
         
@@ -1,8 +1,15 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional
+from sqlalchemy import and_, or_, func, select, update, delete, case
+from typing import Dict, List, Optional
 from app.models.supplier import Supplier, SupplierType
-from app.schemas.supplier import SupplierCreate, SupplierUpdate
+from app.models.supplier_stats import SupplierStats
+from app.models.product import Product
+from app.models.purchase import Purchase
+from app.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierMergeItem
+from app.services.supplier_directory import supplier_directory
+from app.services.supplier_stats import supplier_stats_service
+from app.services.payables import payables_service
+from app.utils.normalize import normalize_name, normalize_phone, normalize_email
 
 
 class SupplierService:
@@ -12,6 +19,7 @@ class SupplierService:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        supplier_directory.invalidate()
         return db_obj
     
     def get(self, db: Session, id: int) -> Optional[Supplier]:
@@ -24,9 +32,10 @@ class SupplierService:
         skip: int = 0, 
         limit: int = 100,
         supplier_type: Optional[SupplierType] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        search: Optional[str] = None
     ) -> List[Supplier]:
-        """Get multiple suppliers with optional filtering"""
+        """Get multiple suppliers with optional filtering and partial-match search"""
         query = db.query(Supplier)
         
         if supplier_type is not None:
@@ -35,6 +44,29 @@ class SupplierService:
         if is_active is not None:
             query = query.filter(Supplier.is_active == is_active)
         
+        search = search.strip() if search else None
+        if search:
+            columns = (
+                Supplier.name,
+                Supplier.contact_person,
+                Supplier.phone_number,
+                Supplier.whatsapp_number
+            )
+            # ILIKE '%term%' is served by the pg_trgm GIN indexes on PostgreSQL
+            # and falls back to a scan elsewhere (SQLite)
+            query = query.filter(
+                or_(*(column.icontains(search, autoescape=True) for column in columns))
+            )
+            
+            if db.get_bind().dialect.name == "postgresql":
+                # Best trigram match first
+                query = query.order_by(
+                    func.greatest(*(func.similarity(column, search) for column in columns)).desc(),
+                    Supplier.id
+                )
+            else:
+                query = query.order_by(Supplier.name, Supplier.id)
+        
         return query.offset(skip).limit(limit).all()
     
     def get_by_type(
@@ -62,6 +94,7 @@ class SupplierService:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        supplier_directory.invalidate()
         return db_obj
     
     def delete(self, db: Session, id: int) -> Optional[Supplier]:
@@ -72,15 +105,177 @@ class SupplierService:
             db.add(db_obj)
             db.commit()
             db.refresh(db_obj)
+            supplier_directory.invalidate()
         return db_obj
     
     def hard_delete(self, db: Session, id: int) -> Optional[Supplier]:
         """Permanently delete a supplier"""
         db_obj = db.query(Supplier).filter(Supplier.id == id).first()
         if db_obj:
+            db.execute(delete(SupplierStats).where(SupplierStats.supplier_id == id))
             db.delete(db_obj)
             db.commit()
+            supplier_directory.invalidate()
         return db_obj
+    
+    def find_duplicates(
+        self,
+        db: Session,
+        name: Optional[str] = None,
+        phone_number: Optional[str] = None,
+        whatsapp_number: Optional[str] = None,
+        email_address: Optional[str] = None,
+        exclude_id: Optional[int] = None
+    ) -> List[dict]:
+        """Find active suppliers sharing a normalized name, phone or email key"""
+        name_key = normalize_name(name)
+        phone_keys = {normalize_phone(phone_number), normalize_phone(whatsapp_number)} - {None}
+        email_key = normalize_email(email_address)
+        
+        conditions = []
+        if name_key:
+            conditions.append(Supplier.name_key == name_key)
+        if phone_keys:
+            conditions.append(Supplier.phone_key.in_(phone_keys))
+            conditions.append(Supplier.whatsapp_key.in_(phone_keys))
+        if email_key:
+            conditions.append(Supplier.email_key == email_key)
+        if not conditions:
+            return []
+        
+        query = db.query(Supplier).filter(Supplier.is_active.is_(True), or_(*conditions))
+        if exclude_id is not None:
+            query = query.filter(Supplier.id != exclude_id)
+        
+        matches = []
+        for supplier in query.order_by(Supplier.id):
+            matched_on = []
+            if name_key and supplier.name_key == name_key:
+                matched_on.append("name")
+            if phone_keys & {supplier.phone_key, supplier.whatsapp_key}:
+                matched_on.append("phone")
+            if email_key and supplier.email_key == email_key:
+                matched_on.append("email")
+            matches.append({
+                "id": supplier.id,
+                "name": supplier.name,
+                "supplier_type": supplier.supplier_type,
+                "contact_person": supplier.contact_person,
+                "phone_number": supplier.phone_number,
+                "whatsapp_number": supplier.whatsapp_number,
+                "email_address": supplier.email_address,
+                "is_active": supplier.is_active,
+                "matched_on": matched_on
+            })
+        
+        # Strongest matches first
+        matches.sort(key=lambda match: -len(match["matched_on"]))
+        return matches
+    
+    def rebuild_dedupe_keys(self, db: Session, batch_size: int = 1000) -> int:
+        """
+        Recompute the normalized duplicate-detection keys of every supplier.
+        
+        The keys are kept in sync by the Supplier validators on write, so this
+        is needed once for suppliers created before the keys existed (and
+        after changing the normalization rules). Rows are read as a stream of
+        projections and updated in bulk by primary key, one batch at a time.
+        The caller commits. Returns the number of suppliers updated.
+        """
+        updated = 0
+        batch = []
+        rows = db.execute(
+            select(
+                Supplier.id,
+                Supplier.name,
+                Supplier.phone_number,
+                Supplier.whatsapp_number,
+                Supplier.email_address
+            )
+            .order_by(Supplier.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in rows:
+            batch.append({
+                "id": row.id,
+                "name_key": normalize_name(row.name),
+                "phone_key": normalize_phone(row.phone_number),
+                "whatsapp_key": normalize_phone(row.whatsapp_number),
+                "email_key": normalize_email(row.email_address)
+            })
+            if len(batch) >= batch_size:
+                updated += self._write_dedupe_keys(db, batch)
+                batch = []
+        if batch:
+            updated += self._write_dedupe_keys(db, batch)
+        return updated
+    
+    def _write_dedupe_keys(self, db: Session, batch: List[dict]) -> int:
+        db.execute(update(Supplier), batch)
+        return len(batch)
+    
+    def merge(self, db: Session, merges: List[SupplierMergeItem]) -> dict:
+        """
+        Merge duplicate suppliers into their targets
+        
+        Purchases and products of every source supplier are re-pointed with one
+        UPDATE per table, sources are deactivated and target rollups rebuilt.
+        """
+        target_by_source: Dict[int, int] = {}
+        for item in merges:
+            for source_id in item.source_ids:
+                if source_id == item.target_id:
+                    raise ValueError(f"Supplier {source_id} cannot be merged into itself")
+                if source_id in target_by_source:
+                    raise ValueError(f"Supplier {source_id} appears in more than one merge")
+                target_by_source[source_id] = item.target_id
+        
+        target_ids = {item.target_id for item in merges}
+        chained = target_ids & set(target_by_source)
+        if chained:
+            raise ValueError(
+                f"Suppliers cannot be both merge source and target: {', '.join(map(str, sorted(chained)))}"
+            )
+        
+        supplier_ids = target_ids | set(target_by_source)
+        existing = set(db.scalars(select(Supplier.id).where(Supplier.id.in_(supplier_ids))))
+        missing = supplier_ids - existing
+        if missing:
+            raise ValueError(f"Suppliers not found: {', '.join(map(str, sorted(missing)))}")
+        
+        source_ids = list(target_by_source)
+        purchases_repointed = db.execute(
+            update(Purchase)
+            .where(Purchase.supplier_id.in_(source_ids))
+            .values(supplier_id=case(target_by_source, value=Purchase.supplier_id)),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        products_repointed = db.execute(
+            update(Product)
+            .where(Product.supplier_id.in_(source_ids))
+            .values(supplier_id=case(target_by_source, value=Product.supplier_id)),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        db.execute(
+            update(Supplier)
+            .where(Supplier.id.in_(source_ids))
+            .values(is_active=False),
+            execution_options={"synchronize_session": False}
+        )
+        
+        db.execute(delete(SupplierStats).where(SupplierStats.supplier_id.in_(source_ids)))
+        supplier_stats_service.rebuild(db, sorted(target_ids))
+        
+        db.commit()
+        db.expire_all()
+        supplier_directory.invalidate()
+        payables_service.invalidate()
+        
+        return {
+            "suppliers_merged": len(source_ids),
+            "purchases_repointed": purchases_repointed,
+            "products_repointed": products_repointed
+        }
 
 
 supplier_service = SupplierService()
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.supplier import Supplier, SupplierType
+from app.schemas.supplier import SupplierListResponse
+
+
+class SupplierDirectory:
+    """
+    Process-local cache of the supplier dropdown lists.
+    
+    Lists are projection-only (SupplierListResponse fields), keyed by supplier
+    type and active flag, and kept both as dicts and as pre-serialized JSON.
+    SupplierService writes bump the version, and entries built for an older
+    version are rebuilt on next read. Entries also expire after
+    SUPPLIER_DIRECTORY_TTL_SECONDS so other worker processes catch up.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        # (supplier_type, is_active) -> (version, built_at, rows, body)
+        self._entries: Dict[Tuple[Optional[SupplierType], bool], tuple] = {}
+    
+    def invalidate(self) -> None:
+        """Mark all supplier lists as changed"""
+        with self._lock:
+            self._version += 1
+    
+    def version(self) -> int:
+        """Get the current supplier directory version"""
+        with self._lock:
+            return self._version
+    
+    def get_list(
+        self,
+        db: Session,
+        supplier_type: Optional[SupplierType] = None,
+        is_active: bool = True
+    ) -> List[dict]:
+        """Get a supplier dropdown list as dicts"""
+        return self._get_entry(db, supplier_type, is_active)[2]
+    
+    def get_json(
+        self,
+        db: Session,
+        supplier_type: Optional[SupplierType] = None,
+        is_active: bool = True
+    ) -> bytes:
+        """Get a supplier dropdown list as pre-serialized JSON"""
+        return self._get_entry(db, supplier_type, is_active)[3]
+    
+    def _get_entry(self, db: Session, supplier_type: Optional[SupplierType], is_active: bool) -> tuple:
+        """Return a fresh cache entry, rebuilding it if needed"""
+        key = (supplier_type, is_active)
+        with self._lock:
+            version = self._version
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry[0] == version
+                and time.monotonic() - entry[1] < settings.SUPPLIER_DIRECTORY_TTL_SECONDS
+            ):
+                return entry
+        
+        query = db.query(
+            Supplier.id,
+            Supplier.name,
+            Supplier.supplier_type,
+            Supplier.contact_person,
+            Supplier.phone_number,
+            Supplier.is_active
+        ).filter(Supplier.is_active == is_active)
+        
+        if supplier_type is not None:
+            query = query.filter(Supplier.supplier_type == supplier_type)
+        
+        rows = [
+            SupplierListResponse.model_validate(supplier).model_dump(mode="json")
+            for supplier in query.order_by(Supplier.name, Supplier.id)
+        ]
+        entry = (version, time.monotonic(), rows, json.dumps(rows, separators=(",", ":")).encode("utf-8"))
+        
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+
+supplier_directory = SupplierDirectory()
@@ -0,0 +1,222 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, case, or_
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+from app.models.supplier import Supplier
+from app.models.supplier_stats import SupplierStats
+from app.models.purchase import Purchase, PurchaseDetail, PaymentHistory
+from app.models.return_workflow import PurchaseReturn
+from app.utils.sql import dialect_insert, date_diff_days
+
+
+class SupplierStatsService:
+    """
+    Maintains the supplier_stats rollup.
+    
+    Purchase, payment and return writes call apply() with deltas, which are
+    added in place with a single UPDATE in the caller's transaction. Missing
+    rows are built from the source tables and inserted without overwriting a
+    row another transaction created meanwhile; rebuild() recomputes rows
+    after changes that cannot be expressed as a delta (e.g. deleting a
+    purchase).
+    """
+    
+    COUNTERS = (
+        "purchase_count",
+        "total_purchased",
+        "total_paid",
+        "quantity_purchased",
+        "quantity_returned",
+        "received_count",
+        "lead_time_days_total",
+    )
+    
+    def apply(
+        self,
+        db: Session,
+        supplier_id: int,
+        last_purchase_date: Optional[datetime] = None,
+        **deltas
+    ) -> None:
+        """Add counter deltas to a supplier's rollup (does not commit)"""
+        unknown = set(deltas) - set(self.COUNTERS)
+        if unknown:
+            raise ValueError(f"Unknown supplier stats counters: {', '.join(sorted(unknown))}")
+        
+        values = {
+            name: getattr(SupplierStats, name) + delta
+            for name, delta in deltas.items() if delta
+        }
+        if last_purchase_date is not None:
+            values["last_purchase_date"] = case(
+                (
+                    or_(
+                        SupplierStats.last_purchase_date.is_(None),
+                        SupplierStats.last_purchase_date < last_purchase_date
+                    ),
+                    last_purchase_date
+                ),
+                else_=SupplierStats.last_purchase_date
+            )
+        if not values:
+            return
+        
+        result = db.execute(
+            update(SupplierStats)
+            .where(SupplierStats.supplier_id == supplier_id)
+            .values(**values, updated_at=func.now()),
+            execution_options={"synchronize_session": False}
+        )
+        if result.rowcount == 0 and not self._create_missing(db, supplier_id):
+            # Another transaction created the rollup first (its build did not
+            # see our pending change), so add our deltas to it
+            db.execute(
+                update(SupplierStats)
+                .where(SupplierStats.supplier_id == supplier_id)
+                .values(**values, updated_at=func.now()),
+                execution_options={"synchronize_session": False}
+            )
+    
+    def rebuild(self, db: Session, supplier_ids: Optional[List[int]] = None) -> int:
+        """Recompute rollups from purchases, payments and returns (does not commit)"""
+        rows = self._compute(db, supplier_ids)
+        if not rows:
+            return 0
+        
+        insert_stmt = dialect_insert(db, SupplierStats).values(rows)
+        db.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[SupplierStats.supplier_id],
+                set_={
+                    **{name: getattr(insert_stmt.excluded, name) for name in self.COUNTERS},
+                    "last_purchase_date": insert_stmt.excluded.last_purchase_date,
+                    "updated_at": func.now()
+                }
+            )
+        )
+        return len(rows)
+    
+    def _create_missing(self, db: Session, supplier_id: int) -> bool:
+        """
+        Build a missing rollup from the source tables, unless another
+        transaction creates it first (ON CONFLICT DO NOTHING)
+        
+        The build includes the caller's pending (flushed) changes. Returns
+        whether the row was inserted.
+        """
+        rows = self._compute(db, [supplier_id])
+        return db.execute(
+            dialect_insert(db, SupplierStats).values(rows).on_conflict_do_nothing(
+                index_elements=[SupplierStats.supplier_id]
+            )
+        ).rowcount > 0
+    
+    def _compute(self, db: Session, supplier_ids: Optional[List[int]] = None) -> List[dict]:
+        """Compute rollup rows from purchases, payments and returns"""
+        db.flush()
+        
+        requested_ids = supplier_ids
+        
+        def scoped(query, column):
+            return query.where(column.in_(requested_ids)) if requested_ids is not None else query
+        
+        if supplier_ids is None:
+            supplier_ids = list(db.scalars(select(Supplier.id)))
+        if not supplier_ids:
+            return []
+        
+        rows = {
+            supplier_id: {
+                "supplier_id": supplier_id,
+                **{name: 0 for name in self.COUNTERS},
+                "last_purchase_date": None
+            }
+            for supplier_id in supplier_ids
+        }
+        
+        received_with_eta = (Purchase.received_at.isnot(None)) & (Purchase.expected_arrival_date.isnot(None))
+        purchase_totals = scoped(
+            select(
+                Purchase.supplier_id,
+                func.count(Purchase.id),
+                func.coalesce(func.sum(Purchase.total_price), 0),
+                func.max(Purchase.purchase_date),
+                func.count(case((received_with_eta, Purchase.id))),
+                func.coalesce(func.sum(case(
+                    (received_with_eta, date_diff_days(db, Purchase.received_at, Purchase.expected_arrival_date))
+                )), 0)
+            ).group_by(Purchase.supplier_id),
+            Purchase.supplier_id
+        )
+        for supplier_id, count, total, last_date, received, lead_days in db.execute(purchase_totals):
+            rows[supplier_id].update(
+                purchase_count=count,
+                total_purchased=total,
+                last_purchase_date=last_date,
+                received_count=received,
+                lead_time_days_total=lead_days
+            )
+        
+        paid_totals = scoped(
+            select(Purchase.supplier_id, func.sum(PaymentHistory.amount_paid))
+            .join(PaymentHistory, PaymentHistory.purchase_id == Purchase.id)
+            .group_by(Purchase.supplier_id),
+            Purchase.supplier_id
+        )
+        for supplier_id, paid in db.execute(paid_totals):
+            rows[supplier_id]["total_paid"] = paid or 0
+        
+        quantity_totals = scoped(
+            select(Purchase.supplier_id, func.sum(PurchaseDetail.quantity))
+            .join(PurchaseDetail, PurchaseDetail.purchase_id == Purchase.id)
+            .group_by(Purchase.supplier_id),
+            Purchase.supplier_id
+        )
+        for supplier_id, quantity in db.execute(quantity_totals):
+            rows[supplier_id]["quantity_purchased"] = quantity or 0
+        
+        return_totals = scoped(
+            select(Purchase.supplier_id, func.sum(PurchaseReturn.quantity_returned))
+            .join(PurchaseDetail, PurchaseDetail.purchase_id == Purchase.id)
+            .join(PurchaseReturn, PurchaseReturn.purchase_detail_id == PurchaseDetail.id)
+            .group_by(Purchase.supplier_id),
+            Purchase.supplier_id
+        )
+        for supplier_id, quantity in db.execute(return_totals):
+            rows[supplier_id]["quantity_returned"] = quantity or 0
+        
+        return list(rows.values())
+    
+    def get_stats(self, db: Session, supplier_id: int) -> dict:
+        """Get a supplier's rollup with derived figures, building it on first access"""
+        stats = db.get(SupplierStats, supplier_id)
+        if stats is None:
+            self._create_missing(db, supplier_id)
+            db.commit()
+            stats = db.get(SupplierStats, supplier_id)
+        
+        total_purchased = Decimal(stats.total_purchased or 0)
+        total_paid = Decimal(stats.total_paid or 0)
+        return {
+            "supplier_id": supplier_id,
+            "purchase_count": stats.purchase_count,
+            "total_purchased": total_purchased,
+            "total_paid": total_paid,
+            "outstanding_balance": total_purchased - total_paid,
+            "average_lead_time_days": (
+                round(stats.lead_time_days_total / stats.received_count, 2)
+                if stats.received_count else None
+            ),
+            "quantity_purchased": stats.quantity_purchased,
+            "quantity_returned": stats.quantity_returned,
+            "return_rate": (
+                round(stats.quantity_returned / stats.quantity_purchased, 4)
+                if stats.quantity_purchased else 0.0
+            ),
+            "last_purchase_date": stats.last_purchase_date,
+            "updated_at": stats.updated_at
+        }
+
+
+supplier_stats_service = SupplierStatsService()
@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, or_
+from app.core.config import settings
+from app.models.product import Product, ProductVariation
+from app.models.product_attributes import ProductColor
+from app.schemas.product import VariationLookupResponse
+from app.services.attribute_cache import attribute_cache
+
+
+class VariationLookupCache:
+    """
+    Process-local code -> variation cache for point-of-sale scans.
+    
+    Codes are matched against the barcode first, then the SKU, and each hit
+    is kept as pre-serialized JSON in an LRU map of up to
+    VARIATION_LOOKUP_MAX_ENTRIES codes. ProductService writes bump the version
+    (as do color changes, through the attribute cache version), so stale
+    entries are rebuilt on next read; entries also expire after
+    VARIATION_LOOKUP_TTL_SECONDS so other worker processes catch up. Stock
+    levels are not cached.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        # code -> (version, color_version, loaded_at, body)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def invalidate(self) -> None:
+        """Mark all cached variations as changed"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+    
+    def get_json(self, db: Session, code: str) -> Optional[bytes]:
+        """Resolve a barcode or SKU to a variation as JSON, or None if unknown"""
+        code = code.strip()
+        versions = self._versions()
+        with self._lock:
+            entry = self._entries.get(code)
+            if (
+                entry is not None
+                and entry[:2] == versions
+                and time.monotonic() - entry[2] < settings.VARIATION_LOOKUP_TTL_SECONDS
+            ):
+                self._entries.move_to_end(code)
+                return entry[3]
+        
+        row = db.execute(
+            select(
+                ProductVariation.id,
+                ProductVariation.product_id,
+                Product.name.label("product_name"),
+                ProductVariation.sku,
+                ProductVariation.barcode,
+                ProductVariation.color_id,
+                ProductVariation.selling_price,
+                ProductVariation.is_active
+            )
+            .join(Product, Product.id == ProductVariation.product_id)
+            .where(or_(ProductVariation.barcode == code, ProductVariation.sku == code))
+            .order_by((ProductVariation.barcode == code).desc(), ProductVariation.id)
+            .limit(1)
+        ).first()
+        if row is None:
+            return None
+        
+        color = attribute_cache.get(db, ProductColor, row.color_id)
+        body = json.dumps(
+            VariationLookupResponse(
+                **row._asdict(), color_name=color["name"] if color else None
+            ).model_dump(mode="json"),
+            separators=(",", ":")
+        ).encode("utf-8")
+        
+        with self._lock:
+            self._entries[code] = (*versions, time.monotonic(), body)
+            self._entries.move_to_end(code)
+            while len(self._entries) > settings.VARIATION_LOOKUP_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+        return body
+    
+    def _versions(self) -> Tuple[int, int]:
+        with self._lock:
+            version = self._version
+        return version, attribute_cache.version(ProductColor)
+
+
+variation_lookup = VariationLookupCache()
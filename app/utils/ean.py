@@ -0,0 +1,81 @@
+from operator import add
+from typing import List, Optional, Sequence
+
+# Weighted value of each ASCII digit, indexed by byte value (b"0" is 48)
+_WEIGHTED_DIGITS = {
+    weight: [0] * ord("0") + [digit * weight for digit in range(10)]
+    for weight in (1, 3)
+}
+
+
+def ean13_check_digit(body: str) -> int:
+    """
+    Compute the EAN-13 check digit for the first 12 digits of a code
+
+    Args:
+        body: The 12-digit code body
+
+    Returns:
+        The check digit (0-9)
+    """
+    if len(body) != 12 or not body.isdigit():
+        raise ValueError("EAN-13 body must be exactly 12 digits")
+
+    total = sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(body))
+    return (10 - total % 10) % 10
+
+
+def build_ean13(prefix: str, item_reference: int) -> str:
+    """
+    Build an EAN-13 code from a prefix and an item reference
+
+    Args:
+        prefix: The leading digits of the code range
+        item_reference: The number within the range, zero-padded to fill 12 digits
+
+    Returns:
+        The full 13-digit code including its check digit
+    """
+    width = 12 - len(prefix)
+    if item_reference < 0 or item_reference >= 10 ** width:
+        raise ValueError(f"Item reference {item_reference} is outside the {prefix} range")
+
+    body = f"{prefix}{item_reference:0{width}d}"
+    return f"{body}{ean13_check_digit(body)}"
+
+
+def validate_ean13_batch(codes: Sequence[Optional[str]]) -> List[bool]:
+    """
+    Check many EAN-13 codes at once
+
+    The codes are processed column by column: each of the 13 digit positions
+    is mapped through a weighted lookup table and summed across the whole
+    batch with map(), so the per-digit work runs in C rather than in a Python
+    loop per code.
+
+    Args:
+        codes: The codes to check (None and malformed values are invalid)
+
+    Returns:
+        One flag per code, True where the code is a well-formed EAN-13
+    """
+    results = [False] * len(codes)
+    positions = [
+        index for index, code in enumerate(codes)
+        if code is not None and len(code) == 13 and code.isascii() and code.isdigit()
+    ]
+    if not positions:
+        return results
+
+    candidates = [codes[index].encode("ascii") for index in positions]
+
+    # Weighted sum over all 13 digits; the check digit has weight 1, so a valid
+    # code sums to a multiple of 10
+    totals = [0] * len(candidates)
+    for column, digits in enumerate(zip(*candidates)):
+        weights = _WEIGHTED_DIGITS[3 if column % 2 else 1]
+        totals = list(map(add, totals, map(weights.__getitem__, digits)))
+
+    for index, total in zip(positions, totals):
+        results[index] = total % 10 == 0
+    return results
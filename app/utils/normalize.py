@@ -0,0 +1,58 @@
+import re
+from typing import Optional
+from app.utils.slug import generate_slug
+
+# Legal-form and filler words ignored when comparing supplier names
+NAME_STOPWORDS = {"ltd", "limited", "co", "company", "inc", "pvt", "private", "corp", "the"}
+
+# Phone numbers are compared on their last digits, so "+880 1711-000111"
+# and "01711000111" produce the same key
+PHONE_KEY_DIGITS = 10
+
+
+def normalize_name(name: Optional[str]) -> Optional[str]:
+    """
+    Build a comparison key from a supplier name
+    
+    Args:
+        name: The supplier name
+    
+    Returns:
+        Lowercase, accent- and punctuation-free words without legal-form
+        suffixes, joined by single spaces; None for empty input
+    """
+    words = [
+        word for word in generate_slug(name or "", max_length=200).replace("_", "-").split("-")
+        if word and word not in NAME_STOPWORDS
+    ]
+    return " ".join(words) or None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Build a comparison key from a phone number
+    
+    Args:
+        phone: The phone number in any formatting
+    
+    Returns:
+        The last PHONE_KEY_DIGITS digits; None if the number has fewer than 6 digits
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) < 6:
+        return None
+    return digits[-PHONE_KEY_DIGITS:]
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """
+    Build a comparison key from an email address
+    
+    Args:
+        email: The email address
+    
+    Returns:
+        The trimmed, lowercased address; None for empty input
+    """
+    email = (email or "").strip().lower()
+    return email or None
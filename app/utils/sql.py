@@ -0,0 +1,73 @@
+from typing import Callable, TypeVar
+from sqlalchemy import Date, Integer, cast, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+T = TypeVar("T")
+
+
+def dialect_insert(db: Session, model):
+    """
+    Build an INSERT construct for the session's database dialect
+    
+    Used where ON CONFLICT clauses are needed: PostgreSQL in production and
+    SQLite for local tooling both support them, through dialect-specific
+    insert() constructs.
+    
+    Args:
+        db: The database session
+        model: The model (or table) to insert into
+    
+    Returns:
+        A dialect-specific Insert supporting on_conflict_do_update/do_nothing
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def date_diff_days(db: Session, later, earlier):
+    """
+    Build a SQL expression for the whole days between two date/datetime columns
+    
+    Args:
+        db: The database session
+        later: The later date or datetime expression
+        earlier: The earlier date or datetime expression
+    
+    Returns:
+        An integer expression of (date(later) - date(earlier)) in days
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return cast(
+            func.julianday(func.date(later)) - func.julianday(func.date(earlier)),
+            Integer
+        )
+    return cast(later, Date) - cast(earlier, Date)
+
+
+def insert_with_fresh_keys(db: Session, insert_rows: Callable[[], T], attempts: int = 3) -> T:
+    """
+    Run an insert carrying newly allocated unique keys (slugs, SKUs) in a savepoint
+    
+    Keys are allocated by reading the taken ones first, so a concurrent
+    insert can claim the same key before this one lands. The unique index
+    then rejects the insert; the savepoint is rolled back and insert_rows is
+    called again, allocating its keys afresh.
+    
+    Args:
+        db: The database session
+        insert_rows: Allocates the keys and runs the insert; returns its result
+        attempts: How many times to try before letting the IntegrityError through
+    
+    Returns:
+        The result of the successful insert_rows call
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            with db.begin_nested():
+                return insert_rows()
+        except IntegrityError:
+            if attempt == attempts:
+                raise
@@ -238,7 +238,10 @@ def create_sample_data():
                     product_id=product.id,
                     color_id=color.id,
                     sku=sku,
-                    stock_quantity=stock
+                    selling_price=product.selling_price,
+                    purchase_price=product.purchase_price,
+                    initial_stock=stock,
+                    current_stock=stock
                 )
                 db.add(variation)
         
@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import uvicorn
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, SessionLocal
+from app.services.attribute_cache import attribute_cache
+from app.services.idempotency import idempotency_service
+from app.services.reservation import reservation_service
 from app.api.v1.api import api_router
 
 
@@ -12,9 +16,20 @@ from app.api.v1.api import api_router
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    db = SessionLocal()
+    try:
+        attribute_cache.load(db)
+        idempotency_service.purge_expired(db)
+    finally:
+        db.close()
+    sweeper = asyncio.create_task(
+        reservation_service.run_sweeper(settings.STOCK_RESERVATION_SWEEP_SECONDS)
+    )
     yield
     # Shutdown
-    pass
+    sweeper.cancel()
+    with suppress(asyncio.CancelledError):
+        await sweeper
 
 
 app = FastAPI(
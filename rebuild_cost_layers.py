@@ -0,0 +1,28 @@
+"""
+Cost layer rebuild script
+Replays the stock ledger to rebuild FIFO cost layers
+"""
+import sys
+from app.core.database import SessionLocal
+from app.services.cost_layers import fifo_cost_service
+
+
+def rebuild_cost_layers(variation_ids=None):
+    """Rebuild cost layers for the given variations (all when None)"""
+    db = SessionLocal()
+    
+    try:
+        result = fifo_cost_service.rebuild(db, variation_ids)
+        db.commit()
+        print(f"Created {result['layers_created']} cost layers")
+        print(f"Costed {result['ledger_entries_costed']} ledger entries")
+    except Exception as e:
+        print(f"Error rebuilding cost layers: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    ids = [int(arg) for arg in sys.argv[1:]] or None
+    rebuild_cost_layers(ids)
@@ -0,0 +1,28 @@
+"""
+Purchase return counter backfill script
+Recomputes purchase_details.quantity_returned_total from the existing
+purchase returns. Run once after upgrading, since returns recorded
+before the counter existed are otherwise not counted and their lines
+could be over-returned.
+"""
+from app.core.database import SessionLocal
+from app.services.purchase_return import return_service
+
+
+def rebuild_returned_quantities():
+    """Recompute the returned-quantity counter of all purchase lines"""
+    db = SessionLocal()
+    
+    try:
+        updated = return_service.rebuild_returned_quantities(db)
+        db.commit()
+        print(f"Recomputed returned quantities for {updated} purchase lines")
+    except Exception as e:
+        print(f"Error rebuilding returned quantities: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_returned_quantities()
@@ -0,0 +1,27 @@
+"""
+Supplier dedupe key backfill script
+Recomputes the normalized name/phone/whatsapp/email keys used for
+duplicate detection. Run once after upgrading, since suppliers created
+before the keys existed have none and are never matched as duplicates.
+"""
+from app.core.database import SessionLocal
+from app.services.supplier import supplier_service
+
+
+def rebuild_supplier_keys():
+    """Recompute the dedupe keys of all suppliers"""
+    db = SessionLocal()
+    
+    try:
+        updated = supplier_service.rebuild_dedupe_keys(db)
+        db.commit()
+        print(f"Updated dedupe keys for {updated} suppliers")
+    except Exception as e:
+        print(f"Error rebuilding supplier keys: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_supplier_keys()
@@ -0,0 +1,139 @@
+"""
+Shared test fixtures
+Each test gets a fresh in-memory SQLite database with a small seeded catalog
+and, when needed, an API client whose sessions and user point at it
+"""
+from decimal import Decimal
+from typing import Optional
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, get_db
+from app.models import (  # noqa: F401 - register every table on Base.metadata
+    user, product_attributes, supplier, product, purchase, return_workflow, sales, stock,
+    price_history, supplier_stats, idempotency, cost_layer
+)
+from app.models.product import Product, ProductVariation, OwnershipStatus
+from app.models.product_attributes import (
+    ProductCategory, ProductMaterial, ProductStyle, ProductBrand, ProductColor, CountryOfOrigin
+)
+from app.models.stock import ChangeType
+from app.models.supplier import Supplier, SupplierType
+from app.models.user import User, UserRole
+from app.schemas.stock import StockLedgerCreate
+from app.services.attribute_cache import attribute_cache, ATTRIBUTE_MODELS
+from app.services.auth import get_current_user
+from app.services.payables import payables_service
+from app.services.stock import stock_service
+from app.services.supplier_directory import supplier_directory
+from app.services.variation_lookup import variation_lookup
+from main import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """Drop process-local caches filled by earlier tests' databases"""
+    for model in ATTRIBUTE_MODELS:
+        attribute_cache.invalidate(model)
+    supplier_directory.invalidate()
+    variation_lookup.invalidate()
+    payables_service.invalidate()
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    """
+    A session on a seeded database
+
+    One admin user, one row of each attribute (colors Black, Red and Blue),
+    one supplier, and three products (selling at 100, 101 and 102, bought at
+    50) with a Black and a Red variation each: variations 1-2 belong to
+    product 1, 3-4 to product 2 and 5-6 to product 3. Nothing is in stock.
+    """
+    session = session_factory()
+    session.add(User(username="admin", password_hash="x", role=UserRole.ADMIN))
+    for model in (ProductCategory, ProductMaterial, ProductStyle, ProductBrand, CountryOfOrigin):
+        session.add(model(name=f"Default {model.__name__}", slug=f"default-{model.__name__.lower()}"))
+    for name in ("Black", "Red", "Blue"):
+        session.add(ProductColor(name=name, slug=name.lower()))
+    session.add(Supplier(name="Main Supplier", supplier_type=SupplierType.FACTORY))
+    session.flush()
+
+    for index in range(3):
+        product = Product(
+            name=f"Bag {index}",
+            slug=f"bag-{index}",
+            category_id=1, material_id=1, brand_id=1, style_id=1, country_id=1,
+            ownership_status=OwnershipStatus.OWNED,
+            supplier_id=1,
+            selling_price=100 + index,
+            purchase_price=50
+        )
+        session.add(product)
+        session.flush()
+        for color_id in (1, 2):
+            session.add(ProductVariation(
+                product_id=product.id,
+                color_id=color_id,
+                sku=f"SKU-{product.id}-{color_id}",
+                selling_price=100 + index,
+                purchase_price=50,
+                initial_stock=0,
+                current_stock=0
+            ))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db, session_factory):
+    """An API client using the test database, authenticated as the seeded admin"""
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, 1)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def post_stock(db):
+    """Post one stock movement through the ledger and commit it"""
+    def post(
+        variation_id: int,
+        quantity: int,
+        unit_cost: Optional[str] = None,
+        change_type: ChangeType = None
+    ):
+        stock_service.create_stock_entries(db, [
+            StockLedgerCreate(
+                product_variation_id=variation_id,
+                change_type=change_type or (ChangeType.PURCHASE if quantity > 0 else ChangeType.SALE),
+                quantity_change=quantity,
+                unit_cost=Decimal(unit_cost) if unit_cost is not None else None
+            )
+        ], user_id=1)
+        db.commit()
+    return post
@@ -0,0 +1,22 @@
+def test_bootstrap_returns_every_catalog_with_an_etag(client):
+    response = client.get("/api/v1/attributes/bootstrap")
+
+    assert response.status_code == 200
+    assert response.headers["etag"]
+    body = response.json()
+    assert list(body) == ["categories", "materials", "styles", "brands", "colors", "countries", "suppliers"]
+    assert [color["name"] for color in body["colors"]] == ["Black", "Red", "Blue"]
+    assert [supplier["name"] for supplier in body["suppliers"]["factory"]] == ["Main Supplier"]
+
+
+def test_bootstrap_honours_if_none_match_until_a_catalog_changes(client):
+    etag = client.get("/api/v1/attributes/bootstrap").headers["etag"]
+
+    assert client.get("/api/v1/attributes/bootstrap", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/api/v1/attributes/colors", json={"name": "Teal"})
+    response = client.get("/api/v1/attributes/bootstrap", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert "Teal" in [color["name"] for color in response.json()["colors"]]
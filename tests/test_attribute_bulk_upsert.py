@@ -0,0 +1,84 @@
+from unittest import mock
+
+import app.services.product_attributes as product_attributes
+from app.models.product import Product, ProductVariation
+from app.models.product_attributes import ProductColor
+from app.services.product import ProductService
+
+URL = "/api/v1/attributes/colors/bulk"
+PRODUCT = {
+    "category_id": 1, "material_id": 1, "brand_id": 1, "style_id": 1, "country_id": 1,
+    "ownership_status": "yes", "selling_price": "10"
+}
+
+
+def test_bulk_upsert_updates_existing_names_and_creates_new_ones(client, db):
+    response = client.post(URL, json={"items": [
+        {"name": "Red", "hex_code": "#FF0000"},
+        {"name": "red"},
+        {"name": "Teal"},
+        {"name": "Teal", "is_active": False}
+    ]})
+
+    assert response.status_code == 200
+    assert [(row["name"], row["slug"], row["created"]) for row in response.json()] == [
+        ("Red", "red", False),
+        ("red", "red-1", True),
+        ("Teal", "teal", True)
+    ]
+    db.expire_all()
+    assert db.get(ProductColor, 2).hex_code == "#FF0000"
+    teal = db.query(ProductColor).filter(ProductColor.name == "Teal").one()
+    assert teal.is_active is False  # the last occurrence of a name wins
+
+
+def test_bulk_upsert_retries_when_a_new_slug_was_taken_concurrently(client, db):
+    real = product_attributes.ensure_unique_slug
+    calls = []
+
+    def stale_on_first_call(slug, taken, *args, **kwargs):
+        calls.append(slug)
+        # As if another request inserted "black" after this one read the slugs
+        return "black" if len(calls) == 1 else real(slug, taken, *args, **kwargs)
+
+    with mock.patch.object(product_attributes, "ensure_unique_slug", stale_on_first_call):
+        response = client.post(URL, json={"items": [{"name": "Mauve"}]})
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": 4, "name": "Mauve", "slug": "mauve", "created": True}]
+    assert len(calls) == 2
+
+
+def test_product_create_retries_with_a_fresh_slug(client, db):
+    real = ProductService._unique_slug
+    calls = []
+
+    def stale_on_first_call(self, db, name, exclude_id=None):
+        calls.append(name)
+        return "bag-0" if len(calls) == 1 else real(self, db, name, exclude_id)
+
+    with mock.patch.object(ProductService, "_unique_slug", stale_on_first_call):
+        response = client.post("/api/v1/products/", json={
+            **PRODUCT, "name": "Bag 0", "variations": [{"color_id": 1}]
+        })
+
+    assert response.status_code == 200
+    assert response.json()["slug"] == "bag-0-1"
+    assert db.query(Product).count() == 4
+
+
+def test_clone_retries_with_fresh_skus(client, db):
+    real = ProductService._allocate_skus
+    calls = []
+
+    def stale_on_first_call(self, db, product, color_names):
+        skus = real(self, db, product, color_names)
+        calls.append(skus)
+        return ["SKU-1-1", *skus[1:]] if len(calls) == 1 else skus
+
+    with mock.patch.object(ProductService, "_allocate_skus", stale_on_first_call):
+        response = client.post("/api/v1/products/1/clone", json={})
+
+    assert response.status_code == 200
+    assert [variation["sku"] for variation in response.json()["variations"]] == calls[-1]
+    assert db.query(ProductVariation).count() == 8
@@ -0,0 +1,37 @@
+from app.models.product_attributes import ProductColor
+from app.services.attribute_cache import attribute_cache
+from app.services.product_attributes import color_service
+
+
+def test_writes_through_the_service_invalidate_the_cache(db):
+    assert [row["name"] for row in color_service.get_multi(db)] == ["Black", "Red", "Blue"]
+    version = attribute_cache.version(ProductColor)
+
+    color_service.create(db, {"name": "Teal", "is_active": True})
+    color_service.delete(db, 1)
+
+    assert attribute_cache.version(ProductColor) == version + 2
+    assert [row["name"] for row in color_service.get_multi(db, is_active=True)] == ["Red", "Blue", "Teal"]
+
+
+def test_lookup_miss_reloads_rows_added_by_another_worker(db, session_factory):
+    attribute_cache.load(db)
+    other_worker = session_factory()
+    other_worker.add(ProductColor(name="Green", slug="green"))
+    other_worker.commit()
+
+    assert attribute_cache.get(db, ProductColor, 4)["name"] == "Green"
+    assert attribute_cache.get_by_slug(db, ProductColor, "green")["id"] == 4
+    assert attribute_cache.get(db, ProductColor, 99) is None
+
+
+def test_variation_create_accepts_a_color_added_elsewhere(client, db, session_factory):
+    attribute_cache.load(db)
+    other_worker = session_factory()
+    other_worker.add(ProductColor(name="Pink", slug="pink"))
+    other_worker.commit()
+
+    response = client.post("/api/v1/products/1/variations", json={"color_id": 4})
+
+    assert response.status_code == 200
+    assert response.json()["color_name"] == "Pink"
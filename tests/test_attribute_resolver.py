@@ -0,0 +1,27 @@
+URL = "/api/v1/attributes/resolve"
+ITEMS = [
+    {"attribute_type": "colors", "name": "RED"},
+    {"attribute_type": "colors", "name": "Blüe"},
+    {"attribute_type": "colors", "name": "Téal"},
+    {"attribute_type": "colors", "name": "teal"},
+    {"attribute_type": "materials", "name": "Leather"}
+]
+
+
+def _ids(response):
+    return [(row["id"], row["created"]) for row in response.json()]
+
+
+def test_resolve_matches_names_ignoring_case_and_accents(client):
+    response = client.post(URL, json={"items": ITEMS})
+
+    assert response.status_code == 200
+    assert _ids(response) == [(2, False), (3, False), (None, False), (None, False), (None, False)]
+
+
+def test_resolve_can_create_missing_names_once(client):
+    created = client.post(URL, json={"items": ITEMS, "create_missing": True})
+    again = client.post(URL, json={"items": ITEMS})
+
+    assert _ids(created) == [(2, False), (3, False), (4, True), (4, True), (2, True)]
+    assert _ids(again) == [(2, False), (3, False), (4, False), (4, False), (2, False)]
@@ -0,0 +1,96 @@
+import random
+from unittest import mock
+
+import pytest
+
+from app.core.config import settings
+from app.models.product import ProductVariation
+from app.services.barcode import BarcodeService, barcode_service
+from app.utils.ean import build_ean13, ean13_check_digit, validate_ean13_batch
+
+
+@pytest.mark.parametrize("body, check_digit", [
+    ("400638133393", 1),
+    ("590123412345", 7),
+    ("200000000001", 5),
+    ("000000000000", 0)
+])
+def test_check_digit(body, check_digit):
+    assert ean13_check_digit(body) == check_digit
+
+
+@pytest.mark.parametrize("body", ["40063813339", "4006381333931", "40063813339x"])
+def test_check_digit_rejects_malformed_bodies(body):
+    with pytest.raises(ValueError):
+        ean13_check_digit(body)
+
+
+def test_build_pads_the_reference_into_the_prefix_range():
+    assert build_ean13("20", 3) == "2000000000039"
+    with pytest.raises(ValueError):
+        build_ean13("20", 10 ** 10)
+
+
+def test_batch_validation_matches_the_single_code_check():
+    rng = random.Random(13)
+    bodies = ["".join(rng.choice("0123456789") for _ in range(12)) for _ in range(500)]
+    codes = [f"{body}{ean13_check_digit(body)}" for body in bodies]
+    codes += [f"{body}{(ean13_check_digit(body) + 1) % 10}" for body in bodies[:100]]
+    codes += [None, "", "400638133393", "40063813339311", "400638133393x", "٤٠٠٦٣٨١٣٣٣٩٣١"]
+
+    assert validate_ean13_batch(codes) == [True] * 500 + [False] * 106
+
+
+def test_validate_endpoint_reports_bad_duplicate_and_assigned_codes(client, db):
+    db.get(ProductVariation, 4).barcode = "2000000000039"
+    db.commit()
+
+    response = client.post("/api/v1/variations/barcodes/validate", json={
+        "codes": ["2000000000039", "4006381333932", "2000000000992", " 2000000000992 ", "x"]
+    })
+
+    assert response.json() == {"total": 5, "valid": 1, "errors": [
+        {"index": 0, "code": "2000000000039", "error": "Already assigned to variation 4"},
+        {"index": 1, "code": "4006381333932", "error": "Invalid EAN-13 code or check digit"},
+        {"index": 3, "code": "2000000000992", "error": "Duplicate code in batch"},
+        {"index": 4, "code": "x", "error": "Invalid EAN-13 code or check digit"}
+    ]}
+
+
+def _barcodes(response):
+    return [(variation["id"], variation["barcode"]) for variation in response.json()]
+
+
+def test_assigning_barcodes_keeps_existing_ones_unless_overwriting(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "EAN13_PREFIX", "20")
+    db.get(ProductVariation, 2).barcode = "4006381333931"
+    db.commit()
+
+    assert _barcodes(client.post("/api/v1/products/1/barcodes")) == [(1, "2000000000015"), (2, "4006381333931")]
+    assert _barcodes(client.post("/api/v1/products/2/barcodes")) == [(3, "2000000000022"), (4, "2000000000039")]
+    assert _barcodes(client.post("/api/v1/products/1/barcodes", params={"overwrite": True})) == [
+        (1, "2000000000046"), (2, "2000000000053")
+    ]
+    assert client.get("/api/v1/variations/lookup", params={"code": "2000000000039"}).json()["id"] == 4
+    assert client.post("/api/v1/products/99/barcodes").status_code == 404
+
+
+def test_allocation_skips_codes_already_assigned(db, monkeypatch):
+    monkeypatch.setattr(settings, "EAN13_PREFIX", "20")
+    db.get(ProductVariation, 2).barcode = build_ean13("20", 2)
+    db.commit()
+
+    # as if the sequence had not been advanced past a hand-entered code
+    with mock.patch.object(BarcodeService, "_next_reference_without_sequence", return_value=1):
+        codes = barcode_service.allocate(db, 3)
+
+    assert codes == [build_ean13("20", 1), build_ean13("20", 3), build_ean13("20", 4)]
+
+
+def test_allocation_stops_at_the_end_of_the_range(db, monkeypatch):
+    monkeypatch.setattr(settings, "EAN13_PREFIX", "20000000000")
+    db.get(ProductVariation, 1).barcode = build_ean13("20000000000", 9)
+    db.commit()
+
+    with pytest.raises(ValueError, match="exhausted"):
+        barcode_service.allocate(db, 1)
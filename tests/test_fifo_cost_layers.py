@@ -0,0 +1,146 @@
+import random
+from decimal import Decimal
+from unittest import mock
+
+from app.models.cost_layer import CostLayer
+from app.models.stock import ChangeType, StockLedger
+from app.schemas.stock import StockLedgerCreate
+from app.services.cost_layers import fifo_cost_service
+from app.services.stock import stock_service
+
+
+def _ledger_costs(db, variation_id):
+    db.expire_all()
+    return [
+        (entry.quantity_change, entry.unit_cost)
+        for entry in db.query(StockLedger)
+        .filter(StockLedger.product_variation_id == variation_id)
+        .order_by(StockLedger.timestamp)
+    ]
+
+
+def _layers(db, variation_id=None):
+    db.expire_all()
+    query = db.query(CostLayer).order_by(CostLayer.product_variation_id, CostLayer.id)
+    if variation_id is not None:
+        query = query.filter(CostLayer.product_variation_id == variation_id)
+    return [(layer.unit_cost, layer.quantity_received, layer.quantity_remaining) for layer in query]
+
+
+def _snapshot(db):
+    db.expire_all()
+    costs = {entry.id: entry.unit_cost for entry in db.query(StockLedger)}
+    layers = sorted(
+        (layer.product_variation_id, layer.source_ledger_id, layer.unit_cost,
+         layer.quantity_received, layer.quantity_remaining)
+        for layer in db.query(CostLayer)
+    )
+    return costs, layers
+
+
+def test_outbound_entries_consume_the_oldest_layers_first(db, post_stock):
+    post_stock(1, 5, "10")
+    post_stock(1, 5, "30")
+
+    post_stock(1, -8)
+
+    # 5 x 10 + 3 x 30
+    assert _ledger_costs(db, 1)[-1] == (-8, Decimal("17.5000"))
+    assert _layers(db, 1) == [(Decimal("10.0000"), 5, 0), (Decimal("30.0000"), 5, 2)]
+
+
+def test_shortfalls_are_costed_at_the_fallback_and_not_taken_from_later_layers(db, post_stock):
+    post_stock(1, 2, "30")
+
+    post_stock(1, -10)
+    post_stock(1, 5, "20")
+
+    # 2 x 30 + 8 x 50 (the purchase price)
+    assert _ledger_costs(db, 1)[1] == (-10, Decimal("46.0000"))
+    assert _layers(db, 1) == [(Decimal("30.0000"), 2, 0), (Decimal("20.0000"), 5, 5)]
+
+
+def test_one_batch_costs_its_lines_in_entry_order(db):
+    stock_service.create_stock_entries(db, [
+        StockLedgerCreate(product_variation_id=1, change_type=ChangeType.PURCHASE, quantity_change=4,
+                          unit_cost=Decimal("10")),
+        StockLedgerCreate(product_variation_id=2, change_type=ChangeType.PURCHASE, quantity_change=4,
+                          unit_cost=Decimal("20")),
+        StockLedgerCreate(product_variation_id=1, change_type=ChangeType.SALE, quantity_change=-3),
+        StockLedgerCreate(product_variation_id=1, change_type=ChangeType.SALE, quantity_change=-3)
+    ], user_id=1)
+    db.commit()
+
+    # the second sale takes the last unit at 10 and two short at the purchase price of 50
+    assert _ledger_costs(db, 1) == [(4, Decimal("10.0000")), (-3, Decimal("10.0000")), (-3, Decimal("36.6667"))]
+    assert _layers(db, 2) == [(Decimal("20.0000"), 4, 4)]
+
+
+def test_valuation_sums_open_layers(client, post_stock):
+    post_stock(1, 5, "10")
+    post_stock(1, 5, "30")
+    post_stock(1, -8)
+
+    [row] = client.get("/api/v1/stock/valuation", params={"limit": 1}).json()
+
+    assert (row["current_stock"], row["layered_quantity"], Decimal(row["fifo_value"])) == (2, 2, Decimal("60.00"))
+
+
+def test_rebuild_reproduces_live_costing_with_negative_stock(db):
+    rng = random.Random(7)
+    for _ in range(60):
+        entries = []
+        for _ in range(rng.randint(1, 4)):
+            variation_id = rng.randint(1, 3)
+            if rng.random() < 0.5:
+                entries.append(StockLedgerCreate(
+                    product_variation_id=variation_id, change_type=ChangeType.PURCHASE,
+                    quantity_change=rng.randint(1, 9), unit_cost=Decimal(rng.randint(100, 999)) / 7
+                ))
+            else:
+                entries.append(StockLedgerCreate(
+                    product_variation_id=variation_id, change_type=ChangeType.SALE,
+                    quantity_change=-rng.randint(1, 12)
+                ))
+        stock_service.create_stock_entries(db, entries, user_id=1)
+        db.commit()
+    live = _snapshot(db)
+    assert any(layer[4] == 0 for layer in live[1]) and any(layer[4] > 0 for layer in live[1])
+
+    result = fifo_cost_service.rebuild(db)
+    db.commit()
+
+    assert result["layers_created"] == len(live[1])
+    assert _snapshot(db) == live
+
+
+def test_rebuild_fixes_drifted_layers_for_the_requested_variations_only(client, db, post_stock):
+    post_stock(1, 5, "10")
+    post_stock(2, 5, "20")
+    post_stock(1, -3)
+    post_stock(2, -3)
+    live = _snapshot(db)
+    db.query(CostLayer).update({"quantity_remaining": 5})
+    db.query(StockLedger).filter(StockLedger.quantity_change < 0).update({"unit_cost": 0})
+    db.commit()
+
+    response = client.post("/api/v1/stock/cost-layers/rebuild", params={"product_variation_ids": [1]})
+
+    assert response.status_code == 200
+    assert _layers(db, 1) == [(Decimal("10.0000"), 5, 2)]
+    assert _layers(db, 2) == [(Decimal("20.0000"), 5, 5)]
+
+    fifo_cost_service.rebuild(db)
+    db.commit()
+    assert _snapshot(db) == live
+
+
+def test_rebuild_locks_its_variations_before_reading_the_ledger(db, post_stock):
+    post_stock(1, 5, "10")
+
+    with mock.patch.object(db, "execute", wraps=db.execute) as execute:
+        fifo_cost_service.rebuild(db, [1])
+
+    first = execute.call_args_list[0].args[0]
+    assert first._for_update_arg is not None
+    assert "FROM product_variations" in str(first)
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.idempotency import IdempotencyKey
+from app.models.purchase import PaymentHistory, Purchase
+from app.schemas.purchase import PurchaseCreate
+from app.services.idempotency import idempotency_service
+
+URL = "/api/v1/purchases/"
+BODY = {"supplier_id": 1, "details": [{"product_variation_id": 1, "quantity": 2, "unit_price": "3.5"}]}
+SCOPE = "POST /purchases"
+
+
+def _post(client, key, body=BODY):
+    return client.post(URL, json=body, headers={"Idempotency-Key": key})
+
+
+def _lapse_leases(db):
+    db.query(IdempotencyKey).update({"locked_until": datetime.now(timezone.utc) - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_retry_replays_the_stored_response(client, db):
+    first = _post(client, "k1")
+    retry = _post(client, "k1")
+
+    assert (first.status_code, retry.status_code) == (200, 200)
+    assert retry.json() == first.json()
+    assert retry.headers[idempotency_service.REPLAY_HEADER] == "true"
+    assert first.headers.get(idempotency_service.REPLAY_HEADER) is None
+    assert db.query(Purchase).count() == 1
+
+
+def test_reusing_a_key_with_a_different_payload_is_rejected(client, db):
+    _post(client, "k1")
+
+    assert _post(client, "k1", {**BODY, "notes": "changed"}).status_code == 422
+    assert db.query(Purchase).count() == 1
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, db):
+    client.post(URL, json=BODY)
+    client.post(URL, json=BODY)
+
+    assert db.query(Purchase).count() == 2
+
+
+def test_failed_operation_releases_the_key(client, db):
+    bad = {"supplier_id": 1, "details": [{"product_variation_id": 99, "quantity": 2, "unit_price": "3.5"}]}
+
+    assert _post(client, "k2", bad).status_code == 422
+    assert db.query(IdempotencyKey).count() == 0
+    assert _post(client, "k2").status_code == 200
+
+
+def test_payment_retries_are_recorded_once(client, db):
+    purchase_id = _post(client, "k1").json()["id"]
+
+    for _ in range(3):
+        response = client.post(
+            URL + f"{purchase_id}/payments", json={"amount_paid": "5"}, headers={"Idempotency-Key": "pay1"}
+        )
+
+    assert response.status_code == 200
+    assert db.query(PaymentHistory).count() == 1
+
+
+def _claim_and_abandon(db, key):
+    claim_id, record = idempotency_service._claim(
+        db, key, SCOPE, 1, idempotency_service._hash(SCOPE, PurchaseCreate(**BODY))
+    )
+    assert claim_id is not None and record is None
+
+
+def test_in_progress_claim_blocks_retries_until_its_lease_lapses(client, db):
+    _claim_and_abandon(db, "k9")
+
+    assert _post(client, "k9").status_code == 409
+
+    _lapse_leases(db)
+    taken_over = _post(client, "k9")
+    replayed = _post(client, "k9")
+
+    assert taken_over.status_code == 200
+    assert replayed.headers[idempotency_service.REPLAY_HEADER] == "true"
+    assert replayed.json() == taken_over.json()
+    db.expire_all()
+    assert [(key.status_code, key.locked_until) for key in db.query(IdempotencyKey)] == [(200, None)]
+
+
+def test_completed_keys_are_never_taken_over(client, db):
+    _post(client, "k1")
+    _lapse_leases(db)
+
+    assert _post(client, "k1").headers[idempotency_service.REPLAY_HEADER] == "true"
+    assert db.query(Purchase).count() == 1
+
+
+def test_expired_keys_are_reused_and_purged(client, db):
+    def expire_keys():
+        db.query(IdempotencyKey).update({"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+        db.commit()
+
+    _post(client, "k1")
+    expire_keys()
+
+    assert _post(client, "k1").headers.get(idempotency_service.REPLAY_HEADER) is None
+    assert db.query(Purchase).count() == 2
+
+    _post(client, "k2")
+    expire_keys()
+    assert idempotency_service.purge_expired(db) == 2
+    assert db.query(IdempotencyKey).count() == 0
@@ -0,0 +1,101 @@
+from decimal import Decimal
+from unittest import mock
+
+from app.models.cost_layer import CostLayer
+from app.models.product import ProductVariation
+from app.models.stock import ChangeType, StockLedger
+from app.schemas.stock import StockLedgerCreate
+from app.services.costing import costing_service
+from app.services.stock import stock_service
+
+URL = "/api/v1/purchases/"
+
+
+def _buy(client, lines, receive=True):
+    purchase = client.post(URL, json={"supplier_id": 1, "details": [
+        {"product_variation_id": variation_id, "quantity": quantity, "unit_price": price}
+        for variation_id, quantity, price in lines
+    ]}).json()
+    if receive:
+        client.put(URL + f"{purchase['id']}/status", params={"new_status": "received"})
+    return purchase
+
+
+def _stock_and_cost(db, variation_id):
+    db.expire_all()
+    variation = db.get(ProductVariation, variation_id)
+    return variation.current_stock, variation.average_cost
+
+
+def test_receipts_fold_into_the_moving_average_line_by_line(client, db, post_stock):
+    post_stock(1, 10, "50")
+
+    _buy(client, [(1, 10, "70"), (1, 20, "40")])
+
+    # (10 x 50 + 10 x 70) / 20 = 60, then (20 x 60 + 20 x 40) / 40 = 50
+    assert _stock_and_cost(db, 1) == (40, Decimal("50.0000"))
+
+
+def test_returns_take_stock_out_at_the_line_cost(client, db, post_stock):
+    post_stock(1, 10, "50")
+    purchase = _buy(client, [(1, 10, "70"), (1, 20, "40")])
+
+    client.post("/api/v1/purchase-returns/", json={
+        "purchase_detail_id": purchase["details"][0]["id"], "product_variation_id": 1, "quantity_returned": 10
+    })
+
+    # (40 x 50 - 10 x 70) / 30
+    assert _stock_and_cost(db, 1) == (30, Decimal("43.3333"))
+
+
+def test_receipt_is_posted_once_across_status_round_trips(client, db):
+    purchase = _buy(client, [(1, 5, "20")], receive=False)
+
+    for new_status in ("partially_received", "received", "confirmed", "received", "partially_received", "received"):
+        assert client.put(URL + f"{purchase['id']}/status", params={"new_status": new_status}).status_code == 200
+
+    assert _stock_and_cost(db, 1) == (5, Decimal("20.0000"))
+    assert db.query(StockLedger).count() == 1
+    assert db.query(CostLayer).count() == 1
+
+
+def test_stock_summary_values_stock_at_average_cost(client, post_stock):
+    post_stock(1, 10, "50")
+    _buy(client, [(1, 10, "70")])
+
+    rows = {row["product_variation_id"]: row for row in client.get("/api/v1/stock/summary").json()}
+
+    assert rows[1]["average_cost"] == 60.0
+    assert rows[1]["cost_value"] == 1200.0
+
+
+def test_average_reads_committed_stock_not_the_session_cache(db, session_factory):
+    assert db.get(ProductVariation, 1).current_stock == 0
+    other = session_factory()
+    stock_service.create_stock_entries(other, [StockLedgerCreate(
+        product_variation_id=1, change_type=ChangeType.PURCHASE, quantity_change=10, unit_cost=Decimal("50")
+    )], user_id=1)
+    costing_service.apply_receipts(other, [(1, 10, Decimal("50"))])
+    other.commit()
+    other.close()
+
+    averages = costing_service.apply_receipts(db, [(1, 10, Decimal("70"))])
+
+    assert averages == {1: Decimal("60.0000")}
+
+
+def test_cost_and_stock_reads_lock_the_variation_rows(db):
+    with mock.patch.object(db, "execute", wraps=db.execute) as execute:
+        costing_service.apply_receipts(db, [(2, 1, Decimal("5")), (1, 1, Decimal("5"))])
+        stock_service.create_stock_entries(db, [
+            StockLedgerCreate(product_variation_id=2, change_type=ChangeType.PURCHASE, quantity_change=1),
+            StockLedgerCreate(product_variation_id=1, change_type=ChangeType.PURCHASE, quantity_change=1)
+        ], user_id=1)
+
+    locking = [
+        call.args[0] for call in execute.call_args_list
+        if getattr(call.args[0], "_for_update_arg", None) is not None
+    ]
+    assert len(locking) >= 2
+    # locks are always taken in id order
+    assert all("ORDER BY product_variations.id" in str(statement) for statement in locking)
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.purchase import Purchase
+from app.models.supplier import Supplier, SupplierType
+
+URL = "/api/v1/purchases/"
+BUCKETS = ("days_0_30", "days_31_60", "days_61_90", "days_over_90", "total_outstanding")
+TODAY = date.today()
+
+
+def _buckets(row):
+    return [Decimal(row[bucket]) for bucket in BUCKETS]
+
+
+def _aging(client, as_of=None, **params):
+    if as_of is not None:
+        params["as_of"] = str(as_of)
+    return client.get(URL + "aging", params=params).json()
+
+
+@pytest.fixture
+def purchases(client, db):
+    """
+    Purchases of 10.00 from the main supplier aged 0, 31, 61 and 91 days
+    (the 31-day one paid 4.00 today), and from a second supplier of 7.00 aged
+    120 days and 10.00 aged 30 days
+    """
+    db.add(Supplier(name="Second Supplier", supplier_type=SupplierType.WHOLESALER))
+    db.commit()
+
+    def purchase(days, supplier_id=1, price="10"):
+        return client.post(URL, json={
+            "supplier_id": supplier_id,
+            "purchase_date": f"{TODAY - timedelta(days=days)}T12:00:00",
+            "details": [{"product_variation_id": 1, "quantity": 1, "unit_price": price}]
+        }).json()["id"]
+
+    ids = [purchase(0), purchase(31), purchase(61), purchase(91), purchase(120, 2, "7"), purchase(30, 2)]
+    client.post(URL + f"{ids[1]}/payments", json={"amount_paid": "4"})
+    return ids
+
+
+def test_report_buckets_outstanding_balances_by_supplier(client, purchases):
+    report = _aging(client)
+
+    assert report["as_of"] == str(TODAY)
+    assert [(row["supplier_name"], row["purchase_count"], _buckets(row)) for row in report["suppliers"]] == [
+        ("Main Supplier", 4, [Decimal(v) for v in ("10", "6", "10", "10", "36")]),
+        ("Second Supplier", 2, [Decimal(v) for v in ("10", "0", "0", "7", "17")])
+    ]
+    assert _buckets(report["totals"]) == [Decimal(v) for v in ("20", "6", "10", "17", "53")]
+
+
+def test_payments_invalidate_todays_snapshot(client, purchases):
+    _aging(client)
+
+    client.post(URL + f"{purchases[0]}/payments", json={"amount_paid": "10"})
+
+    assert _buckets(_aging(client)["totals"]) == [Decimal(v) for v in ("10", "6", "10", "17", "43")]
+
+
+def test_as_of_in_the_past_ignores_later_purchases_and_payments(client, purchases):
+    # yesterday: today's purchase and today's payment had not happened yet
+    assert _buckets(_aging(client, TODAY - timedelta(days=1))["totals"]) == [
+        Decimal(v) for v in ("20", "10", "10", "7", "47")
+    ]
+    # 40 days ago only the 61, 91 and 120 day old purchases existed
+    assert _buckets(_aging(client, TODAY - timedelta(days=40))["totals"]) == [
+        Decimal(v) for v in ("10", "10", "7", "0", "27")
+    ]
+
+
+def test_as_of_in_the_future_ages_todays_balances(client, purchases):
+    assert _buckets(_aging(client, TODAY + timedelta(days=60))["totals"]) == [
+        Decimal(v) for v in ("0", "10", "10", "33", "53")
+    ]
+
+
+def test_snapshot_can_be_bypassed(client, db, purchases):
+    _aging(client)
+    # a write that skips the service does not invalidate the snapshot
+    db.query(Purchase).filter(Purchase.id == purchases[0]).update({"total_price": 0})
+    db.commit()
+
+    assert Decimal(_aging(client)["totals"]["total_outstanding"]) == Decimal("53")
+    assert Decimal(_aging(client, use_snapshot=False)["totals"]["total_outstanding"]) == Decimal("43")
@@ -0,0 +1,85 @@
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.models.price_history import PriceHistory
+from app.models.product import Product, ProductVariation
+from app.schemas.product import ProductBulkFilter, ProductBulkPriceUpdate, ProductUpdate
+from app.services.product import product_service
+
+
+def _now():
+    now = datetime.now(timezone.utc)
+    time.sleep(0.01)
+    return now
+
+
+def _selling_prices(db, variation_ids, at):
+    return {
+        row["product_variation_id"]: row["selling_price"]
+        for row in product_service.get_variation_prices_as_of(db, variation_ids, at)
+    }
+
+
+def _reprice(db, product_id, value):
+    product_service.bulk_update_prices(db, ProductBulkPriceUpdate(
+        filters=ProductBulkFilter(product_ids=[product_id]), mode="absolute", value=value
+    ))
+
+
+def test_as_of_returns_the_price_valid_at_each_time(db):
+    before = _now()
+    _reprice(db, 1, 120)
+    between = _now()
+    _reprice(db, 1, 130)
+
+    assert _selling_prices(db, [1, 3], before) == {1: Decimal("100.00"), 3: Decimal("101.00")}
+    assert _selling_prices(db, [1, 3], between) == {1: Decimal("120.00"), 3: Decimal("101.00")}
+    assert _selling_prices(db, [1, 3], datetime.now(timezone.utc)) == {
+        1: Decimal("130.00"), 3: Decimal("101.00")
+    }
+
+
+def test_as_of_endpoint(client, db):
+    before = _now()
+    _reprice(db, 1, 120)
+
+    response = client.get("/api/v1/products/prices/as-of", params={
+        "at": before.isoformat(), "variation_ids": [1, 2]
+    })
+
+    assert response.status_code == 200
+    assert [Decimal(row["selling_price"]) for row in response.json()] == [Decimal("100.00")] * 2
+
+
+def test_product_update_moves_variations_still_on_the_product_price(db):
+    own_price = db.get(ProductVariation, 4)
+    own_price.selling_price = 140
+    db.commit()
+    before = _now()
+
+    product_service.update(db, db.get(Product, 2), ProductUpdate(selling_price=77))
+
+    db.expire_all()
+    assert db.get(ProductVariation, 3).selling_price == Decimal("77.00")
+    assert db.get(ProductVariation, 4).selling_price == Decimal("140.00")
+    assert _selling_prices(db, [3, 4], before) == {3: Decimal("101.00"), 4: Decimal("140.00")}
+    assert _selling_prices(db, [3, 4], datetime.now(timezone.utc)) == {
+        3: Decimal("77.00"), 4: Decimal("140.00")
+    }
+
+
+def test_updates_without_price_changes_record_nothing(db):
+    product_service.update(db, db.get(Product, 2), ProductUpdate(name="Renamed"))
+
+    assert db.query(PriceHistory).count() == 0
+
+
+def test_variation_update_keeps_the_previous_price_as_of_earlier_times(client, db):
+    before = _now()
+
+    response = client.put("/api/v1/products/1/variations/1", json={"selling_price": "150"})
+
+    assert response.status_code == 200
+    assert _selling_prices(db, [1], before) == {1: Decimal("100.00")}
+    assert _selling_prices(db, [1], datetime.now(timezone.utc)) == {1: Decimal("150.00")}
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from app.models.price_history import PriceHistory
+from app.models.product import Product, ProductVariation
+
+URL = "/api/v1/products/bulk/prices"
+
+
+def test_dry_run_previews_without_writing(client, db):
+    response = client.post(URL, json={
+        "filters": {"product_ids": [2]},
+        "mode": "percentage",
+        "value": "10",
+        "dry_run": True
+    })
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["dry_run"] is True
+    assert (body["products_updated"], body["variations_updated"]) == (1, 2)
+    assert {Decimal(change["new_price"]) for change in body["changes"]} == {Decimal("111.10")}
+    db.expire_all()
+    assert db.get(Product, 2).selling_price == Decimal("101.00")
+    assert db.query(PriceHistory).count() == 0
+
+
+def test_percentage_with_rounding_updates_products_and_variations(client, db):
+    response = client.post(URL, json={
+        "filters": {"brand_id": 1},
+        "mode": "percentage",
+        "value": "10",
+        "round_to": "5"
+    })
+
+    assert response.json()["variations_updated"] == 6
+    db.expire_all()
+    # 110, 111.1 and 112.2 all round to the nearest 5
+    assert {p.selling_price for p in db.query(Product)} == {Decimal("110.00")}
+    assert {v.selling_price for v in db.query(ProductVariation)} == {Decimal("110.00")}
+
+
+def test_absolute_update_skips_variations_when_asked(client, db):
+    client.post(URL, json={
+        "filters": {"product_ids": [1]},
+        "mode": "absolute",
+        "value": "99.99",
+        "apply_to_variations": False
+    })
+
+    db.expire_all()
+    assert db.get(Product, 1).selling_price == Decimal("99.99")
+    assert db.get(ProductVariation, 1).selling_price == Decimal("100.00")
+
+
+def test_bulk_update_requires_a_filter(client):
+    response = client.post(URL, json={"filters": {}, "mode": "absolute", "value": "1"})
+
+    assert response.status_code == 400
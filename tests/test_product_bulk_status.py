@@ -0,0 +1,28 @@
+from app.models.product import Product, ProductVariation
+
+
+def test_bulk_deactivate_cascades_to_variations(client, db):
+    response = client.post("/api/v1/products/bulk/deactivate", json={"brand_id": 1})
+
+    assert response.status_code == 200
+    assert response.json() == {"products_updated": 3, "variations_updated": 6}
+    db.expire_all()
+    assert db.query(Product).filter(Product.is_active == True).count() == 0
+    assert db.query(ProductVariation).filter(ProductVariation.is_active == True).count() == 0
+
+
+def test_bulk_reactivate_only_touches_matching_products(client, db):
+    client.post("/api/v1/products/bulk/deactivate", json={"brand_id": 1})
+
+    response = client.post("/api/v1/products/bulk/reactivate", json={"product_ids": [1]})
+
+    assert response.json() == {"products_updated": 1, "variations_updated": 2}
+    db.expire_all()
+    active = db.query(ProductVariation.id).filter(ProductVariation.is_active == True)
+    assert sorted(id for id, in active) == [1, 2]
+
+
+def test_bulk_status_requires_a_filter(client):
+    response = client.post("/api/v1/products/bulk/deactivate", json={})
+
+    assert response.status_code == 400
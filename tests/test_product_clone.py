@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+from app.models.price_history import PriceHistory
+from app.models.product import ProductVariation
+
+
+def test_clone_copies_product_and_variations_without_stock(client, db):
+    source_variation = db.get(ProductVariation, 1)
+    source_variation.current_stock = 7
+    source_variation.barcode = "4006381333931"
+    db.commit()
+
+    response = client.post("/api/v1/products/1/clone", json={"selling_price": "150"})
+
+    assert response.status_code == 200
+    clone = response.json()
+    assert clone["id"] != 1
+    assert (clone["name"], clone["slug"]) == ("Bag 0 Copy", "bag-0-copy")
+    assert Decimal(clone["selling_price"]) == Decimal("150.00")
+    assert [variation["color_id"] for variation in clone["variations"]] == [1, 2]
+    for variation in clone["variations"]:
+        assert variation["current_stock"] == 0
+        assert variation["barcode"] is None
+        assert Decimal(variation["selling_price"]) == Decimal("150.00")
+    assert db.query(PriceHistory).filter(PriceHistory.product_id == clone["id"]).count() == 3
+
+
+def test_repeated_clones_get_fresh_slugs_and_skus(client):
+    first = client.post("/api/v1/products/1/clone", json={}).json()
+    second = client.post("/api/v1/products/1/clone", json={}).json()
+
+    assert second["slug"] == "bag-0-copy-1"
+    first_skus = {variation["sku"] for variation in first["variations"]}
+    second_skus = {variation["sku"] for variation in second["variations"]}
+    assert len(first_skus | second_skus) == 4
+
+
+def test_clone_of_missing_product_is_404(client):
+    assert client.post("/api/v1/products/99/clone", json={}).status_code == 404
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from app.models.price_history import PriceHistory
+from app.models.product import ProductVariation
+from app.models.stock import StockLedger
+
+
+def _bulk(client, product_id, **body):
+    return client.post(f"/api/v1/products/{product_id}/variations/bulk", json=body)
+
+
+def test_bulk_create_adds_one_variation_per_color_with_opening_stock(client, db):
+    response = _bulk(client, 1, color_ids=[3], initial_stock=4)
+
+    assert response.status_code == 200
+    [created] = response.json()
+    assert created["color_id"] == 3
+    assert created["current_stock"] == 4
+    assert Decimal(created["selling_price"]) == Decimal("100.00")  # inherited from the product
+    ledger = db.query(StockLedger).filter(StockLedger.product_variation_id == created["id"]).one()
+    assert (ledger.quantity_change, ledger.running_balance) == (4, 4)
+    history = db.query(PriceHistory).filter(PriceHistory.product_variation_id == created["id"]).one()
+    assert history.source == "variation_create"
+
+
+def test_bulk_create_allocates_distinct_skus(client, db):
+    new_product = client.post("/api/v1/products/", json={
+        "name": "Matrix Bag", "category_id": 1, "material_id": 1, "brand_id": 1, "style_id": 1,
+        "country_id": 1, "ownership_status": "yes", "selling_price": "80", "variations": []
+    }).json()
+
+    created = _bulk(client, new_product["id"], color_ids=[1, 2, 3], selling_price="85").json()
+
+    skus = [variation["sku"] for variation in created]
+    assert len(set(skus)) == 3
+    assert {Decimal(variation["selling_price"]) for variation in created} == {Decimal("85.00")}
+
+
+def test_bulk_create_rejects_colors_the_product_already_has(client, db):
+    response = _bulk(client, 1, color_ids=[2, 3])
+
+    assert response.status_code == 400
+    assert "color(s): 2" in response.json()["detail"]
+    assert db.query(ProductVariation).filter(ProductVariation.product_id == 1).count() == 2
+
+
+def test_bulk_create_rejects_unknown_and_repeated_colors(client):
+    assert _bulk(client, 1, color_ids=[99]).status_code == 400
+    assert _bulk(client, 1, color_ids=[3, 3]).status_code == 400
+    assert _bulk(client, 99, color_ids=[3]).status_code == 404
+
+
+def test_variation_update_and_delete(client, db):
+    response = client.put("/api/v1/products/1/variations/2", json={"selling_price": "60"})
+    assert Decimal(response.json()["selling_price"]) == Decimal("60.00")
+
+    assert client.delete("/api/v1/products/1/variations/2").status_code == 200
+    assert client.put("/api/v1/products/2/variations/1", json={"selling_price": "1"}).status_code == 404
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from app.models.product import ProductVariation
+from app.models.purchase import Purchase, PurchaseDetail
+
+URL = "/api/v1/purchases/"
+
+
+def test_create_reports_every_bad_line_and_writes_nothing(client, db):
+    db.query(ProductVariation).filter(ProductVariation.id == 2).update({"is_active": False})
+    db.commit()
+
+    response = client.post(URL, json={"supplier_id": 1, "details": [
+        {"product_variation_id": 1, "quantity": 2, "unit_price": "3.5"},
+        {"product_variation_id": 2, "quantity": 1, "unit_price": "1"},
+        {"product_variation_id": 99, "quantity": 1, "unit_price": "1"}
+    ]})
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"] == [
+        {"line": 1, "product_variation_id": 2, "error": "Product variation is inactive"},
+        {"line": 2, "product_variation_id": 99, "error": "Product variation not found"}
+    ]
+    assert db.query(Purchase).count() == 0
+
+
+def test_create_rejects_an_unknown_supplier(client):
+    response = client.post(URL, json={"supplier_id": 42, "details": []})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Supplier 42 not found"
+
+
+def test_create_inserts_large_orders_in_line_order(client, db):
+    variation_ids = [1, 3, 4, 5, 6] * 100
+
+    response = client.post(URL, json={"supplier_id": 1, "details": [
+        {"product_variation_id": variation_id, "quantity": 2, "unit_price": "3.5"}
+        for variation_id in variation_ids
+    ]})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert Decimal(body["total_price"]) == Decimal("3500.00")
+    assert [line["product_variation_id"] for line in body["details"]] == variation_ids
+    assert len({line["id"] for line in body["details"]}) == 500
+    assert db.query(PurchaseDetail).count() == 500
@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+import pytest
+
+URL = "/api/v1/purchases/"
+DATES = ["2026-01-01T10:00:00", "2026-01-15T23:59:00", "2026-02-01T00:00:00"]
+
+
+@pytest.fixture
+def purchases(client):
+    """Three purchases of 10.00 each: fully paid, partially paid (5.00) and unpaid"""
+    ids = [
+        client.post(URL, json={"supplier_id": 1, "purchase_date": purchase_date, "details": [
+            {"product_variation_id": 1, "quantity": 2, "unit_price": "5"}
+        ]}).json()["id"]
+        for purchase_date in DATES
+    ]
+    for purchase_id, amount in ((ids[0], "10"), (ids[1], "4"), (ids[1], "1")):
+        client.post(URL + f"{purchase_id}/payments", json={"amount_paid": amount})
+    return ids
+
+
+def _totals(body):
+    return [Decimal(body[field]) for field in ("total_price", "total_paid", "outstanding")]
+
+
+def test_list_returns_a_plain_page_of_rows(client, purchases):
+    response = client.get(URL, params={"limit": 2})
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.json()[0]["supplier_name"] == "Main Supplier"
+
+
+def test_summary_totals_every_match_by_payment_status(client, purchases):
+    body = client.get(URL + "summary").json()
+
+    assert body["count"] == 3
+    assert _totals(body) == [Decimal("30"), Decimal("15"), Decimal("15")]
+    assert [(row["payment_status"], row["count"], _totals(row)) for row in body["by_payment_status"]] == [
+        ("fully_paid", 1, [Decimal("10"), Decimal("10"), Decimal("0")]),
+        ("partially_paid", 1, [Decimal("10"), Decimal("5"), Decimal("5")]),
+        ("unpaid", 1, [Decimal("10"), Decimal("0"), Decimal("10")])
+    ]
+
+
+def test_summary_ignores_paging_and_applies_the_list_filters(client, purchases):
+    dates = {"purchase_date_from": "2026-01-01", "purchase_date_to": "2026-01-15"}
+
+    # the end date is inclusive of the whole day
+    assert len(client.get(URL, params=dates).json()) == 2
+    assert client.get(URL + "summary", params=dates).json()["count"] == 2
+    assert client.get(URL + "summary", params={"skip": 2, "limit": 1}).json()["count"] == 3
+
+    unpaid = client.get(URL + "summary", params={"payment_status": "unpaid"}).json()
+    assert (unpaid["count"], _totals(unpaid)) == (1, [Decimal("10"), Decimal("0"), Decimal("10")])
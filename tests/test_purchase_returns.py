@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from app.models.cost_layer import CostLayer
+from app.models.product import ProductVariation
+from app.models.purchase import PurchaseDetail
+from app.models.return_workflow import PurchaseReturn
+from app.services.purchase_return import return_service
+
+PURCHASES = "/api/v1/purchases/"
+URL = "/api/v1/purchase-returns/"
+
+
+def _buy(client, lines, receive=True):
+    purchase = client.post(PURCHASES, json={"supplier_id": 1, "details": [
+        {"product_variation_id": variation_id, "quantity": quantity, "unit_price": price}
+        for variation_id, quantity, price in lines
+    ]}).json()
+    if receive:
+        client.put(PURCHASES + f"{purchase['id']}/status", params={"new_status": "received"})
+    return purchase
+
+
+def _return(client, detail_id, quantity, variation_id=1):
+    return client.post(URL, json={
+        "purchase_detail_id": detail_id, "product_variation_id": variation_id, "quantity_returned": quantity
+    })
+
+
+def _stock_and_returned(db, detail_id):
+    db.expire_all()
+    return db.get(ProductVariation, 1).current_stock, db.get(PurchaseDetail, detail_id).quantity_returned_total
+
+
+@pytest.fixture
+def detail_id(client):
+    """A received purchase line of 5 units of variation 1 at 10.00"""
+    return _buy(client, [(1, 5, "10")])["details"][0]["id"]
+
+
+def test_only_received_purchases_can_be_returned(client):
+    purchase = _buy(client, [(1, 5, "10")], receive=False)
+
+    response = _return(client, purchase["details"][0]["id"], 1)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Only received purchases can be returned"
+
+
+def test_returns_are_capped_at_the_unreturned_quantity(client, db, detail_id):
+    assert _return(client, detail_id, 3).status_code == 200
+    assert _stock_and_returned(db, detail_id) == (2, 3)
+
+    response = _return(client, detail_id, 3)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot return 3 units: 2 of 5 remain returnable"
+
+
+def test_return_must_match_the_purchase_line(client, detail_id):
+    wrong_variation = _return(client, detail_id, 1, variation_id=2)
+    unknown_line = _return(client, "missing", 1)
+
+    assert wrong_variation.status_code == 400
+    assert wrong_variation.json()["detail"] == f"Purchase detail {detail_id} is for product variation 1"
+    assert unknown_line.json()["detail"] == "Purchase detail missing not found"
+
+
+def test_updating_a_return_moves_stock_and_the_returned_total_by_the_difference(client, db, detail_id):
+    return_id = _return(client, detail_id, 3).json()["id"]
+
+    assert client.put(URL + return_id, json={"quantity_returned": 5}).status_code == 200
+    assert _stock_and_returned(db, detail_id) == (0, 5)
+
+    too_many = client.put(URL + return_id, json={"quantity_returned": 6})
+    assert too_many.json()["detail"] == "Cannot return 1 units: 0 of 5 remain returnable"
+    assert db.get(PurchaseReturn, return_id).quantity_returned == 5
+
+    assert client.put(URL + return_id, json={"quantity_returned": 2}).status_code == 200
+    assert _stock_and_returned(db, detail_id) == (3, 2)
+    assert client.get(PURCHASES + f"{db.get(PurchaseDetail, detail_id).purchase_id}").json()[
+        "details"][0]["quantity_returned_total"] == 2
+
+
+def test_shrinking_a_return_restocks_at_the_line_cost(client, db, post_stock):
+    post_stock(1, 5, "50")
+    detail_id = _buy(client, [(1, 5, "20")])["details"][0]["id"]
+    return_id = _return(client, detail_id, 3).json()["id"]
+
+    client.put(URL + return_id, json={"quantity_returned": 1})
+
+    db.expire_all()
+    layers = [(layer.unit_cost, layer.quantity_remaining) for layer in db.query(CostLayer).order_by(CostLayer.id)]
+    assert layers[-1] == (Decimal("20.0000"), 2)
+    # 10 on hand at 35 with one unit returned at 20: (10 x 35 - 20) / 9
+    assert db.get(ProductVariation, 1).average_cost == Decimal("36.6667")
+
+
+def test_rebuild_returned_quantities_recounts_from_the_returns(client, db, session_factory):
+    purchase = _buy(client, [(1, 5, "10"), (2, 5, "10")])
+    detail_id = purchase["details"][0]["id"]
+    _return(client, detail_id, 2)
+    _return(client, detail_id, 1)
+    db.execute(update(PurchaseDetail).values(quantity_returned_total=0))
+    db.commit()
+
+    session = session_factory()
+    assert return_service.rebuild_returned_quantities(session) == 2
+    session.commit()
+
+    db.expire_all()
+    assert sorted((line.product_variation_id, line.quantity_returned_total) for line in db.query(PurchaseDetail)) == [
+        (1, 3), (2, 0)
+    ]
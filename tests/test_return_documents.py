@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.product import ProductVariation
+from app.models.return_workflow import PurchaseReturn
+from app.models.stock import StockLedger
+
+PURCHASES = "/api/v1/purchases/"
+URL = "/api/v1/purchase-returns/"
+
+
+@pytest.fixture
+def purchase(client):
+    """A received purchase of 5 units each of variations 1, 2 and 3 at 10, 20 and 30"""
+    purchase = client.post(PURCHASES, json={"supplier_id": 1, "details": [
+        {"product_variation_id": variation_id, "quantity": 5, "unit_price": str(10 * variation_id)}
+        for variation_id in (1, 2, 3)
+    ]}).json()
+    client.put(PURCHASES + f"{purchase['id']}/status", params={"new_status": "received"})
+    return purchase
+
+
+def _document(client, purchase, lines, **body):
+    return client.post(URL + "documents", json={"purchase_id": purchase["id"], "lines": lines, **body})
+
+
+def test_document_reports_every_bad_line_and_writes_nothing(client, db, purchase):
+    details = [line["id"] for line in purchase["details"]]
+
+    response = _document(client, purchase, [
+        {"purchase_detail_id": details[0], "quantity_returned": 6},
+        {"purchase_detail_id": "missing", "quantity_returned": 1},
+        {"purchase_detail_id": details[1], "quantity_returned": 1},
+        {"purchase_detail_id": details[1], "quantity_returned": 1}
+    ])
+
+    assert response.status_code == 422
+    assert [(error["line"], error["error"]) for error in response.json()["detail"]["errors"]] == [
+        (0, "Only 5 of 5 units remain returnable"),
+        (1, "Purchase detail not found on this purchase"),
+        (3, "Purchase detail appears more than once")
+    ]
+    assert db.query(PurchaseReturn).count() == 0
+
+
+def test_document_returns_all_lines_in_one_posting(client, db, purchase):
+    details = [line["id"] for line in purchase["details"]]
+    ledger_before = db.query(StockLedger).count()
+
+    response = _document(client, purchase, [
+        {"purchase_detail_id": details[0], "quantity_returned": 2},
+        {"purchase_detail_id": details[2], "quantity_returned": 5, "reason": "torn"}
+    ], reason="defective")
+
+    body = response.json()
+    assert response.status_code == 200
+    assert Decimal(body["refund_total"]) == Decimal("170.00")
+    assert [(line["quantity_returned"], Decimal(line["refund_amount"]), line["reason"]) for line in body["lines"]] == [
+        (2, Decimal("20.00"), "defective"), (5, Decimal("150.00"), "torn")
+    ]
+    db.expire_all()
+    assert db.query(StockLedger).count() - ledger_before == 2
+    assert [db.get(ProductVariation, id).current_stock for id in (1, 2, 3)] == [3, 5, 0]
+    assert client.get(URL + f"documents/{body['id']}").status_code == 200
+    single = client.post(URL, json={"purchase_detail_id": details[2], "product_variation_id": 3, "quantity_returned": 1})
+    assert single.json()["detail"] == "Cannot return 1 units: 0 of 5 remain returnable"
+
+
+def test_editing_a_document_line_keeps_the_refund_total_in_step(client, purchase):
+    details = [line["id"] for line in purchase["details"]]
+    document = _document(client, purchase, [
+        {"purchase_detail_id": details[0], "quantity_returned": 2},
+        {"purchase_detail_id": details[1], "quantity_returned": 1}
+    ]).json()
+    line_id = document["lines"][0]["id"]
+
+    resized = client.put(URL + line_id, json={"quantity_returned": 4})
+    assert Decimal(resized.json()["refund_amount"]) == Decimal("40.00")
+    assert Decimal(client.get(URL + f"documents/{document['id']}").json()["refund_total"]) == Decimal("60.00")
+
+    client.put(URL + line_id, json={"refund_amount": "5"})
+    assert Decimal(client.get(URL + f"documents/{document['id']}").json()["refund_total"]) == Decimal("25.00")
+
+
+def test_document_creation_is_idempotent(client, db, purchase):
+    lines = [{"purchase_detail_id": purchase["details"][0]["id"], "quantity_returned": 1}]
+    headers = {"Idempotency-Key": "doc1"}
+
+    first = client.post(URL + "documents", json={"purchase_id": purchase["id"], "lines": lines}, headers=headers)
+    retry = client.post(URL + "documents", json={"purchase_id": purchase["id"], "lines": lines}, headers=headers)
+
+    assert retry.json() == first.json()
+    assert db.query(PurchaseReturn).count() == 1
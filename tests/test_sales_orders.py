@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.product import ProductVariation
+from app.models.sales import SalesOrder, SalesOrderStatus
+from app.models.stock import StockLedger
+from app.services.sales import sales_service
+
+URL = "/api/v1/sales/"
+
+
+@pytest.fixture
+def stocked(post_stock):
+    """10 units each of variations 1 and 3"""
+    post_stock(1, 10, "50")
+    post_stock(3, 10, "50")
+
+
+def _order(client, lines, **body):
+    return client.post(URL, json={"details": [
+        {"product_variation_id": variation_id, "quantity": quantity}
+        for variation_id, quantity in lines
+    ], **body})
+
+
+def _stock(db):
+    db.expire_all()
+    return {variation.id: variation.current_stock for variation in db.query(ProductVariation)}
+
+
+def test_create_reports_bad_lines(client, stocked):
+    response = _order(client, [(1, 3), (99, 1)], customer_name="Ann")
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"] == [
+        {"line": 1, "product_variation_id": 99, "error": "Product variation not found"}
+    ]
+
+
+def test_draft_prices_lines_and_leaves_stock_alone(client, db, stocked):
+    response = client.post(URL, json={"customer_name": "Ann", "details": [
+        {"product_variation_id": 1, "quantity": 3},
+        {"product_variation_id": 1, "quantity": 4},
+        {"product_variation_id": 3, "quantity": 2, "unit_price": "150"}
+    ]})
+
+    assert response.status_code == 200
+    # 7 x 100 at the variation price plus 2 x 150
+    assert Decimal(response.json()["total_price"]) == Decimal("1000.00")
+    assert response.json()["status"] == "draft"
+    assert _stock(db)[1] == 10
+
+
+def test_fulfilled_orders_must_fit_the_stock_across_their_lines(client, db, stocked):
+    response = _order(client, [(1, 6), (1, 5)], status="fulfilled")
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"] == [
+        {"product_variation_id": 1, "requested": 11, "available": 10, "error": "Insufficient stock"}
+    ]
+    assert db.query(SalesOrder).count() == 0
+
+
+def test_fulfilling_posts_each_line_to_the_ledger_once(client, db, stocked):
+    order_id = _order(client, [(1, 3), (1, 4), (3, 2)]).json()["id"]
+
+    assert client.post(URL + f"{order_id}/fulfil").json()["status"] == "fulfilled"
+    again = client.post(URL + f"{order_id}/fulfil")
+
+    assert again.status_code == 400
+    assert again.json()["detail"] == "Cannot change sales order status from fulfilled to fulfilled"
+    sales = db.query(StockLedger).filter(StockLedger.source_type == "SalesDetail").order_by(StockLedger.timestamp)
+    assert sorted((entry.product_variation_id, entry.quantity_change) for entry in sales) == [
+        (1, -4), (1, -3), (3, -2)
+    ]
+    assert [entry.running_balance for entry in sales if entry.product_variation_id == 1][-1] == 3
+    assert _stock(db)[1] == 3 and _stock(db)[3] == 8
+    assert len(client.get(URL, params={"status": "fulfilled"}).json()) == 1
+
+
+def test_status_change_rechecks_the_order_under_its_row_lock(client, db, session_factory, stocked):
+    order_id = _order(client, [(1, 3)]).json()["id"]
+    stale = session_factory()
+    assert stale.get(SalesOrder, order_id).status == SalesOrderStatus.DRAFT
+
+    sales_service.update_order_status(session_factory(), order_id, SalesOrderStatus.FULFILLED, 1)
+
+    with pytest.raises(ValueError, match="from fulfilled to fulfilled"):
+        sales_service.update_order_status(stale, order_id, SalesOrderStatus.FULFILLED, 1)
+    assert _stock(db)[1] == 7
+
+
+def test_only_drafts_can_be_deleted(client, stocked):
+    order_id = _order(client, [(1, 1)]).json()["id"]
+
+    assert client.put(URL + order_id, json={"status": "cancelled"}).json()["status"] == "cancelled"
+    assert client.delete(URL + order_id).status_code == 400
+    assert client.get(URL + "missing").status_code == 404
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app.services.reservation as reservation_module
+from app.core.config import settings
+from app.models.product import ProductVariation
+from app.models.sales import SalesOrder, SalesOrderStatus, StockReservation
+from app.services.reservation import reservation_service
+from app.services.sales import sales_service
+
+URL = "/api/v1/sales/"
+
+
+@pytest.fixture
+def stocked(post_stock):
+    """10 units each of variations 1 and 3"""
+    post_stock(1, 10, "50")
+    post_stock(3, 10, "50")
+
+
+def _order(client, status, lines):
+    return client.post(URL, json={"status": status, "details": [
+        {"product_variation_id": variation_id, "quantity": quantity} for variation_id, quantity in lines
+    ]})
+
+
+def _levels(db, *variation_ids):
+    db.expire_all()
+    return [
+        (variation.current_stock, variation.reserved_stock)
+        for variation in db.query(ProductVariation).filter(ProductVariation.id.in_(variation_ids))
+        .order_by(ProductVariation.id)
+    ]
+
+
+def test_confirming_reserves_stock_without_moving_it(client, db, stocked):
+    response = _order(client, "confirmed", [(1, 6), (3, 2)])
+
+    assert response.json()["status"] == "confirmed"
+    assert _levels(db, 1, 3) == [(10, 6), (10, 2)]
+
+
+def test_reserved_stock_is_unavailable_to_other_orders(client, db, stocked):
+    _order(client, "confirmed", [(1, 6)])
+
+    confirm = _order(client, "confirmed", [(1, 5), (3, 1)])
+    fulfil = _order(client, "fulfilled", [(1, 5)])
+
+    expected = [{"product_variation_id": 1, "requested": 5, "available": 4, "error": "Insufficient stock"}]
+    assert (confirm.status_code, confirm.json()["detail"]["errors"]) == (422, expected)
+    assert (fulfil.status_code, fulfil.json()["detail"]["errors"]) == (422, expected)
+    assert _levels(db, 1, 3) == [(10, 6), (10, 0)]
+    assert _order(client, "fulfilled", [(1, 4)]).status_code == 200
+
+
+def test_fulfilling_consumes_the_reservation(client, db, stocked):
+    order_id = _order(client, "confirmed", [(1, 6), (3, 2)]).json()["id"]
+
+    assert client.post(URL + f"{order_id}/fulfil").json()["status"] == "fulfilled"
+
+    assert _levels(db, 1, 3) == [(4, 0), (8, 0)]
+    assert db.query(StockReservation).count() == 0
+
+
+def test_cancelling_releases_the_reservation(client, db, stocked):
+    order_id = _order(client, "confirmed", [(3, 3)]).json()["id"]
+
+    response = client.put(URL + f"{order_id}/status", params={"new_status": "cancelled"})
+
+    assert response.json()["status"] == "cancelled"
+    assert _levels(db, 3) == [(10, 0)]
+
+
+def test_expiry_releases_lapsed_reservations_and_reverts_orders_to_draft(client, db, stocked):
+    order_id = _order(client, "confirmed", [(3, 3)]).json()["id"]
+
+    assert reservation_service.expire(db, datetime.now(timezone.utc)) == 0
+    assert reservation_service.expire(db, datetime.now(timezone.utc) + timedelta(days=2)) == 1
+    db.commit()
+
+    assert _levels(db, 3) == [(10, 0)]
+    assert db.get(SalesOrder, order_id).status == SalesOrderStatus.DRAFT
+    assert db.query(StockReservation).count() == 0
+
+
+def test_fulfilling_an_order_whose_reservation_expired_rechecks_stock(client, db, session_factory, stocked):
+    order_id = _order(client, "confirmed", [(1, 3)]).json()["id"]
+    stale = session_factory()
+    stale.get(SalesOrder, order_id)
+    reservation_service.expire(db, datetime.now(timezone.utc) + timedelta(days=2))
+    db.commit()
+
+    assert reservation_service.release(session_factory(), order_id) == {}
+    order = sales_service.update_order_status(stale, order_id, SalesOrderStatus.FULFILLED, 1)
+
+    assert order.status == SalesOrderStatus.FULFILLED
+    assert _levels(db, 1) == [(7, 0)]
+
+
+def test_sweeper_expires_reservations_in_the_background(client, db, session_factory, stocked, monkeypatch):
+    monkeypatch.setattr(reservation_module, "SessionLocal", session_factory)
+    monkeypatch.setattr(settings, "STOCK_RESERVATION_TTL_MINUTES", -1)
+    order_id = _order(client, "confirmed", [(1, 3)]).json()["id"]
+
+    async def sweep_briefly():
+        sweeper = asyncio.create_task(reservation_service.run_sweeper(0.05))
+        await asyncio.sleep(0.3)
+        sweeper.cancel()
+
+    asyncio.run(sweep_briefly())
+
+    assert client.get(URL + order_id).json()["status"] == "draft"
+    assert _levels(db, 1) == [(10, 0)]
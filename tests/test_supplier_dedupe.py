@@ -0,0 +1,78 @@
+from sqlalchemy import text
+
+from app.models.product import Product
+from app.models.purchase import Purchase
+from app.services.supplier import supplier_service
+
+URL = "/api/v1/suppliers/"
+
+
+def _create(client, params=None, **body):
+    return client.post(URL, params=params, json={"supplier_type": "factory", **body})
+
+
+def test_create_rejects_likely_duplicates_by_normalized_name_and_phone(client):
+    _create(client, name="Rahman Bags Ltd.", phone_number="+880 1711-000111", email_address="x@y.com")
+
+    by_name = _create(client, name="rahman bags")
+    by_phone = _create(client, name="Other", whatsapp_number="01711000111")
+
+    assert by_name.status_code == 409
+    assert by_name.json()["detail"]["duplicates"][0]["matched_on"] == ["name"]
+    assert by_phone.status_code == 409
+    assert by_phone.json()["detail"]["duplicates"][0]["matched_on"] == ["phone"]
+    assert _create(client, params={"allow_duplicate": True}, name="Rahman Bags").status_code == 200
+
+
+def test_dedupe_check_reports_every_match(client):
+    _create(client, name="Rahman Bags Ltd.", email_address="x@y.com")
+    _create(client, params={"allow_duplicate": True}, name="Rahman Bags", email_address="X@y.com ")
+
+    response = client.post(URL + "dedupe-check", json={"name": "RAHMAN  bags co", "email_address": "x@Y.com"})
+
+    assert [(match["name"], match["matched_on"]) for match in response.json()] == [
+        ("Rahman Bags Ltd.", ["name", "email"]),
+        ("Rahman Bags", ["name", "email"])
+    ]
+
+
+def test_merge_repoints_purchases_and_products_and_deactivates_sources(client, db):
+    target = _create(client, name="Rahman Bags Ltd.").json()
+    source = _create(client, params={"allow_duplicate": True}, name="Rahman Bags").json()
+    db.add(Purchase(supplier_id=source["id"], total_price=5, created_by=1))
+    db.query(Product).filter(Product.id == 1).update({"supplier_id": source["id"]})
+    db.commit()
+
+    response = client.post(URL + "merge", json={"merges": [{"target_id": target["id"], "source_ids": [source["id"]]}]})
+
+    assert response.json() == {"suppliers_merged": 1, "purchases_repointed": 1, "products_repointed": 1}
+    assert client.get(URL + f"{source['id']}").json()["is_active"] is False
+    assert client.get(URL + f"{target['id']}/stats").json()["purchase_count"] == 1
+
+
+def test_merge_rejects_cycles_and_self_merges(client):
+    first = _create(client, name="First").json()["id"]
+    second = _create(client, name="Second").json()["id"]
+
+    assert client.post(URL + "merge", json={"merges": [{"target_id": first, "source_ids": [first]}]}).status_code == 400
+    response = client.post(URL + "merge", json={"merges": [
+        {"target_id": first, "source_ids": [second]},
+        {"target_id": second, "source_ids": [1]}
+    ]})
+    assert response.status_code == 400
+
+
+def test_rebuild_fills_keys_for_rows_written_outside_the_orm(client, db, session_factory):
+    db.execute(text(
+        "INSERT INTO suppliers (supplier_type, name, phone_number, is_active) "
+        "VALUES ('FACTORY', 'Acme Bags Ltd', '+880 1711-123456', 1)"
+    ))
+    db.commit()
+    check = {"name": "ACME bags", "phone_number": "01711123456"}
+    assert client.post(URL + "dedupe-check", json=check).json() == []
+
+    session = session_factory()
+    assert supplier_service.rebuild_dedupe_keys(session, batch_size=1) == 2
+    session.commit()
+
+    assert client.post(URL + "dedupe-check", json=check).json()[0]["matched_on"] == ["name", "phone"]
@@ -0,0 +1,23 @@
+def _names(response):
+    return [supplier["name"] for supplier in response.json()]
+
+
+def test_dropdowns_list_suppliers_by_type_and_ownership(client):
+    assert _names(client.get("/api/v1/suppliers/list")) == ["Main Supplier"]
+    assert _names(client.get("/api/v1/suppliers/type/factory")) == ["Main Supplier"]
+    assert _names(client.get("/api/v1/suppliers/type/wholesaler")) == []
+    assert _names(client.get("/api/v1/products/suppliers/yes")) == ["Main Supplier"]
+    assert _names(client.get("/api/v1/products/suppliers/no")) == []
+
+
+def test_supplier_writes_refresh_the_cached_lists(client):
+    client.get("/api/v1/suppliers/type/factory")
+    etag = client.get("/api/v1/attributes/bootstrap").headers["etag"]
+
+    response = client.post("/api/v1/suppliers/", json={
+        "name": "Alpha", "supplier_type": "factory", "phone_number": "123"
+    })
+
+    assert response.status_code == 200
+    assert _names(client.get("/api/v1/suppliers/type/factory")) == ["Alpha", "Main Supplier"]
+    assert client.get("/api/v1/attributes/bootstrap", headers={"If-None-Match": etag}).status_code == 200
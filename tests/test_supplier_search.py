@@ -0,0 +1,30 @@
+import pytest
+
+SUPPLIERS = [
+    ("Rahman Bags", "+880 1711-000111", "Karim"),
+    ("Dhaka Leather", "01822", "Rahima"),
+    ("50%_Off", None, None)
+]
+
+
+@pytest.fixture
+def suppliers(client):
+    for name, phone, contact in SUPPLIERS:
+        client.post("/api/v1/suppliers/", json={
+            "name": name, "supplier_type": "factory", "phone_number": phone, "contact_person": contact
+        })
+
+
+@pytest.mark.parametrize("search, names", [
+    ("rahm", ["Rahman Bags"]),
+    ("1711", ["Rahman Bags"]),
+    ("leath", ["Dhaka Leather"]),
+    ("%", ["50%_Off"]),
+    ("_", ["50%_Off"]),
+    ("zzz", []),
+    ("  ", ["Main Supplier", "Rahman Bags", "Dhaka Leather", "50%_Off"])
+])
+def test_search_matches_name_phone_and_contact_substrings(client, suppliers, search, names):
+    response = client.get("/api/v1/suppliers/", params={"search": search})
+
+    assert [supplier["name"] for supplier in response.json()] == names
@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from app.models.purchase import PurchaseStatus
+from app.models.supplier_stats import SupplierStats
+from app.schemas.purchase import PaymentHistoryCreate, PurchaseCreate
+from app.schemas.purchase_return import PurchaseReturnCreate, PurchaseReturnUpdate
+from app.services.purchase import purchase_service
+from app.services.purchase_return import return_service
+from app.services.supplier_stats import supplier_stats_service
+
+
+def _purchase(db, lines, **fields):
+    return purchase_service.create_purchase(db, PurchaseCreate(
+        supplier_id=1,
+        details=[
+            {"product_variation_id": variation_id, "quantity": quantity, "unit_price": price}
+            for variation_id, quantity, price in lines
+        ],
+        **fields
+    ), 1)
+
+
+def test_rollup_tracks_purchases_payments_and_returns(client, db):
+    purchase = _purchase(db, [(1, 10, "5"), (2, 5, "2")], expected_arrival_date=date.today() - timedelta(days=3))
+    other = _purchase(db, [(1, 1, "7")])
+    purchase_service.update_purchase_status(db, purchase.id, PurchaseStatus.RECEIVED, 1)
+    purchase_service.add_payment(db, purchase.id, PaymentHistoryCreate(amount_paid=Decimal("20")), 1)
+    purchase_return = return_service.create_purchase_return(db, PurchaseReturnCreate(
+        purchase_detail_id=purchase.details[0].id, product_variation_id=1, quantity_returned=2
+    ), 1)
+    return_service.update_purchase_return(db, purchase_return, PurchaseReturnUpdate(quantity_returned=4), 1)
+    purchase_service.delete_purchase(db, other.id)
+
+    stats = client.get("/api/v1/suppliers/1/stats").json()
+
+    assert stats["purchase_count"] == 1
+    assert Decimal(stats["total_purchased"]) == Decimal("60.00")
+    assert Decimal(stats["outstanding_balance"]) == Decimal("40.00")
+    assert (stats["quantity_purchased"], stats["quantity_returned"]) == (15, 4)
+    assert stats["average_lead_time_days"] == 3.0
+
+
+def test_incremental_rollup_matches_a_full_recompute(db):
+    purchase = _purchase(db, [(1, 10, "5")], expected_arrival_date=date.today())
+    purchase_service.update_purchase_status(db, purchase.id, PurchaseStatus.RECEIVED, 1)
+    purchase_service.add_payment(db, purchase.id, PaymentHistoryCreate(amount_paid=Decimal("7.5")), 1)
+    incremental = supplier_stats_service.get_stats(db, 1)
+
+    db.query(SupplierStats).delete()
+    db.commit()
+
+    assert supplier_stats_service.get_stats(db, 1) == incremental
+
+
+def test_first_writers_racing_to_create_the_rollup_keep_both_deltas(db, session_factory):
+    compute = supplier_stats_service._compute
+
+    def compute_then_lose_the_race(session, supplier_ids):
+        rows = compute(session, supplier_ids)
+        # Another transaction creates the row (with its own delta) first
+        other = session_factory()
+        other.add(SupplierStats(
+            supplier_id=1, purchase_count=5, total_purchased=0, total_paid=0, quantity_purchased=0,
+            quantity_returned=0, received_count=0, lead_time_days_total=0
+        ))
+        other.commit()
+        return rows
+
+    with mock.patch.object(supplier_stats_service, "_compute", compute_then_lose_the_race):
+        supplier_stats_service.apply(db, 1, purchase_count=1)
+        db.commit()
+
+    db.expire_all()
+    assert db.get(SupplierStats, 1).purchase_count == 6
+
+
+def test_stats_for_an_unknown_supplier_is_404(client):
+    assert client.get("/api/v1/suppliers/99/stats").status_code == 404
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from unittest import mock
+
+from app.models.product import ProductVariation
+from app.services.variation_lookup import variation_lookup
+
+URL = "/api/v1/variations/lookup"
+
+
+def _lookup(client, code):
+    return client.get(URL, params={"code": code})
+
+
+def test_lookup_resolves_barcodes_and_skus(client, db):
+    db.get(ProductVariation, 3).barcode = "4006381333931"
+    db.commit()
+
+    by_barcode = _lookup(client, "4006381333931")
+    by_sku = _lookup(client, " SKU-1-1 ")
+
+    assert by_barcode.status_code == 200
+    assert by_barcode.json() == {
+        "id": 3, "product_id": 2, "product_name": "Bag 1", "sku": "SKU-2-1", "barcode": "4006381333931",
+        "color_name": "Black", "selling_price": "101.00", "is_active": True
+    }
+    assert by_sku.json()["id"] == 1
+    assert _lookup(client, "missing").status_code == 404
+    assert client.get(URL).status_code == 422
+
+
+def test_variation_writes_invalidate_cached_lookups(client, db):
+    db.get(ProductVariation, 3).barcode = "4006381333931"
+    db.commit()
+    _lookup(client, "4006381333931")
+
+    client.put("/api/v1/products/2/variations/3", json={"selling_price": "222", "barcode": "4012345678901"})
+
+    assert _lookup(client, "4006381333931").status_code == 404
+    assert Decimal(_lookup(client, "4012345678901").json()["selling_price"]) == Decimal("222.00")
+
+
+def test_color_renames_invalidate_cached_lookups(client):
+    assert _lookup(client, "SKU-1-1").json()["color_name"] == "Black"
+
+    assert client.put("/api/v1/attributes/colors/1", json={"name": "Jet Black"}).status_code == 200
+
+    assert _lookup(client, "SKU-1-1").json()["color_name"] == "Jet Black"
+
+
+def test_cached_lookups_skip_the_database(db):
+    body = variation_lookup.get_json(db, "SKU-1-1")
+
+    with mock.patch.object(db, "execute", side_effect=AssertionError("queried")):
+        assert variation_lookup.get_json(db, "SKU-1-1") is body